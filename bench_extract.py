@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+extract.py 성능 점검용 마이크로벤치 (합성 PDF 페이지 사용, 실제 보고서 불필요)
+사용: python bench_extract.py [drawings]
+      python bench_extract.py <PDF경로>   → 실제 보고서로 페이지 텍스트 모델 비교 + 프리필터 통계
+"""
+import sys, time, tracemalloc
+from io import BytesIO
+from typing import List
+import numpy as np
+from PIL import Image
+import fitz  # PyMuPDF
+from extract import (_DrawingIndex, _lines_in_rect, _render_region, _cut_vertical_whitespace, _CUT_PARAMS,
+                     _PageModel, _scan_labels, iter_chunks)
+
+def _timeit(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t0)
+    return best
+
+def _synthetic_page(n_ops: int) -> fitz.Page:
+    """벡터 차트처럼 선/사각형이 빽빽한 A4 페이지 1장"""
+    doc = fitz.open()
+    page = doc.new_page()
+    for k in range(n_ops):
+        x = 40 + (k * 7) % 500; y = 60 + (k * 13) % 720
+        if k % 3:
+            page.draw_line((x, y), (x + 12, y))
+        else:
+            page.draw_rect(fitz.Rect(x, y, x + 8, y + 6))
+    return page
+
+def _candidate_rects(page: fitz.Page, n: int = 8) -> List[fitz.Rect]:
+    """라벨 아래 영역처럼 페이지를 가로지르는 띠 n개"""
+    h = (page.rect.height - 40) / n
+    return [fitz.Rect(8, 20 + i * h, page.rect.width - 8, 20 + (i + 1) * h - 4) for i in range(n)]
+
+def _legacy_count(page: fitz.Page, rect: fitz.Rect) -> int:
+    """기존 방식: 후보마다 get_drawings() 재호출 + 파이썬 루프"""
+    n = 0
+    for d in page.get_drawings() or []:
+        for it in d.get("items", []) or []:
+            if it[0] == "l":
+                p1, p2 = it[1], it[2]
+                if min(p1.x, p2.x) <= rect.x1 and max(p1.x, p2.x) >= rect.x0 and max(p1.y, p2.y) >= rect.y0 and min(p1.y, p2.y) <= rect.y1:
+                    n += 1
+            elif it[0] == "re":
+                r = fitz.Rect(it[1])
+                if r.x0 <= rect.x1 and r.x1 >= rect.x0 and r.y1 >= rect.y0 and r.y0 <= rect.y1:
+                    n += 4
+    return n
+
+def bench_drawing_index(n_ops: int):
+    page = _synthetic_page(n_ops)
+    rects = _candidate_rects(page)
+    legacy = [_legacy_count(page, r) for r in rects]
+    dix = _DrawingIndex.from_page(page)
+    fast = [_lines_in_rect(dix, r) for r in rects]
+    assert legacy == fast, (legacy, fast)
+
+    t_old = _timeit(lambda: [_legacy_count(page, r) for r in rects], repeat=3)
+    def _indexed():
+        ix = _DrawingIndex.from_page(page)
+        return [_lines_in_rect(ix, r) for r in rects]
+    t_new = _timeit(_indexed)
+    t_q = _timeit(lambda: [_lines_in_rect(dix, r) for r in rects])
+    print(f"[drawings] ops={n_ops:>6} 후보={len(rects)}  기존={t_old*1e3:8.1f}ms  "
+          f"인덱스(빌드+질의)={t_new*1e3:7.1f}ms  질의만={t_q*1e3:6.2f}ms  x{t_old/max(t_new,1e-9):.1f}")
+
+def _legacy_crop(page: fitz.Page, rect: fitz.Rect, dpi: int, upper_ratio: float, lower_blank: int,
+                 white: int = 242, pad: int = 6) -> Image.Image:
+    """기존 크롭: PNG 인코딩→디코딩 왕복 + 파이썬 루프 여백 탐색"""
+    pix = page.get_pixmap(matrix=fitz.Matrix(dpi / 72, dpi / 72), clip=rect, alpha=False)
+    pil = Image.open(BytesIO(pix.tobytes(output="png"))).convert("RGB")
+    arr = np.array(pil.convert("L")); row = (arr < white).mean(axis=1); H = arr.shape[0]
+    top = 0
+    for i, d in enumerate(row):
+        if d >= upper_ratio: top = i; break
+    blank = row < 0.01; run, cut = 0, None
+    for i in range(max(top + 10, 0), H):
+        if blank[i]:
+            run += 1
+            if run >= lower_blank: cut = i - run; break
+        else:
+            run = 0
+    bottom = cut if cut is not None else int(np.where(row > 0.02)[0][-1]) if np.any(row > 0.02) else H - 1
+    top = max(0, top - pad); bottom = min(H - 1, bottom + pad)
+    return pil if bottom <= top else pil.crop((0, top, pil.width, bottom + 1))
+
+def _peak_mb(fn) -> float:
+    """tracemalloc 기준 피크: 파이썬 bytes/numpy 할당만 집계(PIL 내부 버퍼는 제외되므로 상대 비교용)"""
+    tracemalloc.start(); fn(); _, peak = tracemalloc.get_traced_memory(); tracemalloc.stop()
+    return peak / 1e6
+
+def bench_crop(dpi: int = 300):
+    """표 하나 크기 영역: 기존 PNG 왕복 vs pix.samples 직행 + 벡터화 여백 컷"""
+    page = _synthetic_page(400)
+    rect = fitz.Rect(40, 60, 560, 420)
+    p = _CUT_PARAMS["table"]
+    old = _legacy_crop(page, rect, dpi, **p)
+    new = _cut_vertical_whitespace(_render_region(page, rect, dpi=dpi), **p)
+    assert old.size == new.size and np.array_equal(np.asarray(old), np.asarray(new))
+
+    t_old = _timeit(lambda: _legacy_crop(page, rect, dpi, **p))
+    t_new = _timeit(lambda: _cut_vertical_whitespace(_render_region(page, rect, dpi=dpi), **p))
+    t_gray = _timeit(lambda: _cut_vertical_whitespace(_render_region(page, rect, dpi=dpi, gray=True), **p))
+    m_old = _peak_mb(lambda: _legacy_crop(page, rect, dpi, **p))
+    m_new = _peak_mb(lambda: _cut_vertical_whitespace(_render_region(page, rect, dpi=dpi), **p))
+    print(f"[crop] dpi={dpi} {new.size[0]}x{new.size[1]}  기존={t_old*1e3:7.1f}ms/{m_old:6.1f}MB  "
+          f"신규={t_new*1e3:6.1f}ms/{m_new:6.1f}MB  그레이={t_gray*1e3:6.1f}ms  x{t_old/max(t_new,1e-9):.1f}")
+
+def _synthetic_report(n_pages: int = 30) -> fitz.Document:
+    """본문 + 숫자 표(텍스트 표)가 섞인 합성 보고서"""
+    doc = fitz.open()
+    for i in range(n_pages):
+        page = doc.new_page()
+        y = 60
+        for r in range(40):
+            line = f"{2000 + r}   {r * 1.5:.1f}   {r * 1000 + i:,}   policy market trend" if r % 2 else "energy demand supply outlook " * 3
+            page.insert_text((40, y), line, fontsize=9); y += 18
+    return doc
+
+def bench_page_model(pdf_path: str = ""):
+    """
+    페이지당 텍스트 추출 비용: 기존(get_text + dict + 후보마다 clip get_text 2회)
+    vs _PageModel(TextPage 1회 공유 + 배열 영역 질의)
+    """
+    doc = fitz.open(pdf_path) if pdf_path else _synthetic_report()
+    # 후보 영역: 실제 라벨 스캔 결과가 없으면 페이지를 띠 4개로 나눈 영역
+    regions = []
+    for page in doc:
+        rs = [fitz.Rect(*lb["bbox"]) for lb in _scan_labels(page) if lb["kind"] == "table"]
+        regions.append(rs or _candidate_rects(page, 4))
+
+    def legacy():
+        for page, rs in zip(doc, regions):
+            page.get_text(); page.get_text("dict")
+            for r in rs:
+                page.get_text("text", clip=r); page.get_text("text", clip=r)
+
+    def model():
+        for page, rs in zip(doc, regions):
+            m = _PageModel(page); m.page_dict
+            for r in rs:
+                m.digit_density(r); m.text_in(r)
+
+    t_old = _timeit(legacy, repeat=3); t_new = _timeit(model, repeat=3)
+    n = doc.page_count; n_reg = sum(len(r) for r in regions)
+    print(f"[page-model] {pdf_path or '합성'} pages={n} 영역={n_reg}  기존={t_old/n*1e3:6.2f}ms/page  "
+          f"모델={t_new/n*1e3:6.2f}ms/page  x{t_old/max(t_new,1e-9):.1f}")
+
+def bench_prefilter(pdf_path: str = ""):
+    """
+    평문 프리필터로 라벨 스캔(dict+도형)을 건너뛴 페이지 수와 단계별 시간(info["ms"] 합계).
+    건너뛴 페이지에 _scan_labels를 강제로 돌렸을 때 비용도 함께 출력(절감분 추정).
+    """
+    doc = fitz.open(pdf_path) if pdf_path else _synthetic_report()
+    infos = [res["info"] for res in iter_chunks(doc.tobytes())]
+    skipped = [inf["page_idx"] for inf in infos if not inf["scanned"] and not inf["is_toc"]]
+    ms: dict = {}
+    for inf in infos:
+        for k, v in inf["ms"].items():
+            ms[k] = ms.get(k, 0.0) + v
+    t_skip = _timeit(lambda: [_scan_labels(doc[p]) for p in skipped], repeat=1)
+    stages = "  ".join(f"{k}={v:.1f}ms" for k, v in ms.items())
+    print(f"[prefilter] {pdf_path or '합성'} pages={len(infos)} 건너뜀={len(skipped)}  {stages}  "
+          f"건너뛴 페이지 강제 스캔={t_skip*1e3:.1f}ms")
+
+def main():
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        bench_page_model(sys.argv[1]); bench_prefilter(sys.argv[1]); return
+    sizes = [int(sys.argv[1])] if len(sys.argv) > 1 else [500, 2000, 8000]
+    for n in sizes:
+        bench_drawing_index(n)
+    for dpi in (220, 300):
+        bench_crop(dpi)
+    bench_page_model()
+    bench_prefilter()
+
+if __name__ == "__main__":
+    main()
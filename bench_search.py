@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+본문 페이지 검색(_search_text_pages)·BM25 채점 지연 시간 점검용 마이크로벤치 (합성 본문 사용, LLM 호출 없음)
+사용: python bench_search.py [페이지수]
+      python bench_search.py bm25 [패시지수]   → rank_bm25 대비 CSR 채점(단건/배치) 점수 동일성 + 지연
+      python bench_search.py topk [패시지수]   → 임베딩 상위 k: 전체 argsort vs argpartition(단건/배치) 규모별 지연
+      python bench_search.py <PDF경로>   → 실제 보고서 본문으로 비교
+"""
+import random, sys, time
+from typing import Any, Dict, List
+import numpy as np
+import fitz  # PyMuPDF
+from rank_bm25 import BM25Okapi
+from rag import _LiteIndex, _normalize, _top_k_rows
+from text_index import BM25Index, build_page_index, tokenize
+
+def _timeit(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t0)
+    return best
+
+_WORDS = ("에너지 수요 공급 전망 전력 가스 석유 정책 시장 가격 산업 부문 발전 설비 효율 "
+          "탄소 배출 감축 목표 요금 소비 증가 감소 분석 결과 도입 확대 제도 개선 국가").split()
+_NUMS = ["2023년", "12.5%", "1,234,567", "kWh", "toe", "MWh", "45.2%", "2030년"]
+_QUERIES = ["2030년 전력 수요 전망", "가스 요금 인상 효과", "탄소 배출 감축 목표 12.5%", "산업 부문 에너지 효율"]
+
+def _synthetic_pages(n_pages: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """보고서 본문처럼 어휘는 좁고 페이지당 300~700 토큰인 페이지(지프 분포로 단어 선택)"""
+    rnd = random.Random(seed)
+    vocab = _WORDS + _NUMS + [f"용어{i}" for i in range(3000)]
+    weights = [1.0 / (r + 1) for r in range(len(vocab))]
+    return [{"page": i + 1, "text": " ".join(rnd.choices(vocab, weights, k=rnd.randint(300, 700)))}
+            for i in range(n_pages)]
+
+def _legacy_search(query: str, pages: List[Dict[str, Any]], k: int = 3, per_len: int = 1200) -> list:
+    """기존: 질문마다 전 페이지 토큰화 + BM25Okapi 재구성 + 파이썬 정렬"""
+    docs = [p.get("text") or "" for p in pages]
+    scores = BM25Okapi([tokenize(d) for d in docs]).get_scores(tokenize(query))
+    order = sorted(range(len(docs)), key=lambda i: scores[i], reverse=True)[:k]
+    return [{"page": pages[i]["page"], "snippet": docs[i].strip()[:per_len], "score": float(scores[i])}
+            for i in order if docs[i].strip()]
+
+def _indexed_search(idx, query: str, pages: List[Dict[str, Any]], k: int = 3, per_len: int = 1200) -> list:
+    """신규: 적재 시 만든 역색인의 postings만 사용(ui_pages._search_text_pages와 같은 절차)"""
+    scores = idx.get_scores(tokenize(query))
+    order = np.argsort(-scores, kind="stable")[:k]
+    return [{"page": pages[i]["page"], "snippet": (pages[i]["text"] or "").strip()[:per_len], "score": float(scores[i])}
+            for i in order if (pages[i]["text"] or "").strip()]
+
+def bench_search(pages: List[Dict[str, Any]], label: str):
+    t_build = _timeit(lambda: build_page_index(pages), repeat=3)
+    idx = build_page_index(pages)
+    for q in _QUERIES:  # 점수·순서 동일성(부동소수 합산 순서 차이만 허용)
+        old, new = _legacy_search(q, pages), _indexed_search(idx, q, pages)
+        assert [h["page"] for h in old] == [h["page"] for h in new], (q, old, new)
+        assert np.allclose([h["score"] for h in old], [h["score"] for h in new]), q
+        full_old = BM25Okapi([tokenize(p["text"]) for p in pages]).get_scores(tokenize(q))
+        assert np.allclose(full_old, idx.get_scores(tokenize(q)))
+    t_old = _timeit(lambda: [_legacy_search(q, pages) for q in _QUERIES], repeat=3) / len(_QUERIES)
+    t_new = _timeit(lambda: [_indexed_search(idx, q, pages) for q in _QUERIES]) / len(_QUERIES)
+    print(f"[search] {label} pages={len(pages)} 용어={len(idx.vocab):,} postings={len(idx.docs):,}  "
+          f"기존={t_old*1e3:8.1f}ms/질문  색인 빌드(1회)={t_build*1e3:7.1f}ms  "
+          f"색인 질의={t_new*1e3:6.2f}ms/질문  x{t_old/max(t_new,1e-9):.0f}")
+
+def _synthetic_passages(n: int, seed: int = 1) -> List[List[str]]:
+    """표 미리보기 크기(30~120 토큰) 패시지의 토큰 목록"""
+    rnd = random.Random(seed)
+    vocab = _WORDS + _NUMS + [f"용어{i}" for i in range(20000)]
+    weights = [1.0 / (r + 1) for r in range(len(vocab))]
+    return [rnd.choices(vocab, weights, k=rnd.randint(30, 120)) for _ in range(n)]
+
+def bench_bm25(n_passages: int, n_queries: int = 16):
+    """RAGIndex 표 검색 채점: rank_bm25.get_scores(파이썬 루프) vs BM25Index(CSR gather+bincount) 단건/배치"""
+    corpus = _synthetic_passages(n_passages)
+    rnd = random.Random(2)
+    queries = [tokenize(rnd.choice(_QUERIES)) + rnd.sample(_WORDS, 2) + ["없는용어"] for _ in range(n_queries)]
+    t0 = time.perf_counter(); ref = BM25Okapi(corpus); t_ref_build = time.perf_counter() - t0
+    t0 = time.perf_counter(); idx = BM25Index(corpus); t_build = time.perf_counter() - t0
+    batch = idx.get_scores_batch(queries)
+    for qi, q in enumerate(queries):
+        want = ref.get_scores(q)
+        assert np.allclose(want, idx.get_scores(q), rtol=1e-9, atol=1e-9), q
+        assert np.allclose(want, batch[qi], rtol=1e-9, atol=1e-9), q
+    t_old = _timeit(lambda: [ref.get_scores(q) for q in queries], repeat=1) / n_queries
+    t_one = _timeit(lambda: [idx.get_scores(q) for q in queries]) / n_queries
+    t_bat = _timeit(lambda: idx.get_scores_batch(queries)) / n_queries
+    print(f"[bm25] passages={n_passages:>7,} postings={len(idx.docs):>10,}  빌드 rank_bm25={t_ref_build:6.2f}s CSR={t_build:6.2f}s  "
+          f"rank_bm25={t_old*1e3:8.2f}ms/질의  CSR={t_one*1e3:6.3f}ms  배치({n_queries})={t_bat*1e3:6.3f}ms/질의  "
+          f"x{t_old/max(t_one,1e-9):.0f}")
+
+def _legacy_lite_search(vecs: np.ndarray, q: np.ndarray, k: int):
+    """기존 _LiteIndex.search: 질의 1개씩 전체 유사도 argsort"""
+    sims = (q @ vecs.T)[0]; I = np.argsort(sims)[-k:][::-1]
+    return sims[I], I
+
+def bench_topk(n_passages: int, dim: int = 384, k: int = 12, n_queries: int = 16):
+    """
+    표 임베딩 검색(search_tables는 k*4개 후보): 질의마다 전체 argsort vs argpartition + k개 정렬,
+    그리고 질의 행렬 1회 GEMM(배치). 코퍼스 크기에 따른 질의당 지연
+    """
+    rng = np.random.default_rng(0)
+    vecs = _normalize(rng.standard_normal((n_passages, dim)).astype(np.float32))
+    qs = _normalize(rng.standard_normal((n_queries, dim)).astype(np.float32))
+    idx = _LiteIndex(dim); idx.add(vecs)
+    D, I = idx.search(qs, k)
+    for r in range(n_queries):
+        d_old, i_old = _legacy_lite_search(vecs, qs[r:r + 1], k)
+        assert np.array_equal(i_old, I[r]) and np.allclose(d_old, D[r], atol=1e-5), r
+    t_old = _timeit(lambda: [_legacy_lite_search(vecs, qs[r:r + 1], k) for r in range(n_queries)], repeat=3) / n_queries
+    t_one = _timeit(lambda: [idx.search(qs[r:r + 1], k) for r in range(n_queries)], repeat=3) / n_queries
+    t_bat = _timeit(lambda: idx.search(qs, k), repeat=3) / n_queries
+    sims = qs[:1] @ vecs.T  # 선택 단계만(행렬곱 제외)
+    s_old = _timeit(lambda: np.argsort(sims[0])[-k:][::-1]); s_new = _timeit(lambda: _top_k_rows(sims, k))
+    print(f"[topk] passages={n_passages:>7,} dim={dim} k={k}  선택만 argsort={s_old*1e3:6.3f}ms → argpartition={s_new*1e3:6.3f}ms  |  "
+          f"검색 전체 argsort={t_old*1e3:7.2f}ms/질의  "
+          f"argpartition={t_one*1e3:7.2f}ms  배치({n_queries})={t_bat*1e3:7.2f}ms/질의  "
+          f"x{t_old/max(t_one,1e-9):.1f} / x{t_old/max(t_bat,1e-9):.1f}")
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "topk":
+        for n in ([int(sys.argv[2])] if len(sys.argv) > 2 else [1000, 10000, 100000, 300000]):
+            bench_topk(n)
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "bm25":
+        for n in ([int(sys.argv[2])] if len(sys.argv) > 2 else [1000, 10000, 100000]):
+            bench_bm25(n)
+        return
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        doc = fitz.open(sys.argv[1])
+        bench_search([{"page": i + 1, "text": p.get_text()} for i, p in enumerate(doc)], sys.argv[1]); return
+    sizes = [int(sys.argv[1])] if len(sys.argv) > 1 else [100, 500, 2000]
+    for n in sizes:
+        bench_search(_synthetic_pages(n), "합성")
+    for n in (1000, 10000):
+        bench_bm25(n)
+        bench_topk(n)
+
+if __name__ == "__main__":
+    main()
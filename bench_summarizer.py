@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+summarizer.py 성능 점검용 마이크로벤치 (합성 본문 사용, LLM 호출 없음)
+사용: python bench_summarizer.py [페이지수]
+      python bench_summarizer.py <PDF경로>   → 실제 보고서 본문으로 페이지 선별 비교 + 페이지별 토큰 절감
+"""
+import random, re, sys, time
+from typing import Any, Dict, List
+import numpy as np
+import fitz  # PyMuPDF
+from summarizer import _KEYWORDS, _ENC, _content_scores, SUM_PAGE_TOKENS, select_pages, compress_page, boilerplate_lines, est_tokens
+
+def _timeit(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t0)
+    return best
+
+_FILLER = ("이번 연구에서는 국내 산업 부문의 구조적 특성을 살펴보고 관련 제도의 개선 방향을 "
+           "검토하였다 또한 주요 국가 사례를 비교하여 시사점을 도출하였다").split()
+_NUMS = ["2023년", "12.5%", "3 %", "1,234,567", "원/kWh", "toe", "MWh", "45.2%", "2030년"]
+
+def _synthetic_pages(n_pages: int, hit_ratio: float = 0.15, seed: int = 0) -> List[Dict[str, Any]]:
+    """보고서 본문처럼 대부분 일반 어휘 + 일부 키워드/수치가 섞인 페이지"""
+    rnd = random.Random(seed)
+    hits = list(_KEYWORDS) + _NUMS
+    pages = []
+    for i in range(n_pages):
+        words = [rnd.choice(hits) if rnd.random() < hit_ratio else rnd.choice(_FILLER)
+                 for _ in range(rnd.randint(200, 500))]
+        pages.append({"page": i + 1, "text": " ".join(words)})
+    return pages
+
+def _legacy_select(pages: List[Dict[str, Any]], max_pages: int, keywords=_KEYWORDS) -> list:
+    """기존 선별: 페이지마다 키워드 substring 검사 + 수치 findall + 전체 정렬"""
+    def meta(text):
+        head = (text or "")[:1600]
+        if re.search(r"(목\s*차|표\s*목차|그림\s*목차|표지|발간|저자|연구진|초록|요약|요지|서문|감사의글)", head): return True
+        return len(re.findall(r"[A-Za-z]{4,}", head)) > 60 and len(head) < 1000
+    def score(t):
+        kw = sum(1 for k in keywords if k in t)
+        nums = len(re.findall(r"\d{4}년|\d+(?:\.\d+)?\s?%|\d{1,3}(?:,\d{3})+|원/kWh|원/MJ|toe|MWh|kWh|MJ", t))
+        return kw * 1.0 + nums * 0.3
+    cands = []
+    for it in pages:
+        txt = (it.get("text") or "").strip()
+        if not txt or meta(txt): continue
+        cands.append((it.get("page"), txt, score(txt)))
+    if not cands:
+        cands = [(it.get("page"), (it.get("text") or ""), 0.0) for it in pages[:3]]
+    cands.sort(key=lambda x: x[2], reverse=True)
+    return cands[:max_pages]
+
+# 서로 부분적으로 겹치는 키워드(결합 정규식 한 번 매치로는 하나만 잡히는 경우)
+_OVERLAP_KEYWORDS = ("에너지전환", "전환정책", "수소", "수소경제", "경제")
+
+def check_score_parity(pages: List[Dict[str, Any]]):
+    """키워드 점수 = 기존처럼 키워드마다 독립 `in` 검사(기본 목록 + 겹치는 목록)"""
+    texts = [p["text"] for p in pages] + ["에너지전환정책 추진과 수소경제 2030년 12.5%"]
+    for kws in (_KEYWORDS, _OVERLAP_KEYWORDS):
+        got = _content_scores(texts, kws)
+        want = [sum(1 for k in kws if k in t) + 0.3 * len(re.findall(
+            r"\d{4}년|\d+(?:\.\d+)?\s?%|\d{1,3}(?:,\d{3})+|원/kWh|원/MJ|toe|MWh|kWh|MJ", t)) for t in texts]
+        assert np.allclose(got, want), kws
+        sel = [{"page": i + 1, "text": t} for i, t in enumerate(texts)]
+        assert _legacy_select(sel, 20, kws) == select_pages(sel, 20, kws), kws
+
+def bench_select(pages: List[Dict[str, Any]], label: str, max_pages: int = 20):
+    """페이지 선별(메타 제외 + 점수 + 상위 k): 기존 vs 키워드 `in` + 수치 결합 정규식 1회 스캔 + numpy top-k"""
+    check_score_parity(pages)
+    assert _legacy_select(pages, max_pages) == select_pages(pages, max_pages)
+    t_old = _timeit(lambda: _legacy_select(pages, max_pages))
+    t_new = _timeit(lambda: select_pages(pages, max_pages))
+    print(f"[select] {label} pages={len(pages)} 상위={max_pages}  기존={t_old*1e3:7.1f}ms  "
+          f"신규={t_new*1e3:6.1f}ms  x{t_old/max(t_new,1e-9):.1f}")
+
+def _synthetic_report_pages(n_pages: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """머리말/꼬리말(쪽번호)·절 제목·문단·수치 행이 섞인 보고서형 페이지"""
+    rnd = random.Random(seed)
+    hits = list(_KEYWORDS) + _NUMS
+    def sentence():
+        words = [rnd.choice(hits) if rnd.random() < 0.2 else rnd.choice(_FILLER) for _ in range(rnd.randint(8, 22))]
+        return " ".join(words) + rnd.choice(["다.", "하였다.", "것으로 나타났다.", "필요가 있다."])
+    pages = []
+    for i in range(n_pages):
+        lines = ["에너지경제연구원 기본연구보고서 2024-07", f"제{i // 10 + 1}장 국내외 에너지 시장 동향"]
+        for _ in range(rnd.randint(3, 6)):  # 문단: 40자 안팎으로 줄바꿈
+            para = " ".join(sentence() for _ in range(rnd.randint(3, 7)))
+            lines += [para[k:k + 40] for k in range(0, len(para), 40)]
+            if rnd.random() < 0.3:
+                lines += [f"{2015 + r}  {rnd.randint(100, 9999):,}  {rnd.random() * 10:.1f}%" for r in range(5)]
+        lines.append(f"- {i + 1} -")
+        pages.append({"page": i + 1, "text": "\n".join(lines)})
+    return pages
+
+def bench_compression(pages: List[Dict[str, Any]], label: str, per_page_limit: int = 2800,
+                      max_tokens: int = SUM_PAGE_TOKENS):
+    """
+    페이지 요약 프롬프트에 들어가는 본문 토큰: 기존(앞 per_page_limit자) vs 추출 압축(머리말 제거 + 핵심 문장).
+    토큰 수는 tiktoken(o200k) 있으면 정확값, 없으면 근사.
+    """
+    texts = [p.get("text") or "" for p in pages]
+    t0 = time.perf_counter()
+    boiler = boilerplate_lines(texts)
+    packed = [(compress_page(t, max_tokens, boiler) or t)[:per_page_limit] for t in texts]
+    dt = time.perf_counter() - t0
+    before = np.array([est_tokens(t[:per_page_limit]) for t in texts])
+    after = np.array([est_tokens(t) for t in packed])
+    keep = before > 0
+    red = 1 - after[keep] / before[keep]
+    print(f"[compress] {label} pages={len(pages)} 예산={max_tokens}tok  토큰/페이지 평균 {before[keep].mean():.0f} → {after[keep].mean():.0f}  "
+          f"절감 평균 {red.mean()*100:.0f}% (중앙 {np.median(red)*100:.0f}%, 최대 {red.max()*100:.0f}%)  합계 {before.sum():,} → {after.sum():,}  "
+          f"반복 줄 {len(boiler)}  압축 {dt/len(pages)*1e3:.2f}ms/page  [{'tiktoken' if _ENC is not None else '근사'}]")
+
+def main():
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        doc = fitz.open(sys.argv[1])
+        pages = [{"page": i + 1, "text": p.get_text()} for i, p in enumerate(doc)]
+        bench_select(pages, sys.argv[1]); bench_compression(pages, sys.argv[1]); return
+    sizes = [int(sys.argv[1])] if len(sys.argv) > 1 else [100, 800]
+    for n in sizes:
+        bench_select(_synthetic_pages(n), "합성")
+        bench_select(_synthetic_pages(n, hit_ratio=1.0), "합성(키워드만)")
+        bench_compression(_synthetic_report_pages(n), "합성 보고서")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# chunk_cache.py
+# -*- coding: utf-8 -*-
+"""
+PDF 내용 해시 기반 on-disk 캐시 (chunks + 원문 요약)
+- 키: sha1(pdf_bytes) + EXTRACTOR_VERSION  → 같은 보고서 재업로드 시 추출/요약 생략
+- 형식: pickle(protocol 5) + zlib 압축 1파일/문서, 원자적 교체(os.replace)
+- 페이지 단위 항목(get_page/put_page): 페이지 지문 키로 추출 결과·페이지 요약 저장
+  → 개정판 업로드 시 바뀌지 않은 페이지 재사용
+- 용량 예산 초과 시 최근 사용(mtime) 오래된 순으로 삭제(LRU, 문서/페이지 항목 공통)
+- 로컬 디렉터리 전용(신뢰된 파일만 읽음)
+"""
+from __future__ import annotations
+import os, pickle, tempfile, threading, zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import env_int
+from extract import EXTRACTOR_VERSION
+
+_SUFFIX = ".pkl.z"
+
+DEFAULT_CACHE_DIR = os.environ.get("HPL_CACHE_DIR") or str(Path.home() / ".cache" / "hi-lens" / "chunks")
+DEFAULT_BUDGET_MB = env_int("HPL_CACHE_MB", 512)
+
+
+def evict_lru(entries: List[Tuple[float, int, Any]], budget: int, remove: Callable[[Any], None]) -> int:
+    """
+    (mtime, 크기, 항목) 목록의 총 크기가 budget(바이트, 0이면 무제한) 이하가 될 때까지
+    최근 사용(mtime)이 오래된 항목부터 remove. 남은 총 크기 반환. RAG 인덱스 디렉터리도 같은 규칙
+    """
+    total = sum(sz for _, sz, _ in entries)
+    for _, sz, it in sorted(entries, key=lambda x: x[0]):
+        if not budget or total <= budget: break
+        try:
+            remove(it); total -= sz
+        except OSError:
+            pass
+    return total
+
+
+class ChunkCache:
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, budget_mb: int = DEFAULT_BUDGET_MB):
+        self.root = Path(root)
+        self.budget = max(0, budget_mb) * 1024 * 1024
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None  # 디렉터리 총 크기 추정(쓰기마다 전체 스캔 방지)
+
+    def _path(self, doc_hash: str) -> Path:
+        return self.root / f"{doc_hash}-v{EXTRACTOR_VERSION}{_SUFFIX}"
+
+    def _page_path(self, key: str) -> Path:
+        return self.root / "pages" / f"{key}{_SUFFIX}"
+
+    def _read(self, p: Path) -> Any:
+        try:
+            data = p.read_bytes()
+            obj = pickle.loads(zlib.decompress(data))
+        except FileNotFoundError:
+            return None
+        except Exception:
+            try: p.unlink()
+            except OSError: pass
+            return None
+        try: os.utime(p)  # LRU: 최근 사용 표시
+        except OSError: pass
+        return obj
+
+    def _write(self, p: Path, obj: Any) -> None:
+        """저장 실패는 조용히 무시(캐시는 최적화일 뿐)"""
+        try:
+            blob = zlib.compress(pickle.dumps(obj, protocol=5), 6)
+            if self.budget and len(blob) > self.budget:
+                return
+            with self._lock:
+                p.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=p.parent, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(blob)
+                os.replace(tmp, p)
+                if self._total is None:
+                    self._evict()
+                else:
+                    self._total += len(blob)
+                    if self.budget and self._total > self.budget:
+                        self._evict()
+        except Exception:
+            pass
+
+    def get(self, doc_hash: str) -> Optional[Dict[str, Any]]:
+        """{"chunks":..., "summary":...} 또는 None(미스/손상)"""
+        return self._read(self._path(doc_hash))
+
+    def put(self, doc_hash: str, chunks: Dict[str, Any], summary: str = "") -> None:
+        self._write(self._path(doc_hash), {"chunks": chunks, "summary": summary})
+
+    def get_page(self, key: str) -> Any:
+        """페이지 단위 항목(키는 호출 측에서 지문+버전으로 구성)"""
+        return self._read(self._page_path(key))
+
+    def put_page(self, key: str, value: Any) -> None:
+        self._write(self._page_path(key), value)
+
+    def _evict(self) -> None:
+        """용량 예산 초과분을 오래 안 쓴 파일부터 삭제(총 크기 추정치도 재계산)"""
+        files = []
+        for p in self.root.glob(f"**/*{_SUFFIX}"):
+            try:
+                stt = p.stat(); files.append((stt.st_mtime, stt.st_size, p))
+            except OSError:
+                continue
+        self._total = evict_lru(files, self.budget, Path.unlink)
+
+
+_default: Optional[ChunkCache] = None
+
+def get_chunk_cache() -> ChunkCache:
+    """프로세스 공용 캐시 인스턴스"""
+    global _default
+    if _default is None:
+        _default = ChunkCache()
+    return _default
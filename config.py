@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""
+환경변수 설정 읽기(HPL_* 공용) — 잘못된 값은 기본값으로
+"""
+import os
+
+def env_str(name: str, default: str) -> str:
+    val = (os.environ.get(name) or default).strip()
+    return val if val else default
+
+def env_int(name: str, default: int) -> int:
+    try: return int(os.environ.get(name, default))
+    except (TypeError, ValueError): return default
@@ -0,0 +1,77 @@
+# doc_store.py
+# -*- coding: utf-8 -*-
+"""
+업로드 PDF 디스크 스풀 + 가벼운 문서 핸들
+- 업로드 스트림을 청크 단위로 읽으며 sha1을 누적 계산 → <스풀>/<sha1>.pdf 로 저장
+- 세션/스레드에는 bytes 대신 DocHandle(경로·해시·이름·크기)만 보관
+- extract.build_chunks / crop_* 는 DocHandle을 그대로 받아 경로로 연다(OS 페이지 캐시 공유)
+- 오래된 스풀 파일은 새 업로드 때 정리
+"""
+from __future__ import annotations
+import hashlib, os, tempfile, time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+from config import env_int
+
+SPOOL_DIR = os.environ.get("HPL_SPOOL_DIR") or str(Path(tempfile.gettempdir()) / "hi-lens-docs")
+SPOOL_KEEP_DAYS = env_int("HPL_SPOOL_DAYS", 7)
+_CHUNK = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class DocHandle:
+    """스풀된 PDF 문서 핸들(피클 가능, 워커 프로세스에도 그대로 전달)"""
+    path: str
+    sha1: str
+    name: str = ""
+    size: int = 0
+
+    @property
+    def doc_id(self) -> str:
+        """UI 식별용 짧은 해시"""
+        return self.sha1[:12]
+
+    def read_bytes(self) -> bytes:
+        return Path(self.path).read_bytes()
+
+
+def spool_upload(fp: BinaryIO, name: str = "", spool_dir: str = SPOOL_DIR) -> DocHandle:
+    """
+    업로드 파일 객체 → 디스크 스풀 + 증분 해시.
+    같은 내용이 이미 스풀돼 있으면 임시 파일을 버리고 기존 파일을 재사용.
+    """
+    root = Path(spool_dir); root.mkdir(parents=True, exist_ok=True)
+    h = hashlib.sha1(); size = 0
+    try: fp.seek(0)
+    except Exception: pass
+    fd, tmp = tempfile.mkstemp(dir=root, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                buf = fp.read(_CHUNK)
+                if not buf: break
+                h.update(buf); out.write(buf); size += len(buf)
+        dst = root / f"{h.hexdigest()}.pdf"
+        if dst.exists():
+            os.unlink(tmp); os.utime(dst)
+        else:
+            os.replace(tmp, dst)
+    except BaseException:
+        try: os.unlink(tmp)
+        except OSError: pass
+        raise
+    _cleanup(root)
+    return DocHandle(path=str(dst), sha1=h.hexdigest(), name=name, size=size)
+
+
+def _cleanup(root: Path) -> None:
+    """보관 기간이 지난 스풀 파일 삭제(실패는 무시)"""
+    if SPOOL_KEEP_DAYS <= 0: return
+    cutoff = time.time() - SPOOL_KEEP_DAYS * 86400
+    for p in root.glob("*.pdf"):
+        try:
+            if p.stat().st_mtime < cutoff: p.unlink()
+        except OSError:
+            pass
@@ -3,19 +3,37 @@
 PDF → (표/그림/본문) 추출 + 표 미리보기(Markdown) 생성 + 원본 크롭
 - 라벨 감지: 굵은 '표 2-3', '그림 1-1' 등
 - 표/그림 bbox 추정 후 크롭 이미지 제공
-- 표 미리보기: 표 영역 텍스트만으로 간단 마크다운 3~12행
+- 표 미리보기: 표 영역 텍스트만으로 간단 마크다운 3~12행. 격자 복원 DataFrame(table_grid, 전체 행)은
+  table_dataframe()으로 처음 쓸 때 복원·메모
+- 스트리밍: iter_chunks()로 페이지 결과를 바로 받고 ChunkStore에 점진 적재(ExtractJob: 백그라운드 스레드)
+- 지연 추출: LazyDocument(대형 PDF) — 필요한 페이지만 추출·메모
+- 여러 쪽 표: 같은 라벨이 다음 쪽에 '(계속)'/같은 머리행으로 이어지면 한 항목(segments)으로 잇기
+- 목차 우선: read_toc()로 표목차/그림목차 → 라벨·페이지 지도, 목차가 가리키는 페이지만 라벨 스캔
 """
 from __future__ import annotations
+from collections import OrderedDict
+from contextlib import contextmanager
 from io import BytesIO
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import hashlib
+import os
 import re
+import threading
+import time
 import numpy as np
+import pandas as pd
 from PIL import Image
 import fitz  # PyMuPDF
+from config import env_int
+from table_grid import grid_table, concat_tables
+
+# 추출 결과 형식/규칙이 바뀌면 올릴 것 (chunk_cache 키에 포함 → 이전 캐시 무효화)
+EXTRACTOR_VERSION = "6"
 
 # ── 라벨 정규식 ─────────────────────────────────────────────────────────────
 _RE_TAB = re.compile(r"(?:^|[\s〈<\(\[])\s*표\s*([0-9]+(?:[-–][0-9]+)?)\s*")
 _RE_FIG = re.compile(r"(?:^|[\s〈<\(\[])\s*그림\s*([0-9]+(?:[-–][0-9]+)?)\s*")
+_RE_CONT = re.compile(r"[\(（\[〈<]\s*계\s*속\s*[\)）\]〉>]")  # 여러 쪽 표의 이어지는 쪽 표시
 
 def _clean(s: str) -> str:
     return re.sub(r"\s+", " ", (s or "").strip())
@@ -40,114 +58,660 @@ def _is_toc_page(text: str) -> bool:
     hits = sum(bool(re.search(r"^\s*(표|그림)\s*\d+-\d+", ln)) for ln in lines)
     return hits >= 5
 
+# 캡션 줄(줄 머리의 '표 2-3 …', '〈그림 1-1〉 …') → 라벨 위치 후보
+_RE_CAPTION_LINE = re.compile(r"^[ \t]*[〈<\(\[]?[ \t]*(표|그림)[ \t]*([0-9]+(?:[-–][0-9]+)?)[^\n]*", re.M)
+
+def _label_regex(kind: str, lab: str) -> "re.Pattern[str]":
+    """본문 어디서든 특정 라벨('표 2-3', '그림 2–3')을 찾는 정규식"""
+    word = "표" if kind == "table" else "그림"
+    num = "[-–]".join(re.escape(x) for x in lab.split("-"))
+    return re.compile(rf"{word}\s*{num}(?![0-9])")
+
+# ── 표목차/그림목차 파싱 ─────────────────────────────────────────────────────
+_KINDS = ("table", "figure")
+_RE_TOC_HEAD = re.compile(r"^[〈<\(\[]?\s*(표|그림)\s*([0-9]+(?:[-–][0-9]+)?)[〉>\)\]]?\s*")
+_RE_TOC_LEADER = re.compile(r"\s*[.·…ㆍ‧・]{2,}[\s.·…ㆍ‧・]*(\d{1,4})\s*$")   # 제목 …… 쪽
+_RE_TOC_PAGENO = re.compile(r"^[\s.·…ㆍ‧・]*(\d{1,4})\s*$")                   # 다음 줄로 떨어진 쪽번호
+_TOC_SCAN_PAGES = 40     # 목차는 앞부분에 있다고 보고 이 범위만 훑음
+_TOC_MIN_MATCH = 0.8     # 목차 항목 중 해당 쪽에서 확정된 비율이 이보다 낮으면 전체 스캔 폴백
+
+def _parse_toc_entries(text: str) -> List[Tuple[str, str, str, int]]:
+    """목차 페이지 텍스트 → [(kind, label, title, 인쇄 쪽번호)]"""
+    lines = [ln.strip() for ln in (text or "").splitlines() if ln.strip()]
+    out: List[Tuple[str, str, str, int]] = []
+    i = 0
+    while i < len(lines):
+        m = _RE_TOC_HEAD.match(lines[i])
+        if not m:
+            i += 1; continue
+        kind = "table" if m.group(1) == "표" else "figure"
+        body, j = lines[i][m.end():], i
+        pm = _RE_TOC_LEADER.search(body)
+        # 제목 줄바꿈/쪽번호 줄 분리: 다음 라벨 줄 전까지 최대 2줄 이어 붙임
+        while pm is None and j + 1 < len(lines) and j - i < 2 and not _RE_TOC_HEAD.match(lines[j + 1]):
+            j += 1
+            pn = _RE_TOC_PAGENO.match(lines[j])
+            if pn:
+                pm = pn; body += " "; break
+            body += " " + lines[j]
+            pm = _RE_TOC_LEADER.search(body)
+        if pm is not None:
+            title = _clean(re.sub(r"[\s.·…ㆍ‧・]+$", "", body[:pm.start()] if pm.re is _RE_TOC_LEADER else body))
+            out.append((kind, _norm_label(m.group(2)), title, int(pm.group(1))))
+        i = j + 1
+    return out
+
+def _toc_from_texts(page_text: Callable[[int], str], n: int) -> Optional[Dict[str, Any]]:
+    """read_toc 본체: page_text(pidx) → 평문(필요한 페이지만 요청)"""
+    entries: List[Tuple[str, str, str, int]] = []
+    toc_pages: List[int] = []
+    for pidx in range(min(n, _TOC_SCAN_PAGES)):
+        txt = page_text(pidx)
+        if _is_toc_page(txt):
+            toc_pages.append(pidx); entries.extend(_parse_toc_entries(txt))
+        elif toc_pages and pidx - toc_pages[-1] > 3:
+            break
+    if not entries:
+        return None
+    # 같은 라벨이 여러 번(목차 본문 중복 등) → 첫 항목
+    first: Dict[Tuple[str, str], Tuple[str, int]] = {}
+    for kind, lab, title, printed in entries:
+        first.setdefault((kind, lab), (title, printed))
+
+    # offset 추정: 목차 뒤 페이지를 차례로 읽으며 캡션 줄 라벨이 목차에 있으면 (PDF쪽 - 인쇄쪽) 투표
+    votes: Dict[int, int] = {}
+    for pidx in range(toc_pages[-1] + 1, min(n, toc_pages[-1] + 1 + 3 * _TOC_SCAN_PAGES)):
+        for m in _RE_CAPTION_LINE.finditer(page_text(pidx)):
+            hit = first.get(("table" if m.group(1) == "표" else "figure", _norm_label(m.group(2))))
+            if hit:
+                off = pidx + 1 - hit[1]
+                votes[off] = votes.get(off, 0) + 1
+        if votes and max(votes.values()) >= 5:
+            break
+    offset = max(votes, key=lambda o: (votes[o], -abs(o))) if votes else 0
+
+    toc: Dict[str, List[Dict[str, Any]]] = {"tables": [], "figures": []}
+    pages: Dict[str, set] = {k: set() for k in _KINDS}
+    for (kind, lab), (title, printed) in sorted(first.items(), key=lambda kv: _label_key(kv[0][1])):
+        p = printed + offset
+        if not 1 <= p <= n: continue
+        toc["tables" if kind == "table" else "figures"].append({"label": lab, "title": title, "page": p})
+        pages[kind].add(p - 1)
+    return {"toc": toc, "pages": pages, "offset": offset, "toc_pages": toc_pages}
+
+def read_toc(src: PdfSource) -> Optional[Dict[str, Any]]:
+    """
+    앞쪽 목차 페이지(표목차/그림목차)를 읽어 라벨 → PDF 페이지 지도 생성(본문 추출 전, 저렴).
+    인쇄 쪽번호와 PDF 쪽 차이(offset)는 목차 뒤 페이지의 캡션 줄과 맞춰 최빈값으로 추정.
+    반환: {"toc": {"tables":[{label,title,page}], "figures":[...]}, "pages": {kind: {0-based pidx}},
+           "offset": int, "toc_pages": [pidx], "texts": {pidx: 읽은 페이지 텍스트}}  / 목차 항목이 없으면 None
+    texts는 iter_chunks 1차 패스가 같은 페이지 텍스트를 다시 뽑지 않도록 넘기는 것
+    """
+    texts: Dict[int, str] = {}
+    with _DOC_POOL.borrow(src) as doc:
+        def _text(pidx: int) -> str:
+            if pidx not in texts:
+                texts[pidx] = doc[pidx].get_text("text", flags=fitz.TEXTFLAGS_DICT)  # _PageModel.text와 같은 플래그
+            return texts[pidx]
+        toc = _toc_from_texts(_text, doc.page_count)
+    if toc:
+        toc["texts"] = texts
+    return toc
+
+def _merge_toc(listed: List[Dict[str, Any]], detected: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    목차 항목(제목) + 검출 결과(실제 쪽) 병합, 목차에 없는 검출 항목도 포함.
+    detected=False: 목차에만 있고 본문에서 확정 못 한 항목(page는 목차가 가리킨 쪽, 표/그림 객체 없음)
+    """
+    det = {d["label"]: d for d in detected}
+    out = [dict(e, page=det[e["label"]]["page"], detected=True) if e["label"] in det else dict(e, detected=False)
+           for e in listed]
+    seen = {e["label"] for e in listed}
+    out.extend(dict(d, detected=True) for d in detected if d["label"] not in seen)
+    out.sort(key=lambda d: _label_key(d["label"]))
+    return out
+
+def _scan_plan(toc: Optional[Dict[str, Any]], n: int) -> List[Tuple[str, ...]]:
+    """페이지별 라벨 스캔 종류: 목차가 있는 종류는 목차가 가리키는 페이지에서만"""
+    if not toc:
+        return [_KINDS] * n
+    return [tuple(k for k in _KINDS if not toc["pages"][k] or p in toc["pages"][k]) for p in range(n)]
+
+def _rescan_plan(toc: Optional[Dict[str, Any]], plan: List[Tuple[str, ...]],
+                 found: Dict[str, set], n: int) -> Dict[int, Tuple[str, ...]]:
+    """
+    1차 스캔 후 보정: 목차 항목 확정률이 _TOC_MIN_MATCH 미만인 종류는 안 본 페이지 전부,
+    아니면 미확정 항목의 ±1쪽만 다시 스캔 → {pidx: 스캔 종류(기존 포함)}
+    """
+    redo: Dict[int, set] = {}
+    if not toc:
+        return {}
+    for kind, field in (("table", "tables"), ("figure", "figures")):
+        entries = toc["toc"][field]
+        if not entries: continue
+        missing = [e for e in entries if e["label"] not in found[kind]]
+        if len(entries) - len(missing) < _TOC_MIN_MATCH * len(entries):
+            pages = range(n)
+        else:
+            pages = {q for e in missing for q in (e["page"] - 2, e["page"] - 1, e["page"]) if 0 <= q < n}
+        for q in pages:
+            if kind not in plan[q]:
+                redo.setdefault(q, set()).add(kind)
+    return {q: tuple(k for k in _KINDS if k in plan[q] or k in ks) for q, ks in sorted(redo.items())}
+
+# PDF 원본: bytes | 파일 경로 | doc_store.DocHandle(path/sha1 속성을 가진 스풀 핸들)
+PdfSource = Union[bytes, str, Any]
+
+def _open_doc(src: PdfSource) -> fitz.Document:
+    """bytes(업로드 원본), 파일 경로 또는 스풀 핸들로 PDF 열기(경로는 MuPDF가 필요한 부분만 읽음)"""
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=bytes(src), filetype="pdf")
+    return fitz.open(getattr(src, "path", src))
+
+# ── 열린 문서 핸들 풀 ─────────────────────────────────────────────────────────
+class _PooledDoc:
+    __slots__ = ("doc", "src", "lock", "users", "evicted")
+
+    def __init__(self, doc: fitz.Document, src: Any):
+        self.doc, self.src = doc, src
+        self.lock = threading.RLock()  # 같은 문서 동시 렌더 방지(MuPDF 문서 객체는 스레드 비안전)
+        self.users, self.evicted = 0, False
+
+class _DocPool:
+    """
+    문서 해시 → 열린 fitz.Document LRU 풀(스레드 안전).
+    - 크롭마다 fitz.open(stream=...)으로 xref를 다시 파싱하지 않도록 핸들 재사용
+    - 용량 초과 시 가장 오래된 핸들을 close(사용 중이면 반납 시점에 close)
+    - 같은 bytes 객체는 id 빠른 경로로 재해싱 생략(세션에 든 원본이 그대로 넘어옴)
+    """
+    def __init__(self, capacity: int = 8):
+        self.capacity = capacity
+        self._docs: "OrderedDict[str, _PooledDoc]" = OrderedDict()
+        self._by_id: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def key_for(self, src: Any) -> str:
+        """문서 식별키: bytes는 내용 sha1, 스풀 핸들은 업로드 때 계산한 sha1, 경로는 경로+mtime+크기"""
+        sha1 = getattr(src, "sha1", None)
+        if sha1:
+            return sha1
+        if isinstance(src, (bytes, bytearray, memoryview)):
+            with self._lock:
+                key = self._by_id.get(id(src))
+                if key is not None and key in self._docs and self._docs[key].src is src:
+                    return key
+            return hashlib.sha1(src).hexdigest()
+        p = os.path.abspath(str(src))
+        stt = os.stat(p)
+        return f"path:{p}:{stt.st_mtime_ns}:{stt.st_size}"
+
+    @contextmanager
+    def borrow(self, src: Any, key: Optional[str] = None) -> Iterator[fitz.Document]:
+        key = key or self.key_for(src)
+        with self._lock:
+            ent = self._docs.get(key)
+            if ent is None:
+                ent = _PooledDoc(_open_doc(src), src)
+                self._docs[key] = ent
+                self._evict_locked()
+            else:
+                self._docs.move_to_end(key)
+            self._by_id[id(ent.src)] = key
+            ent.users += 1
+        try:
+            with ent.lock:
+                yield ent.doc
+        finally:
+            with self._lock:
+                ent.users -= 1
+                if ent.evicted and ent.users == 0:
+                    ent.doc.close()
+
+    def _evict_locked(self) -> None:
+        while len(self._docs) > self.capacity:
+            key, ent = self._docs.popitem(last=False)
+            if self._by_id.get(id(ent.src)) == key:
+                del self._by_id[id(ent.src)]
+            ent.evicted = True
+            if ent.users == 0:
+                ent.doc.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            cap, self.capacity = self.capacity, 0
+            self._evict_locked()
+            self.capacity = cap
+
+_DOC_POOL = _DocPool()
+
 # ── 렌더/크롭 ────────────────────────────────────────────────────────────────
 def _pix_to_pil(pix: fitz.Pixmap) -> Image.Image:
-    return Image.open(BytesIO(pix.tobytes(output="png"))).convert("RGB")
+    """pix.samples를 그대로 감싸는 PIL 이미지(PNG 인코딩/디코딩 왕복 없음)"""
+    mode = "L" if pix.n == 1 else "RGB"
+    if pix.n not in (1, 3):  # CMYK/알파 등 예외 색공간만 변환
+        pix = fitz.Pixmap(fitz.csRGB, pix, 0); mode = "RGB"
+    img = Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, "raw", mode, pix.stride, 1)
+    # RGB는 PIL 내부 버퍼로 복사되지만 L은 pixmap 메모리를 공유할 수 있음 → pix 수명과 분리
+    return img.copy() if mode == "L" else img
 
-def _render_region(page: fitz.Page, rect: fitz.Rect, dpi: int = 220) -> Image.Image:
+def _render_region(page: fitz.Page, rect: fitz.Rect, dpi: int = 220, gray: bool = False) -> Image.Image:
+    """영역 렌더. gray=True면 1채널로 렌더(OCR/여백 분석만 필요한 경우 메모리 1/3)."""
     mat = fitz.Matrix(dpi / 72, dpi / 72)
-    pix = page.get_pixmap(matrix=mat, clip=rect, alpha=False)
+    cs = fitz.csGRAY if gray else fitz.csRGB
+    pix = page.get_pixmap(matrix=mat, clip=rect, colorspace=cs, alpha=False)
     return _pix_to_pil(pix)
 
-def _cut_vertical_whitespace(
-    pil: Image.Image, upper_ratio: float = 0.07, lower_blank: int = 24, white: int = 242, pad: int = 6
-) -> Image.Image:
-    """상하 여백 컷(표/그림 공용). 본문/쪽번호 잘림 방지."""
-    g = pil.convert("L")
-    arr = np.array(g)
-    dark = arr < white
-    row = dark.mean(axis=1)
-    H = arr.shape[0]
+def _first_run(mask: np.ndarray, length: int) -> int:
+    """mask에서 True가 length개 연속되는 첫 구간의 시작 인덱스(없으면 -1)"""
+    if length <= 0: return 0
+    if len(mask) < length: return -1
+    c = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+    hit = np.flatnonzero(c[length:] - c[:-length] == length)
+    return int(hit[0]) if len(hit) else -1
+
+def _whitespace_bounds(
+    gray: np.ndarray, upper_ratio: float, lower_blank: int, white: int, pad: int
+) -> Optional[Tuple[int, int]]:
+    """그레이 배열에서 (top, bottom) 행 범위. 잘라낼 게 없으면 None."""
+    row = (gray < white).mean(axis=1)
+    H = gray.shape[0]
 
     # 상단: 의미 픽셀 시작
-    top = 0
-    for i, d in enumerate(row):
-        if d >= upper_ratio:
-            top = i; break
+    hits = np.flatnonzero(row >= upper_ratio)
+    top = int(hits[0]) if len(hits) else 0
 
     # 하단: 긴 공백 직전
-    blank = row < 0.01
-    run, cut = 0, None
-    for i in range(max(top + 10, 0), H):
-        if blank[i]:
-            run += 1
-            if run >= lower_blank:
-                cut = i - run; break
-        else:
-            run = 0
+    start = max(top + 10, 0)
+    j = _first_run(row[start:] < 0.01, lower_blank)
+    if j >= 0:
+        bottom = start + j - 1
+    else:
+        ink = np.flatnonzero(row > 0.02)
+        bottom = int(ink[-1]) if len(ink) else H - 1
 
-    bottom = cut if cut is not None else int(np.where(row > 0.02)[0][-1]) if np.any(row > 0.02) else H - 1
     top = max(0, top - pad); bottom = min(H - 1, bottom + pad)
-    if bottom <= top: return pil
+    if bottom <= top: return None
+    return top, bottom
+
+def _cut_vertical_whitespace(
+    pil: Image.Image, upper_ratio: float = 0.07, lower_blank: int = 24, white: int = 242, pad: int = 6
+) -> Image.Image:
+    """상하 여백 컷(표/그림 공용). 본문/쪽번호 잘림 방지."""
+    g = pil if pil.mode == "L" else pil.convert("L")
+    tb = _whitespace_bounds(np.asarray(g), upper_ratio, lower_blank, white, pad)
+    if tb is None: return pil
+    top, bottom = tb
     return pil.crop((0, top, pil.width, bottom + 1))
 
-def crop_table_image(pdf_bytes: bytes, page_index: int, bbox: Tuple[float,float,float,float], dpi: int = 220) -> Image.Image:
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    img = _render_region(doc[page_index], fitz.Rect(*bbox), dpi=dpi)
-    return _cut_vertical_whitespace(img, upper_ratio=0.08, lower_blank=22)
+# 종류별 여백 컷 파라미터
+_CUT_PARAMS = {
+    "table":  {"upper_ratio": 0.08, "lower_blank": 22},
+    "figure": {"upper_ratio": 0.05, "lower_blank": 28},
+}
 
-def crop_figure_image(pdf_bytes: bytes, page_index: int, bbox: Tuple[float,float,float,float], dpi: int = 220) -> Image.Image:
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    img = _render_region(doc[page_index], fitz.Rect(*bbox), dpi=dpi)
-    return _cut_vertical_whitespace(img, upper_ratio=0.05, lower_blank=28)
+class _RasterCache:
+    """
+    (문서키, 페이지, dpi) → 전체 페이지 RGB uint8 배열 LRU(바이트 예산 기준).
+    같은 페이지의 표/그림 여러 개는 페이지 1회 래스터화 후 배열 슬라이스로 크롭.
+    """
+    def __init__(self, budget_mb: int = 256):
+        self.budget = budget_mb * 1024 * 1024
+        self._items: "OrderedDict[Tuple[str, int], Tuple[np.ndarray, int, int]]" = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, int]) -> Optional[Tuple[np.ndarray, int, int]]:
+        with self._lock:
+            ent = self._items.get(key)
+            if ent is not None:
+                self._items.move_to_end(key)
+            return ent
+
+    def put(self, key: Tuple[str, int], ent: Tuple[np.ndarray, int, int]) -> None:
+        nb = ent[0].nbytes
+        if nb > self.budget: return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None: self._nbytes -= old[0].nbytes
+            self._items[key] = ent; self._nbytes += nb
+            while self._nbytes > self.budget and self._items:
+                _, (arr, _, _) = self._items.popitem(last=False)
+                self._nbytes -= arr.nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear(); self._nbytes = 0
+
+_RASTERS = _RasterCache(env_int("HPL_RASTER_MB", 256))
+
+def _page_raster(doc: fitz.Document, doc_key: str, page_index: int, dpi: int) -> Tuple[np.ndarray, int, int]:
+    """
+    캐시된 전체 페이지 래스터 (배열, 원점 x, 원점 y) — 원점은 pixmap 좌표계 기준.
+    키는 페이지 지문 → 개정판에서 안 바뀐 페이지는 이전 판 래스터를 그대로 사용.
+    """
+    key = (_page_fp_cached(doc, doc_key, page_index), dpi)
+    ent = _RASTERS.get(key)
+    if ent is None:
+        pix = doc[page_index].get_pixmap(matrix=fitz.Matrix(dpi / 72, dpi / 72), colorspace=fitz.csRGB, alpha=False)
+        arr = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width * 3]
+        ent = (arr.reshape(pix.height, pix.width, 3), pix.x, pix.y)
+        _RASTERS.put(key, ent)
+    return ent
+
+def _slice_region(raster: Tuple[np.ndarray, int, int], rect: fitz.Rect, dpi: int) -> Image.Image:
+    """clip 렌더와 같은 픽셀 격자(irect 바깥 반올림)로 페이지 래스터를 잘라냄"""
+    arr, ox, oy = raster
+    ir = (rect * fitz.Matrix(dpi / 72, dpi / 72)).irect
+    H, W = arr.shape[:2]
+    x0, x1 = max(0, ir.x0 - ox), min(W, ir.x1 - ox)
+    y0, y1 = max(0, ir.y0 - oy), min(H, ir.y1 - oy)
+    return Image.fromarray(arr[y0:y1, x0:x1])
+
+def _crop(doc: fitz.Document, doc_key: str, kind: str, page_index: int, bbox: Tuple[float,float,float,float],
+          dpi: int, gray: bool = False) -> Image.Image:
+    rect = fitz.Rect(*bbox)
+    if gray:  # OCR 등 1회성 그레이 요청은 영역만 직접 렌더
+        img = _render_region(doc[page_index], rect, dpi=dpi, gray=True)
+    else:
+        img = _slice_region(_page_raster(doc, doc_key, page_index, dpi), rect, dpi)
+    return _cut_vertical_whitespace(img, **_CUT_PARAMS.get(kind, _CUT_PARAMS["table"]))
+
+def crop_table_image(src: PdfSource, page_index: int, bbox: Tuple[float,float,float,float], dpi: int = 220,
+                     gray: bool = False) -> Image.Image:
+    key = _DOC_POOL.key_for(src)
+    with _DOC_POOL.borrow(src, key) as doc:
+        return _crop(doc, key, "table", page_index, bbox, dpi, gray=gray)
+
+def crop_figure_image(src: PdfSource, page_index: int, bbox: Tuple[float,float,float,float], dpi: int = 220,
+                      gray: bool = False) -> Image.Image:
+    key = _DOC_POOL.key_for(src)
+    with _DOC_POOL.borrow(src, key) as doc:
+        return _crop(doc, key, "figure", page_index, bbox, dpi, gray=gray)
+
+def crop_regions(src: PdfSource, items: List[Dict[str, Any]], dpi: int = 220) -> List[Optional[Image.Image]]:
+    """
+    여러 영역을 열린 문서 하나로 일괄 크롭(같은 페이지는 래스터 1회).
+    items: [{"kind"|"type": "table"/"figure", "page": 1-based, "bbox": (...)}, ...] (chunks 항목 그대로 가능)
+    반환: 입력 순서대로 이미지(bbox 없음/실패 시 None)
+    """
+    out: List[Optional[Image.Image]] = []
+    key = _DOC_POOL.key_for(src)
+    with _DOC_POOL.borrow(src, key) as doc:
+        for it in items:
+            try:
+                kind = it.get("kind") or it.get("type") or "table"
+                out.append(_crop(doc, key, kind, int(it["page"]) - 1, it["bbox"], dpi) if it.get("bbox") else None)
+            except Exception:
+                out.append(None)
+    return out
+
+# ── 화면용 미리보기(표시 폭 축소 + 1회 인코딩) ──────────────────────────────
+try:
+    from PIL import features as _pil_features
+    _PREVIEW_FMT = "WEBP" if _pil_features.check("webp") else "JPEG"
+except Exception:
+    _PREVIEW_FMT = "JPEG"
+
+_PREVIEWS: "OrderedDict[Tuple[Any, ...], bytes]" = OrderedDict()
+_PREVIEWS_MAX = 256
+_PREVIEWS_LOCK = threading.Lock()
+
+def encode_preview(img: Image.Image, width: int, quality: int = 85) -> bytes:
+    """표시 폭(width px)보다 크면 축소 후 WebP(미지원 시 JPEG)로 인코딩"""
+    if img.width > width:
+        img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    buf = BytesIO()
+    img.save(buf, format=_PREVIEW_FMT, quality=quality, method=4) if _PREVIEW_FMT == "WEBP" \
+        else img.save(buf, format=_PREVIEW_FMT, quality=quality, optimize=True)
+    return buf.getvalue()
+
+def preview_image_bytes(src: PdfSource, kind: str, page_index: int, bbox: Tuple[float,float,float,float],
+                        width: int = 800, dpi: int = 300) -> bytes:
+    """
+    st.image용 미리보기 바이트. (페이지 지문, 종류, bbox, dpi, 폭) 단위로 캐시 →
+    재실행마다 같은 바이트가 나가므로 Streamlit 미디어 파일도 그대로 재사용됨.
+    """
+    doc_key = _DOC_POOL.key_for(src)
+    with _DOC_POOL.borrow(src, doc_key) as doc:
+        fp = _page_fp_cached(doc, doc_key, page_index)  # 개정판의 같은 페이지도 같은 키
+    key = (fp, kind, tuple(round(float(v), 2) for v in bbox), dpi, width)
+    with _PREVIEWS_LOCK:
+        data = _PREVIEWS.get(key)
+        if data is not None:
+            _PREVIEWS.move_to_end(key)
+            return data
+    crop = crop_figure_image if kind == "figure" else crop_table_image
+    data = encode_preview(crop(src, page_index, bbox, dpi=dpi), width)
+    with _PREVIEWS_LOCK:
+        _PREVIEWS[key] = data
+        while len(_PREVIEWS) > _PREVIEWS_MAX:
+            _PREVIEWS.popitem(last=False)
+    return data
 
 # ── 시각 신호 판별 ───────────────────────────────────────────────────────────
 def _is_bold_font(span: Dict[str, Any]) -> bool:
     f = (span.get("font") or "").lower()
     return ("bold" in f) or ("semibold" in f) or ("heavy" in f)
 
-def _lines_in_rect(page: fitz.Page, rect: fitz.Rect) -> int:
-    """표 라인 존재 여부(간단)."""
-    n = 0
-    try:
-        for d in page.get_drawings() or []:
+class _DrawingIndex:
+    """
+    페이지 벡터 드로잉(선/사각형)의 bbox를 한 번만 모아 둔 배열 기반 공간 인덱스.
+    - y0 기준 정렬 + searchsorted로 후보 구간을 좁힌 뒤 numpy 마스크로 교차 판정
+    - 가중치: 선분 1, 사각형/사변형 4 (기존 라인 카운트 규칙과 동일)
+    """
+    __slots__ = ("x0", "y0", "x1", "y1", "w", "max_h")
+
+    def __init__(self, boxes: np.ndarray, weights: np.ndarray):
+        order = np.argsort(boxes[:, 1], kind="stable") if len(boxes) else np.zeros(0, dtype=np.intp)
+        b = boxes[order]
+        self.x0, self.y0, self.x1, self.y1 = b[:, 0], b[:, 1], b[:, 2], b[:, 3]
+        self.w = weights[order]
+        self.max_h = float((self.y1 - self.y0).max()) if len(b) else 0.0
+
+    @classmethod
+    def from_drawings(cls, drawings: List[Dict[str, Any]]) -> "_DrawingIndex":
+        boxes: List[Tuple[float, float, float, float]] = []
+        weights: List[int] = []
+        for d in drawings or []:
             for it in d.get("items", []) or []:
                 if not it: continue
                 op = it[0]
-                if op == "l" and len(it) >= 5:
-                    _, x0, y0, x1, y1 = it[:5]
-                    r = fitz.Rect(min(x0,x1), min(y0,y1), max(x0,x1), max(y0,y1))
-                    if rect.intersects(r): n += 1
-                if op == "re" and len(it) >= 5:
-                    _, x, y, w, h = it[:5]
-                    box = fitz.Rect(float(x), float(y), float(x)+float(w), float(y)+float(h))
-                    if rect.intersects(box): n += 4
-    except Exception:
-        return n
-    return n
-
-def _has_image_block(page_dict: Dict[str, Any], rect: fitz.Rect) -> bool:
-    """텍스트 dict에서 이미지 블록(type=1) 존재?"""
-    for b in page_dict.get("blocks", []):
-        if b.get("type", 0) == 1:
-            x0, y0, x1, y1 = b["bbox"]
-            if rect.intersects(fitz.Rect(x0, y0, x1, y1)):
-                return True
-    return False
-
-def _digit_density(page: fitz.Page, rect: fitz.Rect) -> float:
+                try:
+                    # get_drawings(): Point/Rect, get_cdrawings(): 튜플 → 인덱싱으로 공통 처리
+                    if op == "l":
+                        (ax, ay), (bx, by) = it[1][:2], it[2][:2]
+                        boxes.append((min(ax, bx), min(ay, by), max(ax, bx), max(ay, by)))
+                        weights.append(1)
+                    elif op == "re":
+                        x0, y0, x1, y1 = it[1][:4]
+                        boxes.append((min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))); weights.append(4)
+                    elif op == "qu":
+                        r = fitz.Quad(it[1]).rect
+                        boxes.append((r.x0, r.y0, r.x1, r.y1)); weights.append(4)
+                except Exception:
+                    continue
+        arr = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        return cls(arr, np.asarray(weights, dtype=np.int32))
+
+    @classmethod
+    def from_page(cls, page: fitz.Page) -> "_DrawingIndex":
+        try:
+            # get_cdrawings(): Point/Rect 객체를 만들지 않는 저수준 버전(있으면 사용)
+            getter = getattr(page, "get_cdrawings", None) or page.get_drawings
+            return cls.from_drawings(getter())
+        except Exception:
+            return cls(np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.int32))
+
+    def __len__(self) -> int:
+        return len(self.w)
+
+    def boxes_in(self, rect: fitz.Rect) -> np.ndarray:
+        """rect와 닿는 선/박스 bbox (M,4) — 표 격자 복원용 괘선"""
+        if not len(self.w): return np.zeros((0, 4), dtype=np.float32)
+        lo = int(np.searchsorted(self.y0, rect.y0 - self.max_h, side="left"))
+        hi = int(np.searchsorted(self.y0, rect.y1, side="right"))
+        sl = slice(lo, max(lo, hi))
+        m = (self.y1[sl] >= rect.y0) & (self.x0[sl] <= rect.x1) & (self.x1[sl] >= rect.x0)
+        return np.c_[self.x0[sl][m], self.y0[sl][m], self.x1[sl][m], self.y1[sl][m]]
+
+    def count_in(self, rect: fitz.Rect) -> int:
+        """rect와 닿는(경계 포함) 선/박스 가중 개수. 수평/수직선(두께 0)도 포함."""
+        if not len(self.w): return 0
+        lo = int(np.searchsorted(self.y0, rect.y0 - self.max_h, side="left"))
+        hi = int(np.searchsorted(self.y0, rect.y1, side="right"))
+        if hi <= lo: return 0
+        sl = slice(lo, hi)
+        m = (self.y1[sl] >= rect.y0) & (self.x0[sl] <= rect.x1) & (self.x1[sl] >= rect.x0)
+        return int(self.w[sl][m].sum())
+
+# 라벨 확정용 괘선 탐색 높이(pt): 라벨 바로 아래(단위 줄 정도 여유)만 본다
+_RULE_PROBE_H = 60.0
+
+def _lines_in_rect(dix: _DrawingIndex, rect: fitz.Rect) -> int:
+    """표 라인 존재 여부(간단). 페이지당 한 번 만든 드로잉 인덱스로 조회."""
+    return dix.count_in(rect)
+
+def _rules_under_label(dix: _DrawingIndex, lab_bbox: Tuple[float, float, float, float], rect: fitz.Rect) -> int:
+    """
+    라벨 바로 아래 괘선 가중 개수: 영역 위쪽 _RULE_PROBE_H만, 라벨과 가로로 겹치는 선/박스만.
+    (영역 전체를 보면 아래쪽 아무 박스 하나로도 표로 확정되므로)
+    """
+    probe = fitz.Rect(lab_bbox[0], rect.y0, lab_bbox[2], min(rect.y1, rect.y0 + _RULE_PROBE_H))
+    return _lines_in_rect(dix, probe)
+
+class _PageModel:
+    """
+    페이지 1장의 텍스트 모델: TextPage를 한 번만 만들고(get_textpage) 공유해서
+    전체 텍스트 / dict(스팬·이미지블록) / words를 뽑고, 영역 질의는 numpy 좌표 배열로 처리.
+    - 기존: 후보마다 get_text("text", clip=rect) → 매번 페이지 재파싱
+    - dict/words는 처음 필요할 때 생성(TOC 페이지 등은 전체 텍스트만)
+    """
+    def __init__(self, page: fitz.Page, text: Optional[str] = None):
+        self.page = page
+        self.rect = page.rect
+        self._tp_obj: Optional[fitz.TextPage] = None
+        # text: 이미 뽑아 둔 전체 텍스트(목차 읽기·2차 스캔) → 재추출 생략, TextPage는 dict/words가 필요할 때
+        self.text: str = text if text is not None else page.get_text("text", textpage=self._tp)
+        self._dict: Optional[Dict[str, Any]] = None
+        self._words: Optional[np.ndarray] = None   # (N,4) x0,y0,x1,y1
+        self._wline: Optional[np.ndarray] = None   # (N,) 줄 id(block,line 순번)
+        self._wstr: List[str] = []
+        self._imgs: Optional[np.ndarray] = None    # (M,4) 이미지 블록 bbox
+        self._dix: Optional[_DrawingIndex] = None
+
+    @property
+    def _tp(self) -> fitz.TextPage:
+        if self._tp_obj is None:
+            self._tp_obj = self.page.get_textpage(flags=fitz.TEXTFLAGS_DICT)
+        return self._tp_obj
+
+    @property
+    def drawings(self) -> _DrawingIndex:
+        """페이지 드로잉 인덱스(표 후보가 있을 때 처음 만들고 라벨 확정·격자 복원에 공유)"""
+        if self._dix is None:
+            self._dix = _DrawingIndex.from_page(self.page)
+        return self._dix
+
+    def words_with_text(self, rect: fitz.Rect) -> Tuple[np.ndarray, List[str]]:
+        """영역 단어 bbox 배열 + 문자열(읽기 순서)"""
+        idx = self.words_in(rect)
+        return self._words[idx], [self._wstr[i] for i in idx]
+
+    @property
+    def page_dict(self) -> Dict[str, Any]:
+        if self._dict is None:
+            self._dict = self.page.get_text("dict", textpage=self._tp)
+        return self._dict
+
+    def _ensure_words(self) -> None:
+        if self._words is not None: return
+        ws = self.page.get_text("words", textpage=self._tp) or []
+        self._words = np.asarray([w[:4] for w in ws], dtype=np.float32).reshape(-1, 4)
+        self._wstr = [w[4] for w in ws]
+        keys = [(w[5], w[6]) for w in ws]
+        line_ids = {k: i for i, k in enumerate(dict.fromkeys(keys))}
+        self._wline = np.asarray([line_ids[k] for k in keys], dtype=np.int32)
+
+    def _ensure_images(self) -> None:
+        if self._imgs is not None: return
+        boxes = [b["bbox"] for b in self.page_dict.get("blocks", []) if b.get("type", 0) == 1]
+        self._imgs = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+
+    def words_in(self, rect: fitz.Rect) -> np.ndarray:
+        """중심점이 rect 안에 있는 단어 인덱스(읽기 순서 유지)"""
+        self._ensure_words()
+        w = self._words
+        cx = (w[:, 0] + w[:, 2]) * 0.5; cy = (w[:, 1] + w[:, 3]) * 0.5
+        m = (cx >= rect.x0) & (cx <= rect.x1) & (cy >= rect.y0) & (cy <= rect.y1)
+        return np.flatnonzero(m)
+
+    def text_in(self, rect: fitz.Rect) -> str:
+        """
+        영역 텍스트(clip 추출 대용). 줄 단위로 묶고, 단어 간격이 글자 높이의 절반을 넘으면
+        공백 2칸으로 이어 붙여 열 경계를 보존(미리보기의 다중 공백 열 분할과 호환).
+        """
+        idx = self.words_in(rect)
+        if not len(idx): return ""
+        w, line = self._words, self._wline
+        out: List[str] = []
+        cur: List[str] = []
+        prev = -1
+        for i in idx:
+            if prev < 0 or line[i] != line[prev]:
+                if cur: out.append("".join(cur))
+                cur, prev = [self._wstr[i]], i
+                continue
+            gap = w[i, 0] - w[prev, 2]
+            cur.append(("  " if gap > 0.5 * (w[i, 3] - w[i, 1]) else " ") + self._wstr[i])
+            prev = i
+        if cur: out.append("".join(cur))
+        return "\n".join(out)
+
+    def digit_density(self, rect: fitz.Rect) -> float:
+        """영역 글자 중 숫자 비율"""
+        txt = self.text_in(rect)
+        if not txt.strip(): return 0.0
+        return sum(ch.isdigit() for ch in txt) / max(1, len(txt))
+
+    def has_image(self, rect: fitz.Rect) -> bool:
+        """이미지 블록(type=1)과 겹침 여부(fitz.Rect.intersects와 같은 엄격 비교)"""
+        self._ensure_images()
+        b = self._imgs
+        if not len(b) or rect.is_empty: return False
+        m = ((b[:, 0] < b[:, 2]) & (b[:, 1] < b[:, 3])
+             & (rect.x0 < b[:, 2]) & (b[:, 0] < rect.x1) & (rect.y0 < b[:, 3]) & (b[:, 1] < rect.y1))
+        return bool(m.any())
+
+def _has_image_block(model: _PageModel, rect: fitz.Rect) -> bool:
+    """이미지 블록(type=1) 존재?"""
+    return model.has_image(rect)
+
+def _digit_density(model: _PageModel, rect: fitz.Rect) -> float:
     """숫자 밀도: 벡터 라인 없는 텍스트 표를 구별하는 보조 지표."""
     try:
-        txt = page.get_text("text", clip=rect) or ""
-        if not txt.strip(): return 0.0
-        digits = sum(ch.isdigit() for ch in txt)
-        return digits / max(1, len(txt))
+        return model.digit_density(rect)
     except Exception:
         return 0.0
 
 # ── 표/그림 라벨 스캔 ─────────────────────────────────────────────────────────
-def _scan_labels(page: fitz.Page) -> List[Dict[str, Any]]:
+def _scan_labels(page: fitz.Page, model: Optional[_PageModel] = None,
+                 kinds: Tuple[str, ...] = _KINDS) -> List[Dict[str, Any]]:
     """
     1) Bold span에서 '표 2-3', '그림 1-1' 라벨 후보 추출
     2) 라벨 아래 박스(rect)에 표/그림 신호가 있으면 확정(BBox)
+    - kinds: 확정할 종류만(다른 종류 라벨도 영역 경계로는 사용)
     """
-    pd = page.get_text("dict")
+    model = model or _PageModel(page)
+    pd = model.page_dict
     page_rect = page.rect
     cand: List[Dict[str, Any]] = []
 
     # 1) 굵은 라벨 후보 수집
     for bl in pd.get("blocks", []):
         for ln in bl.get("lines", []):
+            cont = bool(_RE_CONT.search("".join(sp.get("text", "") or "" for sp in ln.get("spans", []))))
             for sp in ln.get("spans", []):
                 txt = sp.get("text", "") or ""
                 if not txt.strip(): continue
@@ -157,7 +721,8 @@ def _scan_labels(page: fitz.Page) -> List[Dict[str, Any]]:
                 lab = _norm_label((m_tab.group(1) if m_tab else m_fig.group(1)))
                 kind = "table" if m_tab else "figure"
                 x0, y0, x1, y1 = sp["bbox"]
-                cand.append({"kind": kind, "label": lab, "title": _clean(txt), "y1": y1, "bbox_lab": (x0,y0,x1,y1)})
+                cand.append({"kind": kind, "label": lab, "title": _clean(txt), "y1": y1, "bbox_lab": (x0,y0,x1,y1),
+                             "cont": cont})
 
     # 2) 라벨 아래 영역 검사
     out: List[Dict[str, Any]] = []
@@ -168,12 +733,14 @@ def _scan_labels(page: fitz.Page) -> List[Dict[str, Any]]:
         rect = fitz.Rect(page_rect.x0 + 8, top, page_rect.x1 - 8, bottom)
         if rect.height <= 1 or rect.width <= 1: continue
 
+        if lb["kind"] not in kinds:
+            continue
         if lb["kind"] == "table":
-            # 완화 규칙: (라인≥3) or (이미지블록) or (숫자밀도≥0.07)
-            if not (_lines_in_rect(page, rect) >= 3 or _has_image_block(pd, rect) or _digit_density(page, rect) >= 0.07):
+            # 완화 규칙: (라벨 바로 아래 라인≥3) or (이미지블록) or (숫자밀도≥0.07) — 드로잉은 표 후보가 있을 때만 1회
+            if not (_rules_under_label(model.drawings, lb["bbox_lab"], rect) >= 3 or _has_image_block(model, rect) or _digit_density(model, rect) >= 0.07):
                 continue
         else:
-            if not _has_image_block(pd, rect):  # 그림은 이미지블록 필수
+            if not _has_image_block(model, rect):  # 그림은 이미지블록 필수
                 continue
 
         lb["bbox"] = (rect.x0, rect.y0, rect.x1, rect.y1)
@@ -181,12 +748,12 @@ def _scan_labels(page: fitz.Page) -> List[Dict[str, Any]]:
     return out
 
 # ── 표 미리보기(Markdown) 생성 ───────────────────────────────────────────────
-def _rough_table_markdown_from_region(page: fitz.Page, rect: fitz.Rect) -> str:
+def _rough_table_markdown_from_region(model: _PageModel, rect: fitz.Rect) -> str:
     """
     표 bbox 내 텍스트만으로 3~12행 간단 Markdown 표 생성.
     - 정교한 DF 복원이 목적이 아니라 '사람이 읽을 수 있는 프리뷰'가 목표
     """
-    txt = page.get_text("text", clip=rect) or ""
+    txt = model.text_in(rect)
     lines = [ln.strip() for ln in txt.splitlines() if ln.strip()]
     # 의미없는 경우
     if len(lines) < 3: return ""
@@ -211,69 +778,667 @@ def _rough_table_markdown_from_region(page: fitz.Page, rect: fitz.Rect) -> str:
         md.append("| " + " | ".join(r) + " |")
     return "\n".join(md)
 
+def _table_dataframe(model: _PageModel, rect: fitz.Rect) -> Optional[pd.DataFrame]:
+    """괘선 + 단어 좌표로 셀 격자 복원 → DataFrame(전체 행, 숫자 열 수치형). 실패 시 None"""
+    try:
+        words, texts = model.words_with_text(rect)
+        return grid_table(words, texts, model.drawings.boxes_in(rect))
+    except Exception:
+        return None
+
+# 셀 격자는 추출 때 만들지 않음(표마다 드로잉·단어 격자 복원 → 적재 시간의 큰 몫).
+# 미리보기/QA에서 표를 처음 쓸 때 복원해 (페이지 지문, bbox) 단위로 메모
+_GRIDS: "OrderedDict[Tuple[Any, ...], Optional[pd.DataFrame]]" = OrderedDict()
+_GRIDS_MAX = 256
+_GRIDS_LOCK = threading.Lock()
+
+def _segment_dataframe(doc: fitz.Document, doc_key: str, page_index: int,
+                       bbox: Tuple[float, float, float, float]) -> Optional[pd.DataFrame]:
+    key = (_page_fp_cached(doc, doc_key, page_index), tuple(round(float(v), 2) for v in bbox))
+    with _GRIDS_LOCK:
+        if key in _GRIDS:
+            _GRIDS.move_to_end(key)
+            return _GRIDS[key]
+    df = _table_dataframe(_PageModel(doc[page_index]), fitz.Rect(*bbox))
+    with _GRIDS_LOCK:
+        _GRIDS[key] = df
+        while len(_GRIDS) > _GRIDS_MAX:
+            _GRIDS.popitem(last=False)
+    return df
+
+def table_dataframe(src: PdfSource, table: Dict[str, Any]) -> Optional[pd.DataFrame]:
+    """
+    표 항목(chunks["tables"] 또는 RAG 검색 결과) → 셀 격자 DataFrame. 복원 안 되면 None.
+    여러 쪽 표는 조각(segments)마다 복원해 concat_tables로 이음(열 수가 다르면 None)
+    """
+    segs = table.get("segments") or [{"page": table.get("page") or table.get("page_label"), "bbox": table.get("bbox")}]
+    if not all(sg.get("page") and sg.get("bbox") for sg in segs):
+        return None
+    doc_key = _DOC_POOL.key_for(src)
+    with _DOC_POOL.borrow(src, doc_key) as doc:
+        df = None
+        for k, sg in enumerate(segs):
+            part = _segment_dataframe(doc, doc_key, int(sg["page"]) - 1, sg["bbox"])
+            df = part if k == 0 else concat_tables(df, part)
+            if df is None: return None
+    return df
+
+# ── 페이지 처리 ──────────────────────────────────────────────────────────────
+# 프리필터: 평문에서 '표/그림 + 숫자'가 한 번도 안 나오면 라벨이 있을 수 없음(스팬 정규식의 상위집합).
+# 그룹1이 잡히면 줄 머리(캡션 줄) 위치 → 목차 밖 표/그림 보강 판단에도 같은 패스를 사용
+_RE_LABEL_HINT = re.compile(r"(^[ \t]*[〈<\(\[]?[ \t]*)?(표|그림)\s*[0-9]", re.M)
+_KIND_WORD = {"table": "표", "figure": "그림"}
+
+def _prefilter_kinds(text: str, kinds: Tuple[str, ...]) -> Tuple[str, ...]:
+    """평문 단서로 실제 스캔할 종류: 라벨 단서가 있는 종류만, 목차 기반 스캔이라도 캡션 줄이 보이는 종류는 포함(목차에 빠진 표/그림 대비)"""
+    hints, caps = set(), set()
+    for m in _RE_LABEL_HINT.finditer(text):
+        hints.add(m.group(2))
+        if m.group(1) is not None: caps.add(m.group(2))
+    return tuple(k for k in _KINDS if _KIND_WORD[k] in hints and (k in kinds or _KIND_WORD[k] in caps))
+
+def _process_page(page: fitz.Page, pidx: int, kinds: Tuple[str, ...] = _KINDS,
+                  text: Optional[str] = None) -> Dict[str, Any]:
+    """
+    한 페이지 처리 결과:
+    {"text":{page,text}, "tables":[...], "figures":[...], "info":{progress용 + 단계별 ms}}
+    - kinds: 라벨 스캔할 종류(빈 튜플이면 텍스트만 → dict/도형 분석 생략)
+    - 평문 프리필터에서 라벨 단서가 없는 종류는 스캔 생략(info["scanned"]=False면 dict/도형 분석 없음)
+    - text: 1차 패스에서 뽑은 전체 텍스트(목차 보정 2차 스캔) → 텍스트 재추출 없이 라벨 스캔만
+    """
+    ms: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    model = _PageModel(page, text)
+    full = model.text
+    t1 = time.perf_counter(); ms["text"] = (t1 - t0) * 1e3
+    res: Dict[str, Any] = {"text": {"page": pidx + 1, "text": full}, "tables": [], "figures": []}
+
+    if _is_toc_page(full):
+        res["info"] = {"page_idx": pidx, "page_label": pidx + 1, "n_tables": 0, "n_words": len(full.split()), "is_toc": True,
+                       "scanned": False, "ms": ms}
+        return res
+
+    kinds = _prefilter_kinds(full, kinds)
+    t2 = time.perf_counter(); ms["prefilter"] = (t2 - t1) * 1e3
+
+    lbs = _scan_labels(page, model, kinds) if kinds else []
+    t3 = time.perf_counter(); ms["labels"] = (t3 - t2) * 1e3
+    for lb in lbs:
+        item = {
+            "type": lb["kind"],
+            "label": lb["label"],
+            "title": lb["title"],
+            "caption": lb["title"],
+            "page": pidx + 1,
+            "bbox": lb["bbox"],
+            "preview_md": "",  # 요약·발췌/LLM용 프리뷰
+        }
+        if lb["kind"] == "table":
+            rect = fitz.Rect(*lb["bbox"])
+            try:
+                item["preview_md"] = _rough_table_markdown_from_region(model, rect)
+            except Exception:
+                item["preview_md"] = ""
+            item["continued"] = lb["cont"]  # 캡션 줄에 '(계속)' → 앞쪽 표의 이어지는 조각
+            res["tables"].append(item)
+        else:
+            res["figures"].append(item)
+    ms["preview"] = (time.perf_counter() - t3) * 1e3
+
+    n_tab = sum(1 for x in lbs if x["kind"] == "table")
+    res["info"] = {"page_idx": pidx, "page_label": pidx + 1, "n_tables": n_tab, "n_words": len(full.split()), "is_toc": False,
+                   "scanned": bool(kinds), "ms": ms}
+    return res
+
+# ── 페이지 지문(개정판 재사용) ───────────────────────────────────────────────
+def _page_fingerprint(page: fitz.Page, text: Optional[str] = None) -> str:
+    """
+    페이지 내용 지문: 콘텐츠 스트림 + 추출 평문 + 크기/회전 + 폰트 이름 + XObject/이미지 원본 스트림.
+    평문도 넣어야 콘텐츠 스트림이 같고 글꼴 ToUnicode 등만 바뀐 판을 구분 → 개정판에서 바뀌지 않은 페이지를 찾는 데 사용.
+    text: 이미 뽑아 둔 평문(_PageModel.text와 같은 플래그)이 있으면 재추출하지 않음
+    """
+    doc = page.parent
+    if text is None:
+        text = page.get_text("text", flags=fitz.TEXTFLAGS_DICT)
+    h = hashlib.sha1()
+    h.update(page.read_contents() or b"")
+    h.update(text.encode("utf-8"))
+    h.update(repr((tuple(page.rect), page.rotation)).encode())
+    for f in page.get_fonts():
+        h.update(str(f[3]).encode())
+    seen = set()
+    for x in [xo[0] for xo in page.get_xobjects()] + [im[0] for im in page.get_images()]:
+        if x in seen or x <= 0: continue
+        seen.add(x)
+        try: h.update(doc.xref_stream_raw(x) or b"")
+        except Exception: h.update(str(x).encode())
+    return h.hexdigest()
+
+_FP_MEMO: Dict[Tuple[str, int], str] = {}
+
+def _page_fp_cached(doc: fitz.Document, doc_key: str, page_index: int, text: Optional[str] = None) -> str:
+    """(문서키, 페이지) → 지문 메모(크롭 캐시 키용)"""
+    k = (doc_key, page_index)
+    fp = _FP_MEMO.get(k)
+    if fp is None:
+        if len(_FP_MEMO) > 20000: _FP_MEMO.clear()
+        fp = _FP_MEMO[k] = _page_fingerprint(doc[page_index], text)
+    return fp
+
+def _page_cache_key(fp: str, kinds: Tuple[str, ...] = _KINDS) -> str:
+    """스캔 종류가 전체가 아니면(목차 기반 부분 스캔) 키를 구분"""
+    tag = "" if kinds == _KINDS else "-" + ("".join(k[0] for k in kinds) or "n")
+    return f"x{EXTRACTOR_VERSION}-{fp}{tag}"
+
+def _renumber(res: Dict[str, Any], pidx: int) -> Dict[str, Any]:
+    """다른 판에서 가져온 페이지 결과를 현재 페이지 번호로 고쳐 씀(앞에 페이지가 추가/삭제된 경우)"""
+    out = {
+        "text": dict(res["text"], page=pidx + 1),
+        "tables": [dict(t, page=pidx + 1) for t in res["tables"]],
+        "figures": [dict(f, page=pidx + 1) for f in res["figures"]],
+        "info": dict(res["info"], page_idx=pidx, page_label=pidx + 1),
+    }
+    return out
+
+_Job = Tuple[int, Tuple[str, ...]]  # (pidx, 라벨 스캔 종류)
+
+def _iter_page_results(doc: fitz.Document, jobs: List[_Job], page_cache: Any = None,
+                       fps: Optional[Dict[int, str]] = None, texts: Optional[Dict[int, str]] = None):
+    """
+    (pidx, 결과) 생성기.
+    - page_cache(get_page/put_page): 지문이 같은 페이지는 저장된 결과를 먼저 재사용(결과에 reused=True),
+      나머지를 페이지 순서대로 추출
+    - fps: 페이지 지문 메모(2차 스캔에서 재계산 방지)
+    - texts: 1차 패스 페이지 텍스트(2차 스캔은 텍스트 재추출 없이 라벨 스캔만). 지문 계산 때 뽑은 평문도
+      여기 채워 캐시에 없는 페이지 추출에 다시 씀
+    """
+    todo: List[_Job] = list(jobs)
+    fps = {} if fps is None else fps
+    texts = {} if texts is None else texts
+    if page_cache is not None:
+        todo = []
+        for pidx, kinds in jobs:
+            if pidx not in fps:
+                if pidx not in texts:
+                    texts[pidx] = doc[pidx].get_text("text", flags=fitz.TEXTFLAGS_DICT)
+                fps[pidx] = _page_fingerprint(doc[pidx], texts[pidx])
+            hit = page_cache.get_page(_page_cache_key(fps[pidx], kinds))
+            if hit is None:
+                todo.append((pidx, kinds)); continue
+            res = _renumber(hit, pidx); res["reused"] = True
+            yield pidx, res
+    for pidx, kinds in todo:
+        res = _process_page(doc[pidx], pidx, kinds, texts.get(pidx))
+        if page_cache is not None:
+            page_cache.put_page(_page_cache_key(fps[pidx], kinds), res)
+            res["reused"] = False
+        yield pidx, res
+
+# ── 스트리밍 API + 점진 컨테이너 ──────────────────────────────────────────────
+def iter_chunks(src: PdfSource, page_cache: Any = None,
+                toc: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    페이지 결과를 만들어지는 즉시 내보내는 생성기.
+    각 항목: {"page": 1-based, "n_pages", "phase", "progress": (완료, 전체), "reused",
+             "text":{page,text}, "tables":[...], "figures":[...], "info":{progress용}}
+    - phase "extract": 페이지마다 한 번(페이지 순서, page_cache 재사용 페이지가 먼저) → progress는 (n번째, 쪽수)
+    - page_cache(예: chunk_cache.ChunkCache): 개정판에서 안 바뀐 페이지는 재추출 없이 먼저 나옴
+    - toc(read_toc 결과): 목차가 가리키는 페이지만 라벨 스캔(나머지는 텍스트만). 끝난 뒤
+      미확정 항목 주변/목차 불일치 시 phase "rescan": 평문에 해당 종류 단서가 있는 페이지만
+      1차 텍스트로 라벨 스캔을 다시 해서 그 페이지 결과를 갱신(progress는 (n번째, 다시 볼 쪽수))
+    """
+    doc = _open_doc(src)
+    n = doc.page_count
+    plan = _scan_plan(toc, n)
+    found: Dict[str, set] = {k: set() for k in _KINDS}
+    fps: Dict[int, str] = {}
+    texts: Dict[int, str] = dict((toc or {}).get("texts") or {})
+    is_toc: set = set()
+
+    def _collect(pidx: int, res: Dict[str, Any], phase: str, k: int, total: int) -> Dict[str, Any]:
+        found["table"].update(t["label"] for t in res["tables"])
+        found["figure"].update(f["label"] for f in res["figures"])
+        res["page"], res["n_pages"], res["phase"], res["progress"] = pidx + 1, n, phase, (k, total)
+        res["info"] = dict(res["info"], phase=phase)
+        return res
+
+    jobs: List[_Job] = [(p, plan[p]) for p in range(n)]
+    for k, (pidx, res) in enumerate(_iter_page_results(doc, jobs, page_cache=page_cache, fps=fps,
+                                                       texts=texts), 1):
+        texts[pidx] = res["text"]["text"]
+        if res["info"].get("is_toc"): is_toc.add(pidx)
+        yield _collect(pidx, res, "extract", k, n)
+
+    while True:
+        redo = _rescan_plan(toc, plan, found, n)
+        # 새로 볼 종류의 단서가 평문에 없는 페이지는 결과가 바뀔 수 없음 → 계획만 갱신하고 건너뜀
+        jobs = [(q, kinds) for q, kinds in redo.items()
+                if q not in is_toc and set(_prefilter_kinds(texts[q], kinds)) - set(_prefilter_kinds(texts[q], plan[q]))]
+        for q, kinds in redo.items():
+            plan[q] = kinds
+        if not jobs: break
+        for k, (pidx, res) in enumerate(_iter_page_results(doc, jobs, page_cache=page_cache, fps=fps,
+                                                           texts=texts), 1):
+            yield _collect(pidx, res, "rescan", k, len(jobs))
+
+def _page_stats(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """페이지 단계별 시간 합계 + 프리필터로 라벨 스캔을 건너뛴 페이지 수"""
+    infos = [r.get("info") or {} for r in results]
+    ms: Dict[str, float] = {}
+    for inf in infos:
+        for k, v in (inf.get("ms") or {}).items():
+            ms[k] = ms.get(k, 0.0) + v
+    n_toc = sum(1 for inf in infos if inf.get("is_toc"))
+    n_scan = sum(1 for inf in infos if inf.get("scanned"))
+    return {"pages": len(infos), "toc_pages": n_toc, "scanned": n_scan, "skipped": len(infos) - n_toc - n_scan,
+            "ms": {k: round(v, 2) for k, v in ms.items()}}
+
+# ── 여러 쪽 표 잇기 ──────────────────────────────────────────────────────────
+def _md_header(md: Optional[str]) -> str:
+    head = (md or "").split("\n", 1)[0]
+    return head if head.startswith("|") else ""
+
+_DfOf = Optional[Callable[[Dict[str, Any]], Optional[pd.DataFrame]]]  # 표 조각(page, bbox) → 격자 df
+
+def _n_cols(t: Dict[str, Any], df_of: _DfOf = None) -> Optional[int]:
+    """열 수(격자 DataFrame 우선, 없으면 프리뷰 머리행), 모르면 None"""
+    df = df_of(t) if df_of else None
+    if df is not None: return int(df.shape[1])
+    head = _md_header(t.get("preview_md"))
+    return head.count("|") - 1 if head else None
+
+def _same_header(a: Dict[str, Any], b: Dict[str, Any], df_of: _DfOf = None) -> bool:
+    da, db = (df_of(a), df_of(b)) if df_of else (None, None)
+    if da is not None and db is not None:
+        return [str(c) for c in da.columns] == [str(c) for c in db.columns]
+    head = _md_header(a.get("preview_md"))
+    return bool(head) and head == _md_header(b.get("preview_md"))
+
+def _is_continuation(prev: Dict[str, Any], nxt: Dict[str, Any], df_of: _DfOf = None) -> bool:
+    """같은 라벨의 바로 다음 쪽 조각인지: 머리행 일치, 또는 '(계속)' 표시 + 열 수 일치(모르면 허용)"""
+    if nxt["page"] != prev["segments"][-1]["page"] + 1:
+        return False
+    if _same_header(prev, nxt, df_of):
+        return True
+    if not nxt.get("continued"):
+        return False
+    a, b = _n_cols(prev, df_of), _n_cols(nxt, df_of)
+    return a is None or b is None or a == b
+
+def _grid_lookup(src: PdfSource) -> Callable[[Dict[str, Any]], Optional[pd.DataFrame]]:
+    """
+    _stitch_tables용 df_of: 표 조각의 격자 df(메모). 잇기 후보(같은 라벨이 연속 쪽에 있을 때)만 호출되므로
+    격자 복원은 여러 쪽 표에 대해서만 일어남
+    """
+    doc_key = _DOC_POOL.key_for(src)
+    def _df(t: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        try:
+            with _DOC_POOL.borrow(src, doc_key) as doc:
+                return _segment_dataframe(doc, doc_key, int(t["page"]) - 1, t["bbox"])
+        except Exception:
+            return None
+    return _df
+
+def _join_preview(a: str, b: str) -> str:
+    """프리뷰 마크다운 잇기(뒤 조각의 반복 머리행·구분선은 생략)"""
+    if not a or not b: return a or b
+    la, lb = a.split("\n"), b.split("\n")
+    if lb[0] == la[0]: lb = lb[1:]
+    return "\n".join(la + [ln for ln in lb if not ln.startswith("| ---")])
+
+def _stitch_tables(tables: List[Dict[str, Any]], df_of: _DfOf = None) -> List[Dict[str, Any]]:
+    """
+    라벨 순(같은 라벨은 쪽 순) 표 목록 → 이어지는 쪽 조각을 한 항목으로.
+    - 항목마다 segments=[{page,bbox}, ...] (page/bbox는 첫 조각 그대로 → 기존 소비 코드 호환)
+    - preview_md는 전체 표 기준으로 이어 붙임(격자 df는 table_dataframe이 segments로 복원), 제목의 '(계속)'은 제거
+    - 입력(페이지 결과·캐시 항목)은 건드리지 않고 사본으로 만듦
+    - df_of(_grid_lookup): 머리행 비교에 격자 열 이름 사용(없으면 프리뷰 머리행만)
+    """
+    out: List[Dict[str, Any]] = []
+    for t in tables:
+        last = out[-1] if out else None
+        if last is not None and last["label"] == t["label"] and _is_continuation(last, t, df_of):
+            last["segments"].append({"page": t["page"], "bbox": t["bbox"]})
+            last["preview_md"] = _join_preview(last.get("preview_md") or "", t.get("preview_md") or "")
+            continue
+        t = dict(t, segments=[{"page": t["page"], "bbox": t["bbox"]}])
+        t["title"] = _clean(_RE_CONT.sub("", t.get("title") or ""))
+        out.append(t)
+    return out
+
+class ChunkStore:
+    """
+    iter_chunks() 결과를 채워 가는 점진 컨테이너(스레드 안전).
+    - 채우는 도중에도 get("tables") 등 build_chunks() 반환 dict처럼 읽을 수 있음
+      (읽는 시점까지 들어온 페이지 기준, 정렬 규칙은 build_chunks와 동일)
+    - wait()로 특정 페이지 수/완료까지 대기 가능
+    - src: 여러 쪽 표 잇기 판단에 격자 열 이름을 쓰려면 원본(없으면 프리뷰 머리행만)
+    """
+    _KEYS = ("toc", "tables", "figures", "texts", "reuse", "stats")
+
+    def __init__(self, n_pages: Optional[int] = None, toc: Optional[Dict[str, Any]] = None, src: Any = None):
+        self.n_pages = n_pages
+        self.toc = toc  # read_toc 결과 → "toc"는 처음부터 목차 항목 전체(검출 쪽으로 보정)
+        self._df_of = _grid_lookup(src) if src is not None else None
+        self.done = False
+        self._pages: Dict[int, Dict[str, Any]] = {}
+        self._cond = threading.Condition()
+
+    def add_page(self, res: Dict[str, Any]) -> None:
+        with self._cond:
+            self._pages[res["text"]["page"]] = res
+            self._cond.notify_all()
+
+    def finish(self) -> None:
+        with self._cond:
+            self.done = True
+            self._cond.notify_all()
+
+    @property
+    def pages_done(self) -> int:
+        with self._cond:
+            return len(self._pages)
+
+    @property
+    def complete(self) -> bool:
+        """전 페이지가 들어왔는지(RAG 색인은 완료 전엔 부분 색인으로 취급)"""
+        return self.done
+
+    def tables_so_far(self) -> List[Dict[str, Any]]:
+        """지금까지 들어온 페이지의 표 — RAG 색인 점진 갱신용(LazyDocument와 같은 이름)"""
+        return self.get("tables")
+
+    def wait(self, min_pages: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """min_pages개(없으면 전체 완료)가 쌓일 때까지 대기 → 조건 충족 여부"""
+        def _ready():
+            return self.done or (min_pages is not None and len(self._pages) >= min_pages)
+        with self._cond:
+            return self._cond.wait_for(_ready, timeout=timeout)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """현재까지의 결과를 build_chunks()와 같은 구조의 dict로"""
+        with self._cond:
+            results = [self._pages[p] for p in sorted(self._pages)]
+
+        tables, figures, texts = [], [], []
+        for res in results:
+            texts.append(res["text"])
+            tables.extend(res["tables"])
+            figures.extend(res["figures"])
+
+        tables.sort(key=lambda t: _label_key(t["label"]))
+        figures.sort(key=lambda f: _label_key(f["label"]))
+        tables = _stitch_tables(tables, self._df_of)
+
+        toc_tables = [{"label": t["label"], "title": t["title"], "page": t["page"]} for t in tables]
+        toc_figs   = [{"label": f["label"], "title": f["title"], "page": f["page"]} for f in figures]
+        if self.toc:
+            toc_tables = _merge_toc(self.toc["toc"]["tables"], toc_tables)
+            toc_figs   = _merge_toc(self.toc["toc"]["figures"], toc_figs)
+
+        out = {
+            "toc": {"tables": toc_tables, "figures": toc_figs},
+            "tables": tables,
+            "figures": figures,
+            "texts": texts,
+        }
+        out["stats"] = _page_stats(results)
+        if any("reused" in r for r in results):
+            # 개정판 재사용 리포트(페이지 번호 1-based)
+            out["reuse"] = {
+                "reused":   [r["text"]["page"] for r in results if r.get("reused")],
+                "computed": [r["text"]["page"] for r in results if not r.get("reused")],
+            }
+        return out
+
+    # dict처럼 읽기(기존 chunks 소비 코드 호환)
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.snapshot().get(key, default) if key in self._KEYS else default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._KEYS: raise KeyError(key)
+        return self.snapshot()[key]
+
+class ExtractJob:
+    """
+    iter_chunks를 백그라운드 스레드에서 돌리며 ChunkStore를 채우는 작업(summarizer.SummaryJob과 같은 방식).
+    UI는 앞쪽 페이지가 쌓이면(store.wait) store를 chunks로 바로 쓰고, 진행은 progress()만 폴링.
+    - 끝나면 result = 최종 snapshot(build_chunks와 같은 dict), 오류면 error(받은 페이지까지는 store에 남음)
+    - on_done(result): 성공 시 작업 스레드에서 한 번(요약 시작·색인 등). done은 on_done이 끝난 뒤에 참
+    """
+    def __init__(self, src: PdfSource, page_cache: Any = None, toc: Optional[Dict[str, Any]] = None,
+                 on_done: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.store = ChunkStore(toc=toc, src=src)
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+        self._phase, self._step = "extract", (0, 0)
+        self._on_done = on_done
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, args=(src, page_cache, toc), name="hl-extract", daemon=True)
+
+    def start(self) -> "ExtractJob":
+        self._thread.start()
+        return self
+
+    def _run(self, src: PdfSource, page_cache: Any, toc: Optional[Dict[str, Any]]) -> None:
+        try:
+            for res in iter_chunks(src, page_cache=page_cache, toc=toc):
+                self.store.n_pages = res["n_pages"]
+                self.store.add_page(res)
+                with self._lock:
+                    self._phase, self._step = res["phase"], res["progress"]
+            self.result = self.store.snapshot()
+            if self._on_done:
+                try: self._on_done(self.result)
+                except Exception: pass  # 후속 작업 실패가 추출 결과를 막지 않게
+        except BaseException as e:  # 스레드 밖으로 새지 않게
+            self.error = e
+        finally:
+            self.store.finish()
+
+    @property
+    def done(self) -> bool:
+        return self.store.done
+
+    def progress(self) -> Tuple[str, int, int]:
+        """(단계 "extract"|"rescan", 완료, 전체) — iter_chunks의 phase/progress"""
+        with self._lock:
+            return (self._phase,) + tuple(self._step)
+
 # ── 메인 빌드 ────────────────────────────────────────────────────────────────
-def build_chunks(pdf_bytes: bytes, progress=None) -> Dict[str, Any]:
+def build_chunks(src: PdfSource, progress=None, page_cache: Any = None,
+                 use_toc: bool = True) -> Dict[str, Any]:
     """
     반환 구조:
     {
       "toc": {"tables":[{label,title,page}], "figures":[...]},
-      "tables":[{type,label,title,caption,page,bbox,preview_md}],
+                # 목차 기반이면 항목마다 detected(False = 목차에만 있고 본문에서 못 찾음, page는 목차의 쪽)
+      "tables":[{type,label,title,caption,page,bbox,preview_md,continued,segments}],
+                # segments: 여러 쪽 표의 [{page,bbox}] (page/bbox = 첫 조각). 셀 격자는 table_dataframe()으로 필요할 때
       "figures":[{...}],
-      "texts":[{page,text}]
+      "texts":[{page,text}],
+      "stats":{pages,toc_pages,scanned,skipped,ms:{text,prefilter,labels,preview}}  # 단계별 합계(ms)
     }
+    - progress는 페이지 완료 시점마다 호출
+    - page_cache 지정 시 바뀌지 않은 페이지는 재사용, 반환에 "reuse":{"reused":[...],"computed":[...]} 추가
+    - use_toc: 표목차/그림목차가 있으면 목차 기반 스캔 + "toc"는 목차 항목(검출 쪽으로 보정) 기준
     """
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    tables, figures, texts = [], [], []
+    toc = read_toc(src) if use_toc else None
+    store = ChunkStore(toc=toc, src=src)
+    for res in iter_chunks(src, page_cache=page_cache, toc=toc):
+        store.add_page(res)
+        if progress:
+            progress(res["info"])
+    store.finish()
+    return store.snapshot()
 
-    for pidx in range(doc.page_count):
-        page = doc[pidx]
-        full = page.get_text()
-        texts.append({"page": pidx + 1, "text": full})
+# ── 지연 문서 모델(대형 PDF) ─────────────────────────────────────────────────
+def page_count(src: PdfSource) -> int:
+    with _DOC_POOL.borrow(src) as doc:
+        return doc.page_count
 
-        if _is_toc_page(full):
-            if progress:
-                progress({"page_idx": pidx, "page_label": pidx + 1, "n_tables": 0, "n_words": len(full.split()), "is_toc": True})
-            continue
+class LazyDocument:
+    """
+    수백 쪽 통계연보처럼 큰 PDF용 지연 추출 모델(build_chunks 반환 dict 대신 사용 가능).
+    - 생성 시 저렴한 전역 패스만: 페이지 평문 텍스트 → 목차 페이지 표시 + 캡션 줄 기준 라벨 위치
+      + 표목차/그림목차 지도(read_toc와 동일)
+    - 라벨 확정/bbox/표 프리뷰(_process_page)는 페이지를 처음 요구할 때 계산해 메모(스레드 안전)
+    - dict처럼 읽기: "texts"는 전역 패스 텍스트, "toc"는 목차 항목/라벨 위치 후보(전체 추출 후엔 검출 보정),
+      "tables"/"figures"는 처음 요구 시 남은 페이지를 모두 추출
+    - page_cache(get_page/put_page) 지정 시 페이지 결과를 지문 키로 재사용
+    """
+    _KEYS = ("toc", "tables", "figures", "texts", "stats")
 
-        lbs = _scan_labels(page)
-        for lb in lbs:
-            item = {
-                "type": lb["kind"],
-                "label": lb["label"],
-                "title": lb["title"],
-                "caption": lb["title"],
-                "page": pidx + 1,
-                "bbox": lb["bbox"],
-                "preview_md": "",  # 요약·발췌/LLM용 프리뷰
-            }
-            if lb["kind"] == "table":
-                try:
-                    item["preview_md"] = _rough_table_markdown_from_region(page, fitz.Rect(*lb["bbox"]))
-                except Exception:
-                    item["preview_md"] = ""
-                tables.append(item)
-            else:
-                figures.append(item)
+    def __init__(self, src: PdfSource, page_cache: Any = None):
+        self.src, self.page_cache = src, page_cache
+        self._key = _DOC_POOL.key_for(src)
+        self._lock = threading.RLock()
+        self._store = ChunkStore(src=src)
+        self._done: Dict[int, Dict[str, Any]] = {}     # 1-based 페이지 → 추출 결과
+        self._texts: List[str] = []
+        self._toc_pages: set = set()                    # 0-based
+        self._captions: Dict[Tuple[str, str], List[Tuple[int, str]]] = {}  # (kind, label) → [(pidx, 캡션 줄)]
+        with _DOC_POOL.borrow(src, self._key) as doc:
+            self.n_pages = doc.page_count
+            for pidx in range(self.n_pages):
+                txt = doc[pidx].get_text()
+                self._texts.append(txt)
+                if _is_toc_page(txt):
+                    self._toc_pages.add(pidx); continue
+                for m in _RE_CAPTION_LINE.finditer(txt):
+                    key = ("table" if m.group(1) == "표" else "figure", _norm_label(m.group(2)))
+                    self._captions.setdefault(key, []).append((pidx, _clean(m.group(0))))
+        self._store.n_pages = self.n_pages
+        self._store.toc = self.toc_index = _toc_from_texts(self._texts.__getitem__, self.n_pages)
 
-        if progress:
-            n_tab = sum(1 for x in lbs if x["kind"] == "table")
-            progress({"page_idx": pidx, "page_label": pidx + 1, "n_tables": n_tab, "n_words": len(full.split()), "is_toc": False})
+    # 페이지 단위 접근 ----------------------------------------------------------
+    @property
+    def complete(self) -> bool:
+        return len(self._done) == self.n_pages
 
-    tables.sort(key=lambda t: _label_key(t["label"]))
-    figures.sort(key=lambda f: _label_key(f["label"]))
+    @property
+    def pages_done(self) -> int:
+        return len(self._done)
 
-    toc_tables = [{"label": t["label"], "title": t["title"], "page": t["page"]} for t in tables]
-    toc_figs   = [{"label": f["label"], "title": f["title"], "page": f["page"]} for f in figures]
+    def page_text(self, page: int) -> str:
+        """1-based 페이지 평문(추출 없이 전역 패스 결과)"""
+        return self._texts[page - 1] if 1 <= page <= self.n_pages else ""
 
-    return {
-        "toc": {"tables": toc_tables, "figures": toc_figs},
-        "tables": tables,
-        "figures": figures,
-        "texts": texts,
-    }
+    def _compute(self, doc: fitz.Document, pidx: int) -> Dict[str, Any]:
+        if self.page_cache is None:
+            return _process_page(doc[pidx], pidx)
+        ck = _page_cache_key(_page_fp_cached(doc, self._key, pidx, self._texts[pidx]))
+        hit = self.page_cache.get_page(ck)
+        if hit is not None:
+            return _renumber(hit, pidx)
+        res = _process_page(doc[pidx], pidx)
+        self.page_cache.put_page(ck, res)
+        return res
+
+    def ensure(self, pages: Iterable[int]) -> List[Dict[str, Any]]:
+        """1-based 페이지들의 추출 결과(입력 순서, 범위 밖은 무시). 없는 것만 계산."""
+        pages = [p for p in pages if 1 <= p <= self.n_pages]
+        with self._lock:
+            todo = [p for p in dict.fromkeys(pages) if p not in self._done]
+            if todo:
+                with _DOC_POOL.borrow(self.src, self._key) as doc:
+                    for p in todo:
+                        res = self._compute(doc, p - 1)
+                        self._done[p] = res
+                        self._store.add_page(res)
+                if self.complete:
+                    self._store.finish()
+            return [self._done[p] for p in pages]
+
+    def page(self, page: int) -> Dict[str, Any]:
+        return self.ensure([page])[0]
+
+    def page_range(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """start~end(1-based, 양끝 포함) 추출 결과"""
+        return self.ensure(range(start, end + 1))
+
+    def ensure_all(self) -> None:
+        self.ensure(range(1, self.n_pages + 1))
+
+    def tables_so_far(self) -> List[Dict[str, Any]]:
+        """지금까지 추출된 페이지의 표(추출을 유발하지 않음) — RAG 색인 점진 갱신용"""
+        with self._lock:
+            return self._store.get("tables")
+
+    # 라벨 조회 -----------------------------------------------------------------
+    def _label_pages(self, kind: str, lab: str) -> List[int]:
+        """라벨을 확정할 후보 페이지(1-based): 캡션 줄 위치 → 본문에 라벨이 나오는 나머지 페이지"""
+        first = [pidx + 1 for pidx, _ in self._captions.get((kind, lab), [])]
+        if self.toc_index:
+            field = "tables" if kind == "table" else "figures"
+            first = [e["page"] for e in self.toc_index["toc"][field] if e["label"] == lab] + first
+        pat = _label_regex(kind, lab)
+        rest = [pidx + 1 for pidx, txt in enumerate(self._texts)
+                if pidx not in self._toc_pages and pidx + 1 not in first and pat.search(txt)]
+        return list(dict.fromkeys(first)) + rest
+
+    def find_item(self, kind: str, label: str) -> Optional[Dict[str, Any]]:
+        """라벨로 표/그림 찾기 — 후보 페이지만 차례로 추출"""
+        lab = _norm_label(label)
+        field = "tables" if kind == "table" else "figures"
+        for p in self._label_pages(kind, lab):
+            for it in self.page(p)[field]:
+                if _norm_label(it.get("label")) == lab:
+                    return self._stitched(lab, p) if kind == "table" else it
+        return None
+
+    def _stitched(self, lab: str, p: int) -> Dict[str, Any]:
+        """p쪽 표 + 앞뒤로 같은 라벨이 이어지는 쪽(본문에 라벨이 있는 쪽만 추출) → 한 항목"""
+        pat = _label_regex("table", lab)
+        def _parts(q: int) -> List[Dict[str, Any]]:
+            if not (1 <= q <= self.n_pages) or not pat.search(self._texts[q - 1]): return []
+            return [t for t in self.page(q)["tables"] if _norm_label(t.get("label")) == lab]
+        lo = p
+        while any(t.get("continued") for t in _parts(lo)) and _parts(lo - 1):
+            lo -= 1
+        hi = p
+        while _parts(hi + 1):
+            hi += 1
+        parts = [t for q in range(lo, hi + 1) for t in _parts(q)]
+        return next(t for t in _stitch_tables(parts, self._store._df_of) if any(sg["page"] == p for sg in t["segments"]))
+
+    def toc(self) -> Dict[str, List[Dict[str, Any]]]:
+        """전체 추출 전: 목차 항목(없는 종류는 캡션 줄 첫 등장 페이지) / 후: 검출 결과로 보정한 목록"""
+        if self.complete:
+            return self._store.get("toc")
+        out: Dict[str, List[Dict[str, Any]]] = {"tables": [], "figures": []}
+        for (kind, lab), hits in sorted(self._captions.items(), key=lambda kv: _label_key(kv[0][1])):
+            pidx, line = hits[0]
+            out["tables" if kind == "table" else "figures"].append({"label": lab, "title": line, "page": pidx + 1})
+        if self.toc_index:  # 목차 항목 우선 + 목차에 없는 캡션 라벨
+            for field in ("tables", "figures"):
+                listed = self.toc_index["toc"][field]
+                seen = {e["label"] for e in listed}
+                out[field] = sorted([dict(e) for e in listed] + [d for d in out[field] if d["label"] not in seen],
+                                    key=lambda d: _label_key(d["label"]))
+        return out
+
+    # dict처럼 읽기(기존 chunks 소비 코드 호환) --------------------------------
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == "texts":
+            return [{"page": i + 1, "text": t} for i, t in enumerate(self._texts)]
+        if key == "toc":
+            return self.toc()
+        if key in ("tables", "figures"):
+            self.ensure_all()
+            return self._store.get(key)
+        if key == "stats":  # 지금까지 추출한 페이지 기준
+            return self._store.get(key)
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._KEYS: raise KeyError(key)
+        return self.get(key)
 
 # ── 헬퍼 ─────────────────────────────────────────────────────────────────────
 def find_table_by_label(chunks: Dict[str, Any], label: str):
+    if isinstance(chunks, LazyDocument):
+        return chunks.find_item("table", label)
     lab = _norm_label(label)
     for t in chunks.get("tables", []):
         if _norm_label(t.get("label")) == lab:
@@ -281,6 +1446,8 @@ def find_table_by_label(chunks: Dict[str, Any], label: str):
     return None
 
 def find_figure_by_label(chunks: Dict[str, Any], label: str):
+    if isinstance(chunks, LazyDocument):
+        return chunks.find_item("figure", label)
     lab = _norm_label(label)
     for f in chunks.get("figures", []):
         if _norm_label(f.get("label")) == lab:
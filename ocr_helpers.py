@@ -77,7 +77,7 @@ def ocr_preview_markdown(pdf_bytes: bytes, page_index: int, bbox: Tuple[float, f
     - PDF 특정 영역 크롭 → OCR → Markdown 프리뷰
     """
     try:
-        img = crop_table_image(pdf_bytes, page_index, bbox, dpi=220)
+        img = crop_table_image(pdf_bytes, page_index, bbox, dpi=220, gray=True)  # OCR엔 1채널이면 충분
         return ocr_markdown_from_image(img)
     except Exception:
         return ""
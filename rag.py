@@ -2,11 +2,20 @@
 # -*- coding: utf-8 -*-
 """
 RAG Index — 표 검색 (BM25 + 임베딩) + DataFrame 지원
+- 디스크 저장/로드: <HPL_RAG_DIR>/v<버전>-x<추출버전>/<모델>/<문서 sha1>/
+  emb.npy(float32) + bm25.pkl(CSR 배열) + meta.pkl + manifest.json
+  → 로드는 np.load(mmap_mode="r")라 복사 없음, 여러 프로세스가 OS 페이지 캐시를 공유
+  (pickle 두 파일은 로드 시 바로 역직렬화 → HPL_RAG_DIR은 이 앱만 쓰는 신뢰 디렉터리여야 함)
+- 디렉터리 용량 예산(HPL_RAG_MB): ChunkCache와 같은 LRU(manifest mtime = 최근 사용), 문서 디렉터리 단위 삭제
 """
 from __future__ import annotations
-from typing import Any, Dict, List
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import hashlib, json, os, pickle, re, shutil, tempfile, threading
 import numpy as np
-from rank_bm25 import BM25Okapi
+from config import env_int
+from text_index import BM25Index
 
 try:
     from sentence_transformers import SentenceTransformer
@@ -18,10 +27,24 @@ except Exception:
 class _LiteIndex:
     def __init__(self, dim: int):
         self.vecs = None; self.dim = dim
-    def add(self, arr: np.ndarray): self.vecs = arr.astype(np.float32)
+    def add(self, arr: np.ndarray):
+        # float32 memmap은 그대로 참조(복사 없음) — 질의마다 승격 복사가 생기지 않게 저장도 float32만
+        self.vecs = arr if arr.dtype == np.float32 else arr.astype(np.float32)
     def search(self, q: np.ndarray, k: int):
-        sims = (q @ self.vecs.T)[0]; I = np.argsort(sims)[-k:][::-1]; D = sims[I]
-        return D.reshape(1,-1), I.reshape(1,-1)
+        """질의 행렬 (Q, dim) 한 번의 행렬곱 → 행별 상위 k: D(유사도), I(인덱스) 모두 (Q, k)"""
+        sims = np.atleast_2d(q) @ self.vecs.T; I = _top_k_rows(sims, k)
+        return np.take_along_axis(sims, I, 1), I
+
+def _top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """행별 점수 상위 k개 열 인덱스(내림차순): argpartition으로 k개만 고른 뒤 그 k개만 정렬"""
+    n = scores.shape[1]; k = min(k, n)
+    if k <= 0: return np.zeros((scores.shape[0], 0), dtype=np.intp)
+    if k < n:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(n), scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, part, 1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, 1)
 
 def _tok(s: str):
     import re
@@ -32,52 +55,260 @@ def _normalize(a: np.ndarray) -> np.ndarray:
     if a.ndim == 1: return a / (np.linalg.norm(a) + 1e-8)
     return a / (np.linalg.norm(a, axis=1, keepdims=True) + 1e-8)
 
+# 텍스트 임베딩 메모: (모델, sha1(텍스트)) → 벡터. 개정판의 안 바뀐 표는 재인코딩 없이 재사용
+_EMB_MEMO: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+_EMB_MEMO_MAX = 20000
+_EMB_LOCK = threading.Lock()
+
+DEFAULT_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+RAG_INDEX_VERSION = "4"
+RAG_DIR = os.environ.get("HPL_RAG_DIR") or str(Path.home() / ".cache" / "hi-lens" / "rag")
+RAG_BUDGET_MB = env_int("HPL_RAG_MB", 512)
+
+def index_dir(doc_hash: str, model_name: str = DEFAULT_MODEL, root: str = RAG_DIR) -> Path:
+    """버전(인덱스 형식 + 추출기) / 모델 / 문서 sha1 디렉터리"""
+    from extract import EXTRACTOR_VERSION
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", model_name)
+    return Path(root) / f"v{RAG_INDEX_VERSION}-x{EXTRACTOR_VERSION}" / slug / doc_hash
+
+def evict_rag_dir(root: str = RAG_DIR, budget_mb: int = RAG_BUDGET_MB) -> int:
+    """저장본 총 크기가 예산을 넘으면 오래 안 쓴 문서 디렉터리부터 통째로 삭제(이전 버전 디렉터리 포함). 남은 크기"""
+    from chunk_cache import evict_lru
+    dirs = []
+    for man in Path(root).glob("*/*/*/manifest.json"):
+        try:
+            dirs.append((man.stat().st_mtime, sum(p.stat().st_size for p in man.parent.iterdir()), man.parent))
+        except OSError:
+            continue
+    return evict_lru(dirs, max(0, budget_mb) * 1024 * 1024, shutil.rmtree)
+
+# 임베딩 모델 레지스트리: 프로세스당 모델별 1회 로드(수백 MB 가중치) → 모든 세션/스레드 공유
+_MODELS: Dict[str, Any] = {}
+_MODELS_LOCK = threading.Lock()
+
+def get_embedding_model(model_name: str = DEFAULT_MODEL):
+    """공유 SentenceTransformer(로드 실패/미설치면 None, 실패도 기억해 재시도하지 않음)"""
+    if model_name in _MODELS: return _MODELS[model_name]
+    with _MODELS_LOCK:  # 동시 첫 요청이 모델을 두 번 올리지 않도록 로드 전체를 잠금
+        if model_name not in _MODELS:
+            model = None
+            if _EMBEDDING_OK:
+                try: model = SentenceTransformer(model_name)
+                except Exception: model = None
+            _MODELS[model_name] = model
+        return _MODELS[model_name]
+
 class RAGIndex:
-    def __init__(self, model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"):
-        self.model = None
-        if _EMBEDDING_OK:
-            try: self.model = SentenceTransformer(model_name)
-            except Exception: self.model = None
-        self.table_texts, self.table_meta, self.table_dfs = [], [], []
+    def __init__(self, model_name=DEFAULT_MODEL):
+        self.model_name = model_name
+        self.model = get_embedding_model(model_name)
+        self.table_texts, self.table_meta = [], []
         self.table_index, self.table_bm25 = None, None
+        self._vecs = None
+        self.partial = False          # LazyDocument의 일부 페이지만 색인된 상태(sync_from_chunks로 보충)
+        self._lock = threading.RLock()  # 점진 추가 중 검색이 길이가 어긋난 배열을 보지 않도록
 
     def _encode(self, texts: List[str]) -> np.ndarray:
         if self.model is None: return np.zeros((len(texts), 384), dtype=np.float32)
-        v = self.model.encode(texts, normalize_embeddings=True)
-        return v.astype(np.float32)
+        keys = [(self.model_name, hashlib.sha1(t.encode("utf-8")).hexdigest()) for t in texts]
+        with _EMB_LOCK:
+            cached = [_EMB_MEMO.get(k) for k in keys]
+        miss = [i for i, v in enumerate(cached) if v is None]
+        if miss:
+            v = self.model.encode([texts[i] for i in miss], normalize_embeddings=True).astype(np.float32)
+            with _EMB_LOCK:
+                for j, i in enumerate(miss):
+                    cached[i] = _EMB_MEMO[keys[i]] = v[j]
+                while len(_EMB_MEMO) > _EMB_MEMO_MAX:
+                    _EMB_MEMO.popitem(last=False)
+        return np.stack(cached).astype(np.float32)
 
     def _make_index(self, vec: np.ndarray):
         idx = _LiteIndex(vec.shape[1]); idx.add(vec); return idx
 
     def build_from_chunks(self, chunks: Dict[str,Any]):
-        self.table_texts, self.table_meta, self.table_dfs = [], [], []
-        for t in chunks.get("tables", []):
+        self.table_texts, self.table_meta = [], []
+        self.table_index, self.table_bm25 = None, None
+        self._vecs = None
+        self.sync_from_chunks(chunks)
+
+    def sync_from_chunks(self, chunks: Dict[str,Any]) -> int:
+        """
+        아직 색인 안 된 표만 추가(추가 개수 반환).
+        LazyDocument는 추출을 강제하지 않고 지금까지 추출된 페이지의 표만 → partial 표시
+        """
+        tables, complete = _available_tables(chunks)
+        with self._lock:
+            seen = {(m["page_label"], m["label"]) for m in self.table_meta}
+            new = [t for t in tables if (t["page"], t["label"]) not in seen]
+            self.add_tables(new)
+            self.partial = not complete
+        return len(new)
+
+    def add_tables(self, tables: List[Dict[str,Any]]):
+        """
+        표 점진 추가(ChunkStore/iter_chunks로 페이지가 들어오는 대로 호출 가능).
+        - 새 표만 임베딩하고 기존 벡터에 이어 붙임, BM25는 전체 재구성
+        """
+        with self._lock:
+            self._add_tables(tables)
+
+    def _add_tables(self, tables: List[Dict[str,Any]]):
+        new_texts = []
+        for t in tables or []:
             md = (t.get("preview_md") or "").strip()
             if not md: continue
-            self.table_texts.append(md)
+            new_texts.append(md)
             self.table_meta.append({
                 "page_index": t["page"]-1,
                 "page_label": t["page"],
                 "label": t["label"],
                 "title": t.get("title",""),
+                "segments": t.get("segments") or [{"page": t["page"], "bbox": t.get("bbox")}],  # 격자 df 지연 복원용
             })
-            self.table_dfs.append(t.get("df"))
-        if not self.table_texts: return
-        v = self._encode(self.table_texts); self.table_index = self._make_index(v)
-        self.table_bm25 = BM25Okapi([_tok(t) for t in self.table_texts])
+        if not new_texts: return
+        self.table_texts.extend(new_texts)
+        v = self._encode(new_texts)
+        self._vecs = v if self._vecs is None else np.vstack([self._vecs, v])
+        self.table_index = self._make_index(self._vecs)
+        self.table_bm25 = BM25Index([_tok(t) for t in self.table_texts])
+
+    def save(self, path: Path) -> bool:
+        """
+        디렉터리 단위 원자적 저장(임시 디렉터리에 쓰고 rename). 이미 있으면 건너뜀.
+        임베딩 모델이 없으면(0 벡터) 저장하지 않음 → 모델이 생긴 뒤 다시 빌드되도록
+        """
+        path = Path(path)
+        if self.model is None or self._vecs is None or path.exists(): return False
+        tmp = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = Path(tempfile.mkdtemp(dir=path.parent, prefix=".tmp-"))
+            vecs = np.ascontiguousarray(self._vecs, dtype=np.float32)
+            np.save(tmp / "emb.npy", vecs)
+            with open(tmp / "bm25.pkl", "wb") as f:
+                pickle.dump(self.table_bm25, f, protocol=5)
+            with open(tmp / "meta.pkl", "wb") as f:
+                pickle.dump({"texts": self.table_texts, "meta": self.table_meta}, f, protocol=5)
+            (tmp / "manifest.json").write_text(json.dumps({
+                "version": RAG_INDEX_VERSION, "model": self.model_name, "n": len(self.table_texts),
+                "dim": int(vecs.shape[1]), "dtype": str(vecs.dtype)}), encoding="utf-8")
+            os.replace(tmp, path); tmp = None
+            return True
+        except OSError:
+            return False  # 다른 프로세스가 먼저 저장했거나 디스크 문제 → 메모리 인덱스로 계속
+        finally:
+            if tmp is not None: shutil.rmtree(tmp, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: Path, model_name: str = DEFAULT_MODEL) -> Optional["RAGIndex"]:
+        """
+        저장본 로드(임베딩은 mmap, 실제 읽기는 검색 시 필요한 페이지만). 없거나 형식이 다르면 None.
+        meta.pkl·bm25.pkl은 그 자리에서 pickle.load → 캐시 디렉터리 내용을 신뢰한다고 가정(외부 파일을 두지 말 것)
+        """
+        path = Path(path)
+        try:
+            man = json.loads((path / "manifest.json").read_text(encoding="utf-8"))
+            if man.get("version") != RAG_INDEX_VERSION or man.get("model") != model_name: return None
+            if man.get("dtype", "float32") != "float32": return None
+            vecs = np.load(path / "emb.npy", mmap_mode="r")
+            with open(path / "meta.pkl", "rb") as f: data = pickle.load(f)
+            with open(path / "bm25.pkl", "rb") as f: bm25 = pickle.load(f)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            return None
+        if len(vecs) != man.get("n") or len(data["texts"]) != len(vecs): return None
+        rag = cls(model_name)
+        if rag.model is None: return None
+        try: os.utime(path / "manifest.json")  # LRU: 최근 사용 표시
+        except OSError: pass
+        rag.table_texts, rag.table_meta = data["texts"], data["meta"]
+        rag._vecs, rag.table_bm25 = vecs, bm25
+        rag.table_index = rag._make_index(vecs) if len(vecs) else None
+        return rag
 
     def search_tables(self, query: str, k: int = 3) -> List[Dict[str,Any]]:
-        if not self.table_texts: return []
-        qtok = _tok(query)
-        bm = self.table_bm25.get_scores(qtok) if self.table_bm25 else np.zeros(len(self.table_texts))
+        return self.search_tables_batch([query], k)[0]
+
+    def search_tables_batch(self, queries: List[str], k: int = 3) -> List[List[Dict[str,Any]]]:
+        """
+        여러 질의(질문 여러 개, 질의 확장 등)를 한 번에: BM25 점수 행렬 + 질의 임베딩 1회 인코딩·1회 행렬곱.
+        질의별 결과 목록(점수 내림차순 상위 k)
+        """
+        with self._lock:
+            return self._search_tables_batch(queries, k)
+
+    def _search_tables_batch(self, queries: List[str], k: int) -> List[List[Dict[str,Any]]]:
+        n = len(self.table_texts)
+        if not n: return [[] for _ in queries]
+        bm = self.table_bm25.get_scores_batch([_tok(q) for q in queries]) if self.table_bm25 else np.zeros((len(queries), n))
         emb = np.zeros_like(bm)
         if self.model is not None:
-            qv = _normalize(self._encode([query])); D, I = self.table_index.search(qv, min(k*4, len(self.table_texts)))
-            emb[I[0]] = D[0]
-        s = 0.6 * (bm / (np.max(bm) + 1e-8)) + 0.4 * (emb / (np.max(emb) + 1e-8))
-        order = np.argsort(s)[::-1][:max(k*2, 8)]
-        uniq = []
-        for idx in order:
-            m = dict(self.table_meta[idx]); m["score"] = float(s[idx]); m["text"] = self.table_texts[idx]; m["df"] = self.table_dfs[idx]
-            uniq.append(m)
-        return uniq[:k]
+            qv = _normalize(self._encode(list(queries))); D, I = self.table_index.search(qv, min(k*4, n))
+            np.put_along_axis(emb, I, D, 1)
+        s = 0.6 * (bm / (bm.max(axis=1, keepdims=True) + 1e-8)) + 0.4 * (emb / (emb.max(axis=1, keepdims=True) + 1e-8))
+        out = []
+        for row, top in zip(s, _top_k_rows(s, k)):
+            hits = []
+            for idx in top:
+                m = dict(self.table_meta[idx]); m["score"] = float(row[idx]); m["text"] = self.table_texts[idx]
+                hits.append(m)
+            out.append(hits)
+        return out
+
+def _available_tables(chunks: Any):
+    """(지금 색인할 표, 완전한지). LazyDocument는 추출된 페이지분만 — get("tables")는 전 페이지 추출을 유발"""
+    if getattr(chunks, "complete", True):
+        return chunks.get("tables", []) or [], True
+    return chunks.tables_so_far(), False
+
+
+# 문서별 인덱스 캐시: (문서 sha1, 모델, 설정) → 빌드된 RAGIndex. 질문/재실행/세션 간 재사용
+RAG_CACHE_DOCS = env_int("HPL_RAG_CACHE_DOCS", 8)
+_INDEXES: "OrderedDict[tuple, RAGIndex]" = OrderedDict()
+_INDEX_LOCKS: Dict[tuple, threading.Lock] = {}
+_INDEXES_LOCK = threading.Lock()
+
+def _persist(rag: RAGIndex, doc_hash: str, model_name: str) -> None:
+    """디스크 저장 + 새로 저장했으면 디렉터리 용량 예산 적용"""
+    if rag.save(index_dir(doc_hash, model_name)):
+        evict_rag_dir()
+
+def get_rag_index(doc_hash: Optional[str], chunks: Dict[str, Any], model_name: str = DEFAULT_MODEL) -> RAGIndex:
+    """
+    문서의 표 인덱스를 1회만 빌드해 공유(LRU, 최대 HPL_RAG_CACHE_DOCS개).
+    - 같은 문서를 동시에 요청하면 하나만 빌드하고 나머지는 기다렸다 재사용
+    - 메모리에 없으면 디스크 저장본(mmap) → 그것도 없으면 빌드 후 저장
+    - LazyDocument(일부만 추출): 추출된 페이지의 표만 색인하고, 이후 호출마다 새로 추출된 페이지의 표를
+      이어 붙임(sync_from_chunks). 완전해진 뒤에만 디스크에 저장
+    - doc_hash가 없으면 캐시 없이 새로 빌드
+    """
+    if not doc_hash:
+        rag = RAGIndex(model_name); rag.build_from_chunks(chunks); return rag
+    key = (doc_hash, model_name)
+    with _INDEXES_LOCK:
+        rag = _INDEXES.get(key)
+        if rag is not None:
+            _INDEXES.move_to_end(key)
+        else:
+            lock = _INDEX_LOCKS.setdefault(key, threading.Lock())
+    if rag is not None:
+        if rag.partial:
+            rag.sync_from_chunks(chunks)
+            if not rag.partial: _persist(rag, doc_hash, model_name)
+        return rag
+    with lock:
+        with _INDEXES_LOCK:
+            rag = _INDEXES.get(key)
+        if rag is None:
+            path = index_dir(doc_hash, model_name)
+            rag = RAGIndex.load(path, model_name)
+            if rag is None:
+                rag = RAGIndex(model_name); rag.build_from_chunks(chunks)
+                if not rag.partial: _persist(rag, doc_hash, model_name)
+        with _INDEXES_LOCK:
+            _INDEXES[key] = rag; _INDEXES.move_to_end(key)
+            _INDEX_LOCKS.pop(key, None)
+            while len(_INDEXES) > max(1, RAG_CACHE_DOCS):
+                _INDEXES.popitem(last=False)
+    return rag
@@ -2,22 +2,15 @@
 """
 Windows 바인딩/루프 이슈 회피 + 안정적인 포트 확보
 """
-import os, sys, socket, asyncio
+import sys, socket, asyncio
 from contextlib import closing
 from streamlit.web import bootstrap
+from config import env_int, env_str
 
 if sys.platform.startswith("win") and hasattr(asyncio, "WindowsSelectorEventLoopPolicy"):
     try: asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
     except Exception: pass
 
-def env_str(name: str, default: str) -> str:
-    val = (os.environ.get(name) or default).strip()
-    return val if val else default
-
-def env_int(name: str, default: int) -> int:
-    try: return int(os.environ.get(name, default))
-    except Exception: return default
-
 ADDR = env_str("HPL_ADDR", "127.0.0.1")
 PORT = env_int("HPL_PORT", 8501)
 
@@ -29,14 +22,16 @@ def find_free_port(start_port: int, host: str) -> int:
             except OSError: continue
     return start_port
 
-PORT = find_free_port(PORT, ADDR)
-print(f"[Hi-Lens] http://{ADDR}:{PORT}")
-bootstrap.run("app.py", is_hello=False, args=[], flag_options={
-    "server.headless": True,
-    "server.address": ADDR,
-    "server.port": PORT,
-    "server.enableCORS": True,
-    "server.enableXsrfProtection": True,
-    "browser.gatherUsageStats": False,
-    "client.toolbarMode": "minimal",
-})
+# import만 할 때는 서버를 띄우지 않도록 가드
+if __name__ == "__main__":
+    PORT = find_free_port(PORT, ADDR)
+    print(f"[Hi-Lens] http://{ADDR}:{PORT}")
+    bootstrap.run("app.py", is_hello=False, args=[], flag_options={
+        "server.headless": True,
+        "server.address": ADDR,
+        "server.port": PORT,
+        "server.enableCORS": True,
+        "server.enableXsrfProtection": True,
+        "browser.gatherUsageStats": False,
+        "client.toolbarMode": "minimal",
+    })
@@ -3,36 +3,190 @@
 # (계층 요약: 메타/목차 제외 → 내용 페이지 선별 → 페이지요약 → 최종 문서 요약)
 # =========================
 from __future__ import annotations
-from typing import List, Callable, Dict, Any, Optional
-import re
+from typing import List, Callable, Dict, Any, Iterator, Optional, Sequence, Tuple
+import hashlib, os, random, re, threading, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+from config import env_int
 from llm import llm_chat, SUMMARIZER_DEFAULT_SYSTEM
 
+# 동시 LLM 호출 상한(페이지 요약·중간 통합), 최종 요약 입력 예산(문자)
+SUM_WORKERS = env_int("HPL_SUM_WORKERS", 4)
+# 속도 제한(429) 응답 재시도 횟수 — 대기는 1, 2, 4…초(+지터)
+SUM_RETRIES = env_int("HPL_SUM_RETRIES", 3)
+SUM_BUDGET = env_int("HPL_SUM_BUDGET", 12000)
+# 페이지 요약 입력 예산(토큰): 핵심 문장만 추려 보냄(0이면 압축 없이 앞에서 per_page_limit자)
+SUM_PAGE_TOKENS = env_int("HPL_SUM_PAGE_TOKENS", 400)
+
+try:
+    import tiktoken
+    _ENC = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _ENC = None
+
 # ───────────────────────────────────────────────
 # 휴리스틱: 메타/목차 페이지 제외 + 내용 스코어링
 # ───────────────────────────────────────────────
-_KEYWORDS = [
+_DEFAULT_KEYWORDS = (
     "정책", "변화", "동향", "추이", "증가", "감소", "비중", "점유율", "수요", "공급",
     "가격", "시장", "투자", "설비", "전망", "과제", "시사점", "결론", "성과", "통계",
     "배출", "온실가스", "재생에너지", "전력", "효율", "보조금", "세제", "규제", "요금"
-]
+)
+
+def _load_keywords(spec: Optional[str]) -> Tuple[str, ...]:
+    """
+    배포 도메인별 키워드: HPL_SUM_KEYWORDS = 쉼표 구분 목록 또는 파일 경로(줄/쉼표 구분).
+    비어 있으면 기본 목록(에너지·정책 보고서용).
+    """
+    spec = (spec or "").strip()
+    if not spec: return _DEFAULT_KEYWORDS
+    if os.path.isfile(spec):
+        with open(spec, encoding="utf-8") as f: spec = f.read()
+    kws = tuple(dict.fromkeys(k.strip() for k in re.split(r"[,\n]", spec) if k.strip()))
+    return kws or _DEFAULT_KEYWORDS
+
+_KEYWORDS = _load_keywords(os.environ.get("HPL_SUM_KEYWORDS"))
+
+_RE_META = re.compile(r"(목\s*차|표\s*목차|그림\s*목차|표지|발간|저자|연구진|초록|요약|요지|서문|감사의글)")
+_RE_LATIN = re.compile(r"[A-Za-z]{4,}")
+# 수치 패턴: \d{4}년 | \d+(\.\d+)?\s?% | \d{1,3}(,\d{3})+ | 원/kWh | 원/MJ | toe | MWh | kWh | MJ
+# 첫 글자를 숫자 리터럴 가지로 펼쳐 두면(모든 가지가 리터럴로 시작) re가 후보 글자까지 C에서 건너뜀
+_NUM_TAIL = r"(?:\d{3}년|\d*(?:\.\d+)?\s?%|\d{0,2}(?:,\d{3})+)"
+_NUM_ALTS = "|".join(f"{d}{_NUM_TAIL}" for d in "0123456789") + r"|원/kWh|원/MJ|toe|MWh|kWh|MJ"
+_PAGE_SEP = "\x00"
 
 def _is_probably_meta_or_toc(text: str) -> bool:
     """
     목차/표지/발간정보/저자/초록/요약/서문/감사의글 등 '메타' 페이지를 제외.
     """
     head = (text or "")[:1600]
-    if re.search(r"(목\s*차|표\s*목차|그림\s*목차|표지|발간|저자|연구진|초록|요약|요지|서문|감사의글)", head):
+    if _RE_META.search(head):
         return True
-    if len(re.findall(r"[A-Za-z]{4,}", head)) > 60 and len(head) < 1000:
+    if len(head) < 1000 and len(_RE_LATIN.findall(head)) > 60:
         return True
     return False
 
+# 페이지 경계 | 수치 패턴 → 문서 전체 1회 findall(경계 누적합이 페이지 번호)
+_RE_NUM_SCAN = re.compile(re.escape(_PAGE_SEP) + "|" + _NUM_ALTS)
+
+def _content_scores(texts: Sequence[str], keywords: Tuple[str, ...] = _KEYWORDS) -> np.ndarray:
+    """
+    페이지별 점수 배열: 등장한 키워드 종류 수 + 수치(%, 연도·금액 등) 개수 × 0.3.
+    - 키워드: 키워드마다 독립적으로 `in` 검사(겹치는 키워드도 각각 셈 — 결합 정규식은 한 위치에 하나만 매치)
+    - 수치: 페이지를 경계 문자로 이어 한 번에 findall → 경계 누적합으로 페이지별 bincount
+    """
+    n = len(texts)
+    if not n: return np.zeros(0)
+    kws = tuple(dict.fromkeys(keywords))
+    kw = np.fromiter((sum(k in t for k in kws) for t in texts), dtype=np.float64, count=n)
+    toks = _RE_NUM_SCAN.findall(_PAGE_SEP.join(t.replace(_PAGE_SEP, " ") for t in texts))
+    sep = np.fromiter((t == _PAGE_SEP for t in toks), dtype=bool, count=len(toks))
+    nums = np.bincount(np.cumsum(sep)[~sep], minlength=n)
+    return kw * 1.0 + nums * 0.3
+
 def _content_score(text: str) -> float:
     """간단 점수: 키워드 매칭 + 숫자(%, 연도·금액 등) 개수."""
-    t = text or ""
-    kw = sum(1 for k in _KEYWORDS if k in t)
-    nums = len(re.findall(r"\d{4}년|\d+(?:\.\d+)?\s?%|\d{1,3}(?:,\d{3})+|원/kWh|원/MJ|toe|MWh|kWh|MJ", t))
-    return kw * 1.0 + nums * 0.3
+    return float(_content_scores([text or ""])[0])
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """점수 상위 k개 인덱스(내림차순, 동점은 앞 페이지 우선 — 안정 정렬 결과와 같음)"""
+    n = len(scores)
+    if k >= n: return np.argsort(-scores, kind="stable")
+    if k <= 0: return np.zeros(0, np.intp)
+    thr = np.partition(scores, n - k)[n - k]
+    idx = np.flatnonzero(scores > thr)
+    idx = np.concatenate([idx, np.flatnonzero(scores == thr)[: k - len(idx)]])
+    return idx[np.lexsort((idx, -scores[idx]))]
+
+def select_pages(pages: Sequence[Dict[str, Any]], max_pages: int,
+                 keywords: Optional[Sequence[str]] = None) -> List[Tuple[Any, str, float]]:
+    """
+    ①② 메타/목차 제외 → 점수 상위 max_pages 페이지 [(page, text, score)] (점수 내림차순).
+    남는 페이지가 없으면 앞 3페이지.
+    """
+    kws = tuple(keywords) if keywords else _KEYWORDS
+    pnos, txts = [], []
+    for it in pages:
+        txt = (it.get("text") or "").strip()
+        if not txt or _is_probably_meta_or_toc(txt):
+            continue
+        pnos.append(it.get("page")); txts.append(txt)
+    if not txts:
+        return [(it.get("page"), (it.get("text") or ""), 0.0) for it in pages[:3]][:max_pages]
+    scores = _content_scores(txts, kws)
+    return [(pnos[i], txts[i], float(scores[i])) for i in _top_k(scores, max_pages)]
+
+# ───────────────────────────────────────────────
+# 추출 압축: 머리말/꼬리말 제거 → 중심(centroid) 유사도 상위 문장만 토큰 예산 안에서
+# ───────────────────────────────────────────────
+_RE_HANGUL = re.compile(r"[가-힣]")
+_RE_TERM = re.compile(r"[가-힣A-Za-z]{2,}|\d+(?:[.,]\d+)*%?")
+_RE_SENT_END = re.compile(r"(?<=[.!?。])\s+|(?<=[다음함됨임])\s*\n")  # 문장부호 뒤 / '~다·~함' 줄 끝
+_RE_DIGITS = re.compile(r"\d+")
+_RE_WORDISH = re.compile(r"[가-힣A-Za-z]{2,}")
+_BOILER_MIN_PAGES = 3      # 이 쪽수 이상 &
+_BOILER_RATIO = 0.3        # 전체의 30% 이상에 반복되는 줄 → 머리말/꼬리말
+
+def est_tokens(text: str) -> int:
+    """프롬프트 토큰 수: tiktoken 있으면 정확히, 없으면 근사(한글 1자≈0.8, 그 외 4자≈1)"""
+    if not text: return 0
+    if _ENC is not None: return len(_ENC.encode(text))
+    n_kr = len(_RE_HANGUL.findall(text))
+    return int(n_kr * 0.8 + (len(text) - n_kr) / 4) + 1
+
+def _line_key(line: str) -> str:
+    """반복 줄 판별용: 공백 정리 + 숫자(쪽번호 등) 치환"""
+    return _RE_DIGITS.sub("#", " ".join(line.split()))
+
+def boilerplate_lines(texts: Sequence[str]) -> frozenset:
+    """여러 쪽에 반복되는 줄(머리말/꼬리말/쪽번호) 키 집합"""
+    n = len(texts)
+    if n < _BOILER_MIN_PAGES: return frozenset()
+    freq: Dict[str, int] = {}
+    for t in texts:
+        for k in {_line_key(ln) for ln in t.splitlines() if _RE_WORDISH.search(ln)}:  # 숫자 행(표)은 제외
+            freq[k] = freq.get(k, 0) + 1
+    thr = max(_BOILER_MIN_PAGES, int(n * _BOILER_RATIO))
+    return frozenset(k for k, c in freq.items() if c >= thr)
+
+def _sentences(text: str, boiler: frozenset) -> List[str]:
+    """반복 줄·숫자만 있는 줄 제거 → 줄바꿈으로 끊긴 문장 잇기 → 문장 단위 분할"""
+    keep = []
+    for ln in text.splitlines():
+        ln = ln.strip()
+        if not ln or _line_key(ln) in boiler: continue
+        if _RE_HANGUL.search(ln) or (len(ln) > 20 and _RE_TERM.search(ln)):  # 쪽번호·기호만 있는 줄 제외
+            keep.append(ln)
+    sents = [" ".join(s.split()) for s in _RE_SENT_END.split("\n".join(keep))]
+    return [s for s in sents if len(s) >= 8]
+
+def compress_page(text: str, max_tokens: int = SUM_PAGE_TOKENS, boiler: frozenset = frozenset()) -> str:
+    """
+    페이지 본문 → 정보량 높은 문장만(원래 순서 유지) max_tokens 이내로.
+    점수 = 문장 TF 벡터와 페이지 중심 벡터의 코사인 + 수치 포함 가산(0.1).
+    """
+    sents = _sentences(text, boiler)
+    if not sents: return ""
+    out = "\n".join(sents)
+    if est_tokens(out) <= max_tokens: return out
+    vocab: Dict[str, int] = {}
+    rows, cols = [], []
+    for i, s in enumerate(sents):
+        for w in _RE_TERM.findall(s.lower()):
+            rows.append(i); cols.append(vocab.setdefault(w, len(vocab)))
+    X = np.zeros((len(sents), max(1, len(vocab))))
+    np.add.at(X, (rows, cols), 1.0)
+    X = np.log1p(X) * np.log1p(len(sents) / (1.0 + (X > 0).sum(axis=0)))  # tf-idf(페이지 안)
+    norms = np.linalg.norm(X, axis=1) + 1e-9
+    c = X.mean(axis=0)
+    score = (X @ c) / (norms * (np.linalg.norm(c) + 1e-9))
+    score += 0.1 * np.array([bool(_RE_DIGITS.search(s)) for s in sents])
+    toks = np.array([est_tokens(s) for s in sents])
+    picked, used = [], 0
+    for i in np.argsort(-score, kind="stable"):
+        if used + toks[i] > max_tokens: continue
+        picked.append(i); used += toks[i]
+    return "\n".join(sents[i] for i in sorted(picked))
 
 # ───────────────────────────────────────────────
 # 프롬프트 정의
@@ -72,63 +226,257 @@ _FINAL_SUMMARY_PROMPT = """
 {page_summaries}
 """.strip()
 
+_GROUP_SUMMARY_PROMPT = """
+아래는 문서 일부 페이지의 '페이지별 요약'입니다. 겹치는 내용을 합쳐 불릿 3~5개로 다시 정리하세요.
+
+[규칙]
+- 각 불릿은 1문장, 25~60자
+- 각 불릿 앞에 근거 페이지 (p.번호)를 그대로 유지
+- 문서 밖 추측 금지
+
+[페이지별 요약]
+{page_summaries}
+""".strip()
+
 # ───────────────────────────────────────────────
 # 계층 요약 함수
 # ───────────────────────────────────────────────
-def summarize_from_chunks(
+def _page_summary_key(excerpt: str) -> str:
+    """페이지 요약 캐시 키: 프롬프트+발췌 내용 해시(개정판에서 안 바뀐 페이지는 같은 키)"""
+    h = hashlib.sha1(_PAGE_SUMMARY_PROMPT.encode("utf-8"))
+    h.update(excerpt.encode("utf-8"))
+    return "sum-" + h.hexdigest()
+
+def _failed(s: str) -> bool:
+    """llm_chat은 예외 대신 "⚠️ …" 문구를 돌려줌"""
+    return s.startswith("⚠️")
+
+def _rate_limited(s: str) -> bool:
+    low = s.lower()
+    return _failed(s) and ("429" in low or "rate limit" in low or "rate_limit" in low)
+
+def _chat(prompt: str, retries: int = SUM_RETRIES) -> str:
+    """llm_chat + 속도 제한 응답이면 지수 백오프로 최대 retries회 재시도(그 밖의 오류는 바로 반환)"""
+    for attempt in range(max(0, retries) + 1):
+        s = llm_chat(SUMMARIZER_DEFAULT_SYSTEM, prompt)
+        if not _rate_limited(s) or attempt >= retries:
+            return s
+        time.sleep(2 ** attempt + random.uniform(0, 0.5))
+    return s
+
+def _llm_map(prompts: Sequence[str], workers: int):
+    """프롬프트들을 스레드 풀로 동시 호출 → (인덱스, 결과)를 끝난 순서대로(호출 측 스레드에서 소비)"""
+    if not prompts: return
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(prompts))), thread_name_prefix="hl-sum") as ex:
+        futs = {ex.submit(_chat, p): i for i, p in enumerate(prompts)}
+        for f in as_completed(futs):
+            yield futs[f], f.result()
+
+def _group_by_budget(items: Sequence[str], budget: int) -> List[List[str]]:
+    """순서대로 이어 붙여 그룹당 budget(문자) 이하가 되게 나눔(한 항목이 넘치면 단독 그룹)"""
+    groups: List[List[str]] = [[]]; size = 0
+    for it in items:
+        if groups[-1] and size + len(it) + 2 > budget:
+            groups.append([]); size = 0
+        groups[-1].append(it); size += len(it) + 2
+    return groups
+
+# 요약 길이 추정(문자): 페이지 요약 = 불릿 3개×60자 + "(p.N) ", 묶음 통합 = 불릿 5개×70자
+_EST_PAGE_SUM_CHARS = 200
+_EST_GROUP_SUM_CHARS = 350
+
+def _plan_reduce(lengths: Sequence[int], budget: int) -> int:
+    """
+    예상 중간 통합 호출 수: _group_by_budget과 같은 규칙으로 단계별 묶음 수를 세고,
+    다음 단계 항목 길이는 묶음 통합 길이 추정치로
+    """
+    calls = 0
+    lengths = list(lengths)
+    while len(lengths) > 1 and sum(n + 2 for n in lengths) > budget:
+        groups, size = 1, 0
+        for n in lengths:
+            if size and size + n + 2 > budget:
+                groups += 1; size = 0
+            size += n + 2
+        if groups >= len(lengths): break
+        calls += groups
+        lengths = [_EST_GROUP_SUM_CHARS] * groups
+    return calls
+
+class _Progress:
+    """완료된 LLM 호출 수 / 계획된 호출 수(계획이 바뀌어도 비율은 되돌아가지 않음)"""
+    def __init__(self, planned: int):
+        self.planned, self.done, self.last = max(1, planned), 0, 0.0
+
+    def replan(self, remaining: int) -> None:
+        """남은 호출 수 추정을 실제 값으로 갱신"""
+        self.planned = max(1, self.done + remaining)
+
+    def step(self, n: int = 1) -> float:
+        self.done += n
+        self.last = max(self.last, min(1.0, self.done / self.planned))
+        return self.last
+
+def iter_summary_events(
     chunks: Dict[str, Any],
     max_pages: int = 20,
     per_page_limit: int = 2800,
-    progress_cb: Optional[Callable[[str, float], None]] = None
-) -> str:
+    page_cache: Any = None,
+    keywords: Optional[Sequence[str]] = None,
+    workers: int = SUM_WORKERS,
+    budget: int = SUM_BUDGET,
+    page_tokens: int = SUM_PAGE_TOKENS,
+) -> Iterator[Dict[str, Any]]:
     """
-    계층 요약 파이프라인:
+    계층 요약 파이프라인(map-reduce)을 이벤트로 흘려 보냄:
       ① 메타/목차 페이지 제외
-      ② 내용 페이지 스코어링 후 상위 N개 선별
-      ③ 페이지 단위 요약(불릿)
-      ④ 최종 통합 요약(문서 요약)
+      ② 내용 페이지 스코어링 후 상위 N개 선별(키워드: keywords 또는 HPL_SUM_KEYWORDS)
+      ③ map: 페이지 본문을 추출 압축(page_tokens 토큰 이내 핵심 문장)한 뒤 페이지 요약(불릿)을
+         최대 workers개 동시 호출 — page_cache(get_page/put_page)가 있으면 같은 페이지 요약 재사용.
+         속도 제한(429)은 SUM_RETRIES회까지 백오프 재시도
+      ④ reduce: 페이지 요약 합이 budget(문자)을 넘으면 그룹별 중간 통합(동시 호출)을 반복
+         (실패한 "⚠️" 요약은 통합·최종 입력에서 뺌)
+      ⑤ 최종 통합 요약(문서 요약)
+    이벤트(dict, 공통 키 msg/ratio — ratio = 끝난 LLM 호출 / 계획된 호출):
+      {"type": "page",   "page", "text", "done", "total"}   페이지 요약 1개 도착(캐시 재사용 포함)
+      {"type": "reduce", "level", "done", "total"}          중간 통합 1묶음 완료
+      {"type": "final",  "text"}                            최종 요약(마지막 이벤트)
     """
     pages = chunks.get("texts", []) or []
     if not pages:
-        return "본문 발췌가 없습니다."
+        yield {"type": "final", "text": "본문 발췌가 없습니다.", "msg": "완료", "ratio": 1.0}
+        return
 
-    # 1) 메타 제외 + 스코어링
-    cands = []
-    for it in pages:
-        pno = it.get("page")
-        txt = (it.get("text") or "").strip()
-        if not txt:
-            continue
-        if _is_probably_meta_or_toc(txt):
-            continue
-        cands.append((pno, txt, _content_score(txt)))
+    # 1~2) 메타 제외 + 스코어링 → 상위 페이지 선별
+    selected = select_pages(pages, max_pages, keywords)
+    boiler = boilerplate_lines([p.get("text") or "" for p in pages]) if page_tokens > 0 else frozenset()
+
+    # 3) map: 캐시에 없는 페이지만 동시 요약(결과 순서는 선별 순서 유지)
+    page_sums: List[Optional[str]] = [None] * len(selected)
+    todo: List[Tuple[int, str]] = []  # (선별 순번, 캐시 키)
+    prompts: List[str] = []
+    hits: List[Tuple[int, str]] = []
+    for i, (pno, txt, _) in enumerate(selected):
+        # 추출 압축(머리말 제거 + 핵심 문장) 후에도 per_page_limit자 상한은 유지
+        excerpt = ((compress_page(txt, page_tokens, boiler) or txt) if page_tokens > 0 else txt)[:per_page_limit]
+        key = _page_summary_key(excerpt)
+        s = page_cache.get_page(key) if page_cache is not None else None
+        if s is None:
+            todo.append((i, key)); prompts.append(_PAGE_SUMMARY_PROMPT.format(page_text=excerpt))
+        else:
+            hits.append((i, s))
+    total = len(selected)
+    # 계획 = 페이지 요약 + 예상 중간 통합(재사용 요약은 실제 길이, 새 요약은 추정 길이) + 최종 1회
+    est = [len(s) + 8 for _, s in hits] + [_EST_PAGE_SUM_CHARS] * len(prompts)
+    prog = _Progress(len(prompts) + _plan_reduce(est, budget) + 1)
 
-    if not cands:
-        cands = [(it.get("page"), (it.get("text") or ""), 0.0) for it in pages[:3]]
+    n_done = 0
+    def _page_event(i: int, s: str, msg: str) -> Dict[str, Any]:
+        nonlocal n_done
+        n_done += 1
+        if not _failed(s): page_sums[i] = f"(p.{selected[i][0]}) {s}"
+        return {"type": "page", "page": selected[i][0], "text": s, "done": n_done, "total": total,
+                "msg": msg.format(n_done=n_done), "ratio": prog.last}
 
-    # 2) 상위 페이지 선별
-    cands.sort(key=lambda x: x[2], reverse=True)
-    selected = cands[:max_pages]
+    for i, s in hits:
+        yield _page_event(i, s, f"페이지 요약 재사용 ({{n_done}}/{total})")
+    for j, s in _llm_map(prompts, workers):
+        i, key = todo[j]
+        if page_cache is not None and not _failed(s):
+            page_cache.put_page(key, s)
+        prog.step()
+        yield _page_event(i, s, f"페이지 요약 중… ({{n_done}}/{total}, p.{selected[i][0]})")
 
-    # 3) 페이지 요약
-    page_sums: List[str] = []
-    total = len(selected)
-    for i, (pno, txt, _) in enumerate(selected, 1):
-        if progress_cb:
-            progress_cb(f"페이지 요약 중… (p.{pno})", i / (total + 1))
-        excerpt = txt[:per_page_limit]
-        up = _PAGE_SUMMARY_PROMPT.format(page_text=excerpt)
-        s = llm_chat(SUMMARIZER_DEFAULT_SYSTEM, up)
-        page_sums.append(f"(p.{pno}) {s}")
-
-    # 4) 최종 요약
-    if progress_cb:
-        progress_cb("최종 요약 통합 중…", total / (total + 1))
-    joined = "\n\n".join(page_sums)
-    final = llm_chat(
-        SUMMARIZER_DEFAULT_SYSTEM,
-        _FINAL_SUMMARY_PROMPT.format(page_summaries=joined[:12000])
-    )
+    # 4) reduce: 예산을 넘는 동안 그룹별 중간 통합(잘라내지 않고 합침)
+    parts = [p for p in page_sums if p]
+    level = 0
+    while True:
+        prog.replan(_plan_reduce([len(p) for p in parts], budget) + 1)  # 실제 요약 길이로 남은 계획 보정
+        if not (len(parts) > 1 and sum(len(p) + 2 for p in parts) > budget):
+            break
+        groups = _group_by_budget(parts, budget)
+        if len(groups) >= len(parts):  # 더 줄일 수 없음(항목 하나하나가 예산 초과)
+            break
+        level += 1
+        merged: List[Optional[str]] = [None] * len(groups)
+        for n_merged, (g, s) in enumerate(_llm_map([_GROUP_SUMMARY_PROMPT.format(page_summaries="\n\n".join(gr))
+                                                    for gr in groups], workers), 1):
+            if not _failed(s): merged[g] = s
+            yield {"type": "reduce", "level": level, "done": n_merged, "total": len(groups),
+                   "msg": f"요약 묶음 통합 중… ({n_merged}/{len(groups)})", "ratio": prog.step()}
+        parts = [m for m in merged if m]
+
+    # 5) 최종 요약(살아남은 요약이 없으면 LLM을 부르지 않음 → "⚠️"라 캐시 안 됨)
+    if not parts:
+        yield {"type": "final", "text": "⚠️ 요약 중 오류: 페이지 요약 호출이 모두 실패했습니다.",
+               "msg": "완료", "ratio": prog.step()}
+        return
+    joined = "\n\n".join(parts)
+    final = _chat(_FINAL_SUMMARY_PROMPT.format(page_summaries=joined[:budget]))
+    yield {"type": "final", "text": final, "msg": "완료", "ratio": prog.step()}
+
+def summarize_from_chunks(
+    chunks: Dict[str, Any],
+    max_pages: int = 20,
+    per_page_limit: int = 2800,
+    progress_cb: Optional[Callable[[str, float], None]] = None,
+    page_cache: Any = None,
+    keywords: Optional[Sequence[str]] = None,
+    workers: int = SUM_WORKERS,
+    budget: int = SUM_BUDGET,
+    page_tokens: int = SUM_PAGE_TOKENS,
+) -> str:
+    """
+    iter_summary_events를 끝까지 소비해 최종 요약만 반환(단계는 iter_summary_events 참고).
+    progress_cb(msg, ratio)는 호출 측 스레드에서만 불림.
+    """
+    final = ""
+    for ev in iter_summary_events(chunks, max_pages, per_page_limit, page_cache, keywords, workers, budget, page_tokens):
+        if ev["type"] == "final":
+            final = ev["text"]
+        elif progress_cb:
+            progress_cb(ev["msg"], ev["ratio"])
     if progress_cb:
         progress_cb("완료", 1.0)
     return final
+
+class SummaryJob:
+    """
+    iter_summary_events를 백그라운드 스레드에서 돌리며 결과를 쌓아 두는 작업(UI는 snapshot()만 폴링).
+    on_final(text)은 최종 요약이 나오면 작업 스레드에서 한 번 호출(캐시 저장 등).
+    """
+    def __init__(self, chunks: Dict[str, Any], on_final: Optional[Callable[[str], None]] = None, **kw: Any):
+        self.pages: List[Tuple[Any, str]] = []  # 도착 순 (page, 페이지 요약)
+        self.final: Optional[str] = None
+        self.msg, self.ratio = "요약 준비 중…", 0.0
+        self._on_final = on_final
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, args=(chunks, kw), name="hl-summary", daemon=True)
+
+    def start(self) -> "SummaryJob":
+        self._thread.start()
+        return self
+
+    def _run(self, chunks: Dict[str, Any], kw: Dict[str, Any]) -> None:
+        try:
+            for ev in iter_summary_events(chunks, **kw):
+                with self._lock:
+                    self.msg, self.ratio = ev["msg"], ev["ratio"]
+                    if ev["type"] == "page":
+                        self.pages.append((ev["page"], ev["text"]))
+                    elif ev["type"] == "final":
+                        self.final = ev["text"]
+        except BaseException as e:  # st.stop() 등도 여기서 끝냄(스레드 밖으로 새지 않게)
+            with self._lock:
+                self.final = f"⚠️ 요약 중 오류: {e}"
+        if self._on_final and self.final is not None:
+            try: self._on_final(self.final)
+            except Exception: pass
+
+    @property
+    def done(self) -> bool:
+        return self.final is not None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"pages": list(self.pages), "final": self.final, "msg": self.msg, "ratio": self.ratio}
@@ -0,0 +1,337 @@
+# table_grid.py
+# -*- coding: utf-8 -*-
+"""
+표 영역 → 셀 격자 복원 → pandas DataFrame (LLM 호출 없음)
+- 입력: 영역 안 단어 bbox/문자열 + 벡터 드로잉 bbox(괘선)
+- 열 경계: 세로 괘선이 있으면 괘선 x, 없으면 단어 x구간 투영의 빈 틈(여러 줄에 공통인 공백)
+- 행 경계: 단어 중심 y 클러스터(줄). 가로 괘선이 촘촘하면 괘선 사이 줄을 한 행으로 합침(셀 내 줄바꿈)
+- 머리행(숫자 없는 앞줄, 최대 3줄)·단위행('단위:')·주석행('자료:', '주:' …) 분리
+- 숫자 열은 float/int로 변환(천단위 콤마, %, △/▽ 음수 표기, '-' 결측)
+- concat_tables: 여러 쪽에 걸친 표('(계속)') 조각 잇기
+"""
+from __future__ import annotations
+import math, re
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+_RULE_THIN = 1.5      # 이 두께(pt) 이하 선/사각형 → 괘선
+_MERGE_TOL = 2.0      # 같은 괘선으로 볼 좌표 차(pt)
+_MAX_HEAD_ROWS = 3
+_MAX_ROW_GAP = 3.0    # 괘선 없는 표: 줄 사이 공백이 글자 높이의 이 배수를 넘으면 표 본체가 끝난 것으로
+
+_RE_NUM = re.compile(r"^\(?([△▽▲▼−-])?\(?([0-9][0-9,]*(?:\.[0-9]+)?|\.[0-9]+)\)?(%p|%)?$")
+_NA = {"", "-", "–", "—", "…", "...", "x", "X", "n.a.", "N/A", "NA", "-.-"}
+_RE_NOTE = re.compile(r"^(자료|주\s*[:)）\d]|출처|※|\*|注)")
+_RE_UNIT = re.compile(r"단위\s*[:：]")
+
+
+def _cluster(vals: np.ndarray, tol: float) -> List[float]:
+    """1차원 좌표 군집 → 군집 평균(정렬)"""
+    if not len(vals): return []
+    v = np.sort(vals)
+    cuts = np.flatnonzero(np.diff(v) > tol) + 1
+    return [float(g.mean()) for g in np.split(v, cuts)]
+
+
+def _rule_lines(rules: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    드로잉 bbox → (가로선 [y, x0, x1], 세로선 [x, y0, y1]).
+    얇은 선/사각형은 그대로, 굵은 사각형(셀 테두리)은 네 변으로 분해.
+    """
+    if not len(rules):
+        return np.zeros((0, 3), np.float32), np.zeros((0, 3), np.float32)
+    x0, y0, x1, y1 = rules.T
+    w, h = x1 - x0, y1 - y0
+    hor = (h <= _RULE_THIN) & (w > _RULE_THIN)
+    ver = (w <= _RULE_THIN) & (h > _RULE_THIN)
+    box = (w > _RULE_THIN) & (h > _RULE_THIN)
+    H = [np.c_[(y0 + y1)[hor] / 2, x0[hor], x1[hor]], np.c_[y0[box], x0[box], x1[box]], np.c_[y1[box], x0[box], x1[box]]]
+    V = [np.c_[(x0 + x1)[ver] / 2, y0[ver], y1[ver]], np.c_[x0[box], y0[box], y1[box]], np.c_[x1[box], y0[box], y1[box]]]
+    return np.vstack(H).astype(np.float32), np.vstack(V).astype(np.float32)
+
+
+def _text_lines(words: np.ndarray) -> List[np.ndarray]:
+    """단어 중심 y로 줄 묶기(위→아래), 줄 안은 x 순"""
+    cy = (words[:, 1] + words[:, 3]) / 2
+    tol = 0.5 * float(np.median(words[:, 3] - words[:, 1]))
+    order = np.argsort(cy, kind="stable")
+    lines: List[List[int]] = []
+    anchor = -math.inf
+    for i in order:
+        if cy[i] - anchor > tol:
+            lines.append([]); anchor = cy[i]
+        lines[-1].append(int(i))
+    return [np.asarray(sorted(ln, key=lambda i: words[i, 0])) for ln in lines]
+
+
+def _gap_separators(words: np.ndarray, lines: List[np.ndarray]) -> List[float]:
+    """
+    세로 괘선이 없을 때 열 경계: 각 x에서 단어가 덮는 '줄 수'를 세고,
+    거의 모든 줄이 비어 있는 구간(폭 ≥ 글자 높이의 0.6)의 가운데를 경계로.
+    제목처럼 여러 열에 걸친 줄(전체의 10% 이내)은 허용.
+    """
+    idx = np.concatenate(lines)
+    lo, hi = float(words[idx, 0].min()), float(words[idx, 2].max())
+    res = 0.5
+    n = int((hi - lo) / res) + 2
+    cover = np.zeros(n, np.int32)
+    for ln in lines:
+        hit = np.zeros(n, bool)
+        for i in ln:
+            a = int((words[i, 0] - lo) / res); b = int(math.ceil((words[i, 2] - lo) / res))
+            hit[a:b + 1] = True
+        cover += hit
+    thr = int(0.1 * len(lines)) if len(lines) >= 6 else 0
+    empty = cover <= thr
+    min_gap = max(3.0, 0.6 * float(np.median(words[idx, 3] - words[idx, 1]))) / res
+    seps: List[float] = []
+    i = 0
+    while i < n:
+        if empty[i]:
+            j = i
+            while j < n and empty[j]: j += 1
+            if j - i >= min_gap and i > 0 and j < n:
+                seps.append(lo + (i + j) / 2 * res)
+            i = j
+        else:
+            i += 1
+    return seps
+
+
+def _rule_separators(vlines: np.ndarray, words: np.ndarray) -> Tuple[List[float], Tuple[float, float]]:
+    """세로 괘선 x(글자 영역 안쪽, 표 높이의 30% 이상 덮는 것) + 괘선이 덮는 y 범위"""
+    if not len(vlines): return [], (0.0, 0.0)
+    lo, hi = float(words[:, 0].min()), float(words[:, 2].max())
+    top, bot = float(words[:, 1].min()), float(words[:, 3].max())
+    inner = vlines[(vlines[:, 0] > lo + 1) & (vlines[:, 0] < hi - 1)]
+    out, ys = [], []
+    for x in _cluster(inner[:, 0], _MERGE_TOL):
+        seg = inner[np.abs(inner[:, 0] - x) <= _MERGE_TOL]
+        covered = (np.minimum(seg[:, 2], bot) - np.maximum(seg[:, 1], top)).clip(min=0).sum()
+        if covered >= 0.3 * (bot - top):
+            out.append(x); ys.append((float(seg[:, 1].min()), float(seg[:, 2].max())))
+    span = (min(a for a, _ in ys), max(b for _, b in ys)) if ys else (0.0, 0.0)
+    return out, span
+
+
+def _row_groups(words: np.ndarray, lines: List[np.ndarray], hlines: np.ndarray,
+                first_col: Optional[np.ndarray] = None) -> List[List[np.ndarray]]:
+    """
+    가로 괘선이 줄 수만큼 촘촘하면 괘선 사이 줄들을 한 행으로(셀 내 줄바꿈).
+    괘선이 없으면 첫 열에만 글자가 있고 줄 간격이 평소보다 좁은 줄을 앞 행에 붙임.
+    first_col: 단어별 첫 열 여부(괘선 없을 때만 사용)
+    """
+    if len(lines) < 2:
+        return [[ln] for ln in lines]
+    cys = [float(((words[ln, 1] + words[ln, 3]) / 2).mean()) for ln in lines]
+    ys = np.asarray(_cluster(hlines[:, 0], _MERGE_TOL)) if len(hlines) else np.zeros(0)
+    inner = ys[(ys > cys[0]) & (ys < cys[-1])]
+    if len(inner) < 0.6 * (len(lines) - 1):
+        if first_col is None:
+            return [[ln] for ln in lines]
+        pitch = np.diff(cys)
+        tight = 0.8 * float(np.median(pitch))
+        groups = [[lines[0]]]
+        for k in range(1, len(lines)):
+            if pitch[k - 1] < tight and first_col[lines[k]].all() and len(groups[-1]) == 1:
+                groups[-1].append(lines[k])
+            else:
+                groups.append([lines[k]])
+        return groups
+    band = np.searchsorted(inner, cys)
+    groups: List[List[np.ndarray]] = []
+    for k, ln in enumerate(lines):
+        if k and band[k] == band[k - 1]:
+            groups[-1].append(ln)
+        else:
+            groups.append([ln])
+    return groups
+
+
+def _to_number(s: str) -> Optional[float]:
+    """'1,234' '12.5%' '△3.2' '(5)' → 수치, 결측 표기 → nan, 숫자가 아니면 None"""
+    t = s.replace(" ", "")
+    if t in _NA: return math.nan
+    m = _RE_NUM.match(t)
+    if not m: return None
+    v = float(m.group(2).replace(",", ""))
+    return -v if m.group(1) in ("△", "▽", "▼", "−", "-") else v
+
+
+def _type_column(col: List[str]) -> Optional[pd.Series]:
+    vals = [_to_number(c) for c in col]
+    if any(v is None for v in vals) or all(isinstance(v, float) and math.isnan(v) for v in vals):
+        return None
+    arr = np.asarray(vals, dtype=np.float64)
+    if not np.isnan(arr).any() and np.all(arr == np.round(arr)) and np.abs(arr).max(initial=0) < 2**53:
+        return pd.Series(arr.astype(np.int64))
+    return pd.Series(arr)
+
+
+def _n_segments(words: np.ndarray, ln: np.ndarray, min_gap: float) -> int:
+    """줄 안에서 min_gap 이상 벌어진 단어 묶음 수(칸 수 추정)"""
+    if len(ln) < 2: return len(ln)
+    gaps = words[ln[1:], 0] - words[ln[:-1], 2]
+    return int((gaps >= min_gap).sum()) + 1
+
+
+def _body_span(words: np.ndarray, lines: List[np.ndarray], min_gap: float) -> Tuple[int, int]:
+    """
+    표 본체 줄 구간 [a, b): 칸이 2개 이상인 줄이 이어지는 가장 긴 구간.
+    사이의 한 칸 줄(구분 제목/줄바꿈)은 허용하되, 영역 폭 절반 넘는 산문 줄이나
+    글자 높이의 _MAX_ROW_GAP배 넘는 세로 공백(아래쪽 바닥글·쪽번호)에서 끊음.
+    """
+    lo, hi = float(words[:, 0].min()), float(words[:, 2].max())
+    max_gap = _MAX_ROW_GAP * float(np.median(words[:, 3] - words[:, 1]))
+    best, a, last_multi = (0, 0), None, None
+    prev_y1 = -math.inf
+    for k, ln in enumerate(lines + [np.zeros(0, np.intp)]):
+        if len(ln) and a is not None and float(words[ln, 1].min()) - prev_y1 > max_gap:
+            # 큰 세로 공백 뒤(페이지 번호·바닥글 등) → 표 본체 끝
+            if last_multi + 1 - a > best[1] - best[0]: best = (a, last_multi + 1)
+            a = None
+        multi = len(ln) and _n_segments(words, ln, min_gap) >= 2
+        prose = len(ln) == 0 or (not multi and words[ln[-1], 2] - words[ln[0], 0] > 0.5 * (hi - lo))
+        if len(ln): prev_y1 = float(words[ln, 3].max())
+        if multi:
+            if a is None: a = k
+            last_multi = k
+        elif prose and a is not None:
+            if last_multi + 1 - a > best[1] - best[0]: best = (a, last_multi + 1)
+            a = None
+    return best
+
+
+def grid_table(words: np.ndarray, texts: Sequence[str], rules: np.ndarray) -> Optional[pd.DataFrame]:
+    """
+    words: (N,4) 단어 bbox, texts: 단어 문자열, rules: (M,4) 표 영역 드로잉 bbox
+    반환: DataFrame(머리행 → 열 이름, 숫자 열은 수치형) / 격자가 안 잡히면 None
+    df.attrs: {"unit": 단위행, "note": 주석행, "columns_from": "rules"|"gaps", "header": 머리행 원문}
+    - 영역은 라벨 아래~다음 라벨/페이지 끝이라 본문 문단이 섞일 수 있음 → 괘선 격자 y범위
+      (없으면 다칸 줄 연속 구간)만 표 본체로, 위쪽은 단위행 후보, 아래쪽은 주석행 후보
+    """
+    if len(words) < 4: return None
+    lines = _text_lines(words)
+    if len(lines) < 2: return None
+    min_gap = max(3.0, 0.6 * float(np.median(words[:, 3] - words[:, 1])))
+    hlines, vlines = _rule_lines(np.asarray(rules, dtype=np.float32).reshape(-1, 4))
+    seps, (gy0, gy1) = _rule_separators(vlines, words)
+    source = "rules"
+    if seps:
+        cys = [float(((words[ln, 1] + words[ln, 3]) / 2).mean()) for ln in lines]
+        a = next((k for k, y in enumerate(cys) if y >= gy0), len(lines))
+        b = next((k for k, y in enumerate(cys) if y > gy1), len(lines))
+    else:
+        a, b = _body_span(words, lines, min_gap)
+    above, body, below = lines[:a], lines[a:b], lines[b:]
+    if len(body) < 2: return None
+    if not seps:
+        seps, source = _gap_separators(words, body), "gaps"
+    if not seps: return None
+
+    n_cols = len(seps) + 1
+    cx = (words[:, 0] + words[:, 2]) / 2
+    col_of = np.searchsorted(np.asarray(seps), cx)
+    rows: List[List[str]] = []
+    for grp in _row_groups(words, body, hlines, first_col=(col_of == 0) if source == "gaps" else None):
+        cells: List[List[str]] = [[] for _ in range(n_cols)]
+        for ln in grp:
+            for i in ln:
+                cells[col_of[i]].append(texts[i])
+        rows.append([" ".join(c).strip() for c in cells])
+
+    keep = [j for j in range(n_cols) if any(r[j] for r in rows)]
+    rows = [[r[j] for j in keep] for r in rows]
+    if len(keep) < 2: return None
+
+    # 위쪽: 단위행만, 아래쪽: 이어지는 주석행만(그 뒤 본문 문단은 버림)
+    def _line_text(ln: np.ndarray) -> str:
+        return " ".join(texts[i] for i in ln)
+    unit = next((_line_text(ln) for ln in reversed(above) if _RE_UNIT.search(_line_text(ln))), "")
+    notes: List[str] = []
+    prev_y = float(words[np.concatenate(body), 3].max())
+    for ln in below:
+        t, y0 = _line_text(ln), float(words[ln, 1].min())
+        cont = notes and y0 - prev_y < 1.5 * float(np.median(words[ln, 3] - words[ln, 1]))
+        if not (_RE_NOTE.match(t) or cont):
+            break
+        notes.append(t); prev_y = float(words[ln, 3].max())
+    # 본체 안 주석행(괘선 안쪽에 '자료:'가 있는 경우)
+    for k, r in enumerate(rows):
+        first = next((c for c in r if c), "")
+        if _RE_NOTE.match(first):
+            notes = [" ".join(c for c in rr if c) for rr in rows[k:]] + notes
+            rows = rows[:k]
+            break
+    if len(rows) < 2: return None
+
+    # 머리행: 첫 열 외에 수치가 있는 첫 행 앞까지(최대 3행), 없으면 첫 행
+    def _numeric_row(r: List[str]) -> bool:
+        vals = [_to_number(c) for c in r[1:] if c]
+        return any(v is not None and not math.isnan(v) for v in vals)
+    n_head = next((k for k, r in enumerate(rows) if _numeric_row(r)), 1)
+    n_head = min(max(n_head, 1), _MAX_HEAD_ROWS, len(rows) - 1)
+    head, data = rows[:n_head], rows[n_head:]
+    if sum(sum(bool(c) for c in r) >= 2 for r in data) < max(1, len(data) // 2):
+        return None
+
+    names: List[str] = []
+    for j in range(len(keep)):
+        nm = " ".join(h[j] for h in head if h[j]).strip() or f"col{j + 1}"
+        while nm in names: nm += "_"
+        names.append(nm)
+    df = pd.DataFrame(data, columns=names)
+    for j, nm in enumerate(names):
+        if j == 0: continue  # 첫 열은 항목명
+        typed = _type_column(df[nm].tolist())
+        if typed is not None:
+            df[nm] = typed.values
+    df.attrs.update({"unit": unit, "note": "\n".join(notes), "columns_from": source, "header": head})
+    return df
+
+
+def concat_tables(a: Optional[pd.DataFrame], b: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """
+    여러 쪽에 걸친 표 조각 잇기. 열 수가 다르거나 한쪽이 None이면 None(잘린 표를 전체로 내놓지 않음).
+    뒤 조각 머리행이 앞 조각과 다르면(머리행 반복 없이 이어진 쪽) 그 머리행은 자료 행으로 되돌림.
+    """
+    if a is None or b is None or a.shape[1] != b.shape[1]:
+        return None
+    parts = [a]
+    head = b.attrs.get("header") or []
+    if head and head != a.attrs.get("header"):
+        num = [pd.api.types.is_numeric_dtype(a[c]) for c in a.columns]
+        back = [[(_to_number(c) if n and _to_number(c) is not None else c) for c, n in zip(r, num)] for r in head]
+        parts.append(pd.DataFrame(back, columns=a.columns))
+    parts.append(b.set_axis(a.columns, axis=1))
+    df = pd.concat(parts, ignore_index=True)
+    for c in df.columns[1:]:  # 조각마다 int/float가 갈렸으면 다시 정수로
+        col = df[c]
+        if pd.api.types.is_float_dtype(col) and not col.isna().any() and (col == col.round()).all():
+            df[c] = col.astype(np.int64)
+    notes = [x for x in (a.attrs.get("note"), b.attrs.get("note")) if x]
+    df.attrs = dict(a.attrs, unit=a.attrs.get("unit") or b.attrs.get("unit", ""), note="\n".join(notes))
+    return df
+
+
+def df_to_markdown(df: pd.DataFrame, max_rows: int = 50) -> str:
+    """DataFrame → 마크다운 표(tabulate 없이). 수치 열은 값이 큰 열만 천단위 콤마, 행이 많으면 생략 표시"""
+    def _fmt(v, comma: bool) -> str:
+        if isinstance(v, (float, np.floating)):
+            if math.isnan(v): return ""
+            if float(v).is_integer(): v = int(v)
+            else: return f"{v:,.10g}" if comma else f"{v:.10g}"
+        if isinstance(v, (int, np.integer)):
+            return f"{int(v):,}" if comma else str(int(v))
+        return str(v).replace("|", "/")
+    head = df.head(max_rows)
+    comma = [pd.api.types.is_numeric_dtype(head[c]) and bool((head[c].abs() >= 10000).any()) for c in head.columns]
+    cols = [str(c) for c in df.columns]
+    md = ["| " + " | ".join(cols) + " |", "| " + " | ".join(["---"] * len(cols)) + " |"]
+    for row in head.itertuples(index=False):
+        md.append("| " + " | ".join(_fmt(v, c) for v, c in zip(row, comma)) + " |")
+    if len(df) > max_rows:
+        md.append("| " + " | ".join(["…"] * len(cols)) + " |")
+    unit = df.attrs.get("unit")
+    return (f"({unit.strip('() ')})\n" if unit else "") + "\n".join(md)
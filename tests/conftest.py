@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+"""테스트 공용: 저장소 루트 모듈(extract, text_index …)을 import 경로에"""
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
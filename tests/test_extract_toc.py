@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""표목차 기반 스캔: 목차 쪽번호가 틀려 전체 재스캔으로 폴백하는 경우의 결과·진행률"""
+from collections import Counter
+
+import fitz
+import pytest
+
+import extract
+
+_N_PAGES = 12
+_TABLE_PAGES = {4: "1-1", 8: "1-2", 10: "1-3"}  # 1-based 실제 쪽
+_MENTION_PAGES = {6, 11}                        # 본문에서 라벨만 언급(표 없음)
+
+
+def _make_pdf(path, printed):
+    """printed: 라벨 → 목차에 적힌 쪽. 라벨은 줄 가운데(캡션 줄 아님), 12pt(테스트에선 굵은 글꼴로 간주)"""
+    doc = fitz.open()
+    font = fitz.Font("korea")
+    def _page():
+        p = doc.new_page()
+        p.insert_font(fontname="KR", fontbuffer=font.buffer)
+        return p
+    toc = _page()
+    toc.insert_text((50, 60), "표 목차", fontname="KR", fontsize=9)
+    for i, lab in enumerate(sorted(_TABLE_PAGES.values())):
+        toc.insert_text((50, 80 + 14 * i), f"표 {lab} 통계 {i} ........ {printed[lab]}", fontname="KR", fontsize=9)
+    for pno in range(2, _N_PAGES + 1):
+        p = _page()
+        p.insert_text((50, 60), f"본문 {pno}쪽 에너지 수요와 공급 동향", fontname="KR", fontsize=9)
+        if pno in _TABLE_PAGES:
+            p.insert_text((50, 100), f"참고 표 {_TABLE_PAGES[pno]} 지역별 수요", fontname="KR", fontsize=12)
+            for r in range(5):
+                y = 110 + 16 * r
+                p.draw_line((50, y), (540, y))
+                p.insert_text((60, y + 12), f"20{20 + r}    {r * 12.5:.1f}    {r * 1000 + pno:,}", fontname="KR", fontsize=9)
+        elif pno in _MENTION_PAGES:
+            p.insert_text((50, 100), "앞의 표 1-1 참고", fontname="KR", fontsize=9)
+    doc.save(str(path))
+
+
+@pytest.fixture(autouse=True)
+def _bold_by_size(monkeypatch):
+    # 내장 한글 글꼴엔 Bold 이름이 없음 → 12pt 라벨을 굵은 글꼴로 취급
+    monkeypatch.setattr(extract, "_is_bold_font", lambda sp: sp.get("size", 0) >= 11)
+    extract._DOC_POOL.clear()
+
+
+def _run(path):
+    calls = []
+    toc = extract.read_toc(str(path))
+    chunks = extract.build_chunks(str(path), progress=calls.append)
+    return toc, chunks, calls
+
+
+def test_toc_fallback_rescans_only_hinted_pages_as_separate_phase(tmp_path):
+    pdf = tmp_path / "wrong_toc.pdf"
+    _make_pdf(pdf, {"1-1": 2, "1-2": 3, "1-3": 5})  # 세 항목 모두 엉뚱한 쪽 → 확정률 0 → 폴백
+    toc, chunks, calls = _run(pdf)
+    assert toc is not None and toc["offset"] == 0
+
+    phases = Counter(c["phase"] for c in calls)
+    extract_pages = [c["page_idx"] for c in calls if c["phase"] == "extract"]
+    rescan_pages = {c["page_idx"] + 1 for c in calls if c["phase"] == "rescan"}
+    # 1차 패스는 쪽마다 정확히 한 번
+    assert phases["extract"] == _N_PAGES and sorted(extract_pages) == list(range(_N_PAGES))
+    # 재스캔은 평문에 '표 N' 단서가 있는데 1차에서 표를 안 본 쪽만(목차 쪽·단서 없는 쪽 제외)
+    assert rescan_pages == (set(_TABLE_PAGES) | _MENTION_PAGES) - {2, 3, 5}
+    assert phases["rescan"] == len(rescan_pages)
+
+    assert {t["label"]: t["page"] for t in chunks["tables"]} == {v: k for k, v in _TABLE_PAGES.items()}
+    assert chunks["stats"]["pages"] == _N_PAGES
+
+
+def test_iter_chunks_rescan_progress_counts(tmp_path):
+    pdf = tmp_path / "wrong_toc.pdf"
+    _make_pdf(pdf, {"1-1": 2, "1-2": 3, "1-3": 5})
+    toc = extract.read_toc(str(pdf))
+    store = extract.ChunkStore(toc=toc)
+    seen = {"extract": [], "rescan": []}
+    for res in extract.iter_chunks(str(pdf), toc=toc):
+        store.add_page(res)
+        seen[res["phase"]].append(res["progress"])
+        assert store.pages_done <= _N_PAGES
+    assert seen["extract"] == [(k, _N_PAGES) for k in range(1, _N_PAGES + 1)]
+    m = len(seen["rescan"])
+    assert m and seen["rescan"] == [(k, m) for k in range(1, m + 1)]
+    assert store.pages_done == _N_PAGES
+
+
+def test_accurate_toc_needs_no_rescan(tmp_path):
+    pdf = tmp_path / "good_toc.pdf"
+    _make_pdf(pdf, {lab: pno for pno, lab in _TABLE_PAGES.items()})
+    toc, chunks, calls = _run(pdf)
+    assert Counter(c["phase"] for c in calls) == {"extract": _N_PAGES}
+    assert sorted(t["label"] for t in chunks["tables"]) == sorted(_TABLE_PAGES.values())
+
+
+def test_undetected_toc_entries_are_marked(tmp_path, monkeypatch):
+    pdf = tmp_path / "plain_labels.pdf"
+    _make_pdf(pdf, {lab: pno for pno, lab in _TABLE_PAGES.items()})
+    monkeypatch.setattr(extract, "_is_bold_font", lambda sp: False)  # 굵은 라벨이 없는 보고서
+    toc, chunks, _ = _run(pdf)
+    entries = chunks["toc"]["tables"]
+    assert chunks["tables"] == []
+    assert [(e["label"], e["page"], e["detected"]) for e in entries] == \
+        [(lab, pno, False) for pno, lab in sorted(_TABLE_PAGES.items())]
+    assert extract.find_table_by_label(chunks, "1-1") is None
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""요약 map 단계: 속도 제한(429) 재시도, 실패한 페이지 요약은 통합·최종 입력에서 제외"""
+import pytest
+
+summarizer = pytest.importorskip("summarizer")
+
+_RL = "⚠️ LLM 호출 중 오류: Error code: 429 - Rate limit reached"
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    calls = []
+    def _fake(system, prompt):
+        calls.append(prompt)
+        if "실패쪽" in prompt:
+            return "⚠️ LLM 호출 중 오류: boom"
+        if "제한쪽" in prompt and sum("제한쪽" in c for c in calls) < 3:
+            return _RL
+        return "- 요약됨 boom" if "boom" in prompt else "- 요약됨"
+    monkeypatch.setattr(summarizer, "llm_chat", _fake)
+    monkeypatch.setattr(summarizer.time, "sleep", lambda s: None)
+    return calls
+
+
+def _pages(marks):
+    body = "에너지 수요 증가와 공급 정책 동향을 정리한 문장입니다. " * 10
+    return {"texts": [{"page": i + 1, "text": f"{body} {m}"} for i, m in enumerate(marks)]}
+
+
+def test_rate_limited_page_is_retried(fake_llm):
+    evs = list(summarizer.iter_summary_events(_pages(["", "제한쪽", ""]), max_pages=3, page_tokens=0))
+    assert sum("제한쪽" in c for c in fake_llm) == 3
+    assert all(e["text"] == "- 요약됨" for e in evs if e["type"] == "page")
+
+
+def test_retries_are_bounded(fake_llm, monkeypatch):
+    monkeypatch.setattr(summarizer, "llm_chat", lambda s, p: fake_llm.append(p) or _RL)
+    assert summarizer._chat("x", retries=2) == _RL
+    assert len(fake_llm) == 3
+
+
+def test_failed_pages_dropped_from_final(fake_llm):
+    evs = list(summarizer.iter_summary_events(_pages(["", "실패쪽", ""]), max_pages=3, page_tokens=0))
+    pages = [e for e in evs if e["type"] == "page"]
+    assert len(pages) == 3 and pages[-1]["done"] == 3
+    final_prompt = fake_llm[-1]
+    assert "boom" not in final_prompt and final_prompt.count("- 요약됨") == 2
+    assert evs[-1]["type"] == "final" and evs[-1]["text"] == "- 요약됨"
+
+
+def test_all_pages_failed_skips_final_call(fake_llm):
+    evs = list(summarizer.iter_summary_events(_pages(["실패쪽"]), max_pages=1, page_tokens=0))
+    assert len(fake_llm) == 1
+    assert evs[-1]["text"].startswith("⚠️")
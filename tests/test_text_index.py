@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""BM25Index 점수가 rank_bm25.BM25Okapi와 같은지(단일·배치 질의)"""
+import numpy as np
+import pytest
+
+from text_index import BM25Index, build_page_index, tokenize
+
+rank_bm25 = pytest.importorskip("rank_bm25")
+
+# "에너지"는 과반 문서에 나와 idf가 음수 → epsilon 하한 경로도 거침
+_DOCS = [
+    "2023년 에너지 수요는 전년 대비 3.5% 증가했다. Energy demand grew.",
+    "에너지 공급 동향: LNG 수입 12,300천톤, 원자력 발전 비중 30%",
+    "표 1-1 에너지 수급 통계 (단위: 천toe)",
+    "Renewable energy capacity and solar power installations in Korea",
+    "재생에너지 설비용량 확대와 태양광 보급 현황",
+    "",
+    "에너지 효율 향상 정책 efficiency policy 에너지 에너지",
+]
+_CORPUS = [tokenize(d) for d in _DOCS]
+
+_QUERIES = [
+    "에너지 수요",
+    "energy demand",
+    "태양광 solar",
+    "LNG 수입 12,300천톤",
+    "3.5% 증가",
+    "에너지 에너지 정책",   # 중복 질의어는 중복 가산
+    "원자력 없는단어",      # 일부만 아는 용어
+    "없는단어 unknownword",  # 모르는 용어뿐
+    "",                      # 빈 질의
+]
+
+
+@pytest.fixture(scope="module")
+def pair():
+    return BM25Index(_CORPUS), rank_bm25.BM25Okapi(_CORPUS)
+
+
+@pytest.mark.parametrize("q", _QUERIES)
+def test_get_scores_matches_bm25okapi(pair, q):
+    idx, ref = pair
+    got = idx.get_scores(tokenize(q))
+    assert got.shape == (len(_DOCS),)
+    np.testing.assert_allclose(got, ref.get_scores(tokenize(q)), rtol=1e-9, atol=1e-12)
+
+
+def test_get_scores_batch_matches_rows(pair):
+    idx, ref = pair
+    qs = [tokenize(q) for q in _QUERIES]
+    got = idx.get_scores_batch(qs)
+    assert got.shape == (len(qs), len(_DOCS))
+    np.testing.assert_allclose(got, np.vstack([ref.get_scores(q) for q in qs]), rtol=1e-9, atol=1e-12)
+    for i, q in enumerate(qs):
+        np.testing.assert_array_equal(got[i], idx.get_scores(q))
+
+
+def test_empty_and_unknown_queries_score_zero(pair):
+    idx, _ = pair
+    assert not idx.get_scores([]).any()
+    assert not idx.get_scores(["없는단어", "unknownword"]).any()
+    assert idx.get_scores_batch([]).shape == (0, len(_DOCS))
+
+
+def test_build_page_index_follows_page_order():
+    pages = [{"page": i + 1, "text": d} for i, d in enumerate(_DOCS)]
+    idx = build_page_index(pages)
+    ref = rank_bm25.BM25Okapi(_CORPUS)
+    q = tokenize("재생에너지 태양광")
+    np.testing.assert_allclose(idx.get_scores(q), ref.get_scores(q), rtol=1e-9, atol=1e-12)
+    assert int(np.argmax(idx.get_scores(q))) == 4
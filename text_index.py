@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+본문 페이지 역색인 (BM25, rank_bm25.BM25Okapi와 같은 점수)
+- 문서 적재 시 1회 빌드: 용어 사전 + 용어별 postings CSR 배열(문서 id, 가중치)
+  가중치 = idf × tf 포화·문서 길이 정규화 항을 미리 곱해 둔 값
+- 질의는 질의어 postings를 모아(gather) 문서별 합(bincount)만 → 질문마다 재토큰화/BM25 재구성 없음
+- 여러 질의 점수 행렬(get_scores_batch): (질의 수, 문서 수)
+- get_page_index: 프로세스 LRU → ChunkCache 페이지 항목(디스크) → 빌드 순으로 재사용
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import re, threading
+import numpy as np
+from config import env_int
+
+TEXT_INDEX_VERSION = "2"
+
+_RE_TOKEN = re.compile(r"[가-힣A-Za-z]+|\d+(?:[.,]\d+)?%?")
+
+def tokenize(s: str) -> List[str]:
+    """간단 토크나이저: 한글/영문 단어 + 숫자(소수/콤마/%)"""
+    return _RE_TOKEN.findall((s or "").lower())
+
+
+class BM25Index:
+    """
+    용어 중심 CSR 역색인: vocab[용어] = t → postings는 docs/weights[indptr[t]:indptr[t+1]]
+    점수식/파라미터(k1, b, epsilon으로 음수 idf 하한)는 BM25Okapi와 동일.
+    문서 점수 = Σ(질의어) weights → 질의 시 곱셈/나눗셈 없이 모으고 더하기만
+    """
+    def __init__(self, corpus: List[List[str]], k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.k1, self.b = k1, b
+        self.vocab: Dict[str, int] = {}
+        n = len(corpus)
+        setdefault = self.vocab.setdefault
+        flat = [setdefault(w, len(self.vocab)) for toks in corpus for w in toks]
+        self.doc_len = np.array([len(t) for t in corpus], dtype=np.float64)
+        # (용어, 문서) 쌍 키의 unique = 용어→문서 순 정렬 + tf 집계를 한 번에
+        doc_of = np.repeat(np.arange(n, dtype=np.int64), self.doc_len.astype(np.int64))
+        keys, tf = np.unique(np.asarray(flat, dtype=np.int64) * max(n, 1) + doc_of, return_counts=True)
+        self.docs = (keys % max(n, 1)).astype(np.int32)
+        tf = tf.astype(np.float64)
+        self.indptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // max(n, 1), minlength=len(self.vocab)), out=self.indptr[1:])
+        self.avgdl = float(self.doc_len.sum() / n) if n else 0.0
+        df = np.diff(self.indptr).astype(np.float64)
+        idf = np.log(n - df + 0.5) - np.log(df + 0.5)
+        if len(idf):
+            idf[idf < 0] = epsilon * idf.mean()
+        self.idf = idf
+        if n:
+            norm = k1 * (1 - b + b * self.doc_len[self.docs] / self.avgdl) if self.avgdl else k1
+            self.weights = np.repeat(idf, np.diff(self.indptr)) * (tf * (k1 + 1) / (tf + norm))
+        else:
+            self.weights = np.zeros(0)
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_len)
+
+    def _gather(self, query: List[str]):
+        """질의어 postings를 이어 붙인 (문서 id, 가중치). 중복 질의어는 BM25Okapi처럼 중복 가산, 모르는 용어는 무시"""
+        ts = [t for t in map(self.vocab.get, query) if t is not None]
+        if not ts: return self.docs[:0], self.weights[:0]
+        if len(ts) == 1:
+            lo, hi = self.indptr[ts[0]], self.indptr[ts[0] + 1]
+            return self.docs[lo:hi], self.weights[lo:hi]
+        sl = np.concatenate([np.arange(self.indptr[t], self.indptr[t + 1]) for t in ts])
+        return self.docs[sl], self.weights[sl]
+
+    def get_scores(self, query: List[str]) -> np.ndarray:
+        """문서별 BM25 점수 (문서 수,)"""
+        d, w = self._gather(query)
+        return np.bincount(d, weights=w, minlength=self.n_docs).astype(np.float64)
+
+    def get_scores_batch(self, queries: List[List[str]]) -> np.ndarray:
+        """여러 질의 점수 행렬 (질의 수, 문서 수). 행마다 bincount(한 번에 합치면 Q×N 범위 집계라 오히려 느림)"""
+        out = np.zeros((len(queries), self.n_docs))
+        for i, q in enumerate(queries):
+            d, w = self._gather(q)
+            if len(d): out[i] = np.bincount(d, weights=w, minlength=self.n_docs)
+        return out
+
+
+def build_page_index(pages: List[Dict[str, Any]]) -> BM25Index:
+    """chunks["texts"] 순서 그대로 페이지별 문서"""
+    return BM25Index([tokenize(p.get("text") or "") for p in pages])
+
+
+# 문서 sha1 → 페이지 색인. 질문/재실행/세션 간 공유
+TEXT_INDEX_DOCS = env_int("HPL_TEXT_INDEX_DOCS", 16)
+_INDEXES: "OrderedDict[str, BM25Index]" = OrderedDict()
+_LOCK = threading.Lock()
+
+def get_page_index(doc_hash: Optional[str], pages: List[Dict[str, Any]], cache: Any = None) -> BM25Index:
+    """
+    프로세스 LRU → cache.get_page(디스크) → 빌드(+cache.put_page) 순.
+    페이지 수가 다르면(다른 추출 결과) 다시 빌드. doc_hash가 없으면 캐시 없이 빌드
+    """
+    if not doc_hash:
+        return build_page_index(pages)
+    from extract import EXTRACTOR_VERSION
+    key = f"textidx-{doc_hash}-v{TEXT_INDEX_VERSION}-x{EXTRACTOR_VERSION}"
+    with _LOCK:
+        idx = _INDEXES.get(key)
+        if idx is not None: _INDEXES.move_to_end(key)
+    if idx is None and cache is not None:
+        idx = cache.get_page(key)
+        if not isinstance(idx, BM25Index): idx = None
+    if idx is None or idx.n_docs != len(pages):
+        idx = build_page_index(pages)
+        if cache is not None: cache.put_page(key, idx)
+    with _LOCK:
+        _INDEXES[key] = idx; _INDEXES.move_to_end(key)
+        while len(_INDEXES) > max(1, TEXT_INDEX_DOCS):
+            _INDEXES.popitem(last=False)
+    return idx
@@ -14,13 +14,16 @@ from __future__ import annotations
 
 APP_VERSION = "2025-09-26.04"
 
-import time, hashlib, datetime as dt, re
+import time, datetime as dt, re
 from typing import Dict, Any, List, Optional
 
+import numpy as np
 import pandas as pd
 import streamlit as st
+from config import env_int
 from styles import get_css, ACCENT
-from extract import build_chunks, crop_table_image
+from extract import (ExtractJob, ChunkStore, LazyDocument, page_count, read_toc, crop_table_image, preview_image_bytes,
+                     find_table_by_label, find_figure_by_label, table_dataframe)
 try:
     from extract import crop_figure_image
 except Exception:
@@ -43,20 +46,33 @@ except Exception:
             page_label=None,
         )
 
-from summarizer import summarize_from_chunks
+from summarizer import SummaryJob
+from chunk_cache import get_chunk_cache
+from doc_store import spool_upload
+from table_grid import df_to_markdown
 from qa_recos import QA_RECOMMENDATIONS
-from rag import RAGIndex
-try:
-    from rank_bm25 import BM25Okapi
-except Exception:
-    BM25Okapi = None
+from rag import get_rag_index
+from text_index import get_page_index, tokenize
+
+
+# 표/그림 미리보기 인코딩 폭(px): 400px 래퍼 × 고해상도 화면 2배
+PREVIEW_WIDTH = env_int("HPL_PREVIEW_WIDTH", 800)
+# 이 쪽수 이상이면 전체 추출 대신 LazyDocument(필요한 페이지만 추출)
+LAZY_MIN_PAGES = env_int("HPL_LAZY_PAGES", 300)
+# 표목차/그림목차 기반 스캔(0이면 전 페이지 라벨 스캔)
+TOC_FIRST = env_int("HPL_TOC_FIRST", 1)
+# 이만큼 추출되면 분석 화면으로 넘어가고 나머지는 백그라운드(ExtractJob)
+FIRST_PAGES = env_int("HPL_FIRST_PAGES", 20)
+
+# st.fragment(1.37+) / experimental_fragment — 없으면 요약 진행 표시는 재실행 때만 갱신
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
 
 
 # ================================ 세션/유틸 ================================
 def _init_session_defaults():
     """앱 전역 세션키 기본값"""
     st.session_state.setdefault("route", "landing")
-    st.session_state.setdefault("pdf_bytes", None)
+    st.session_state.setdefault("pdf_doc", None)         # doc_store.DocHandle(스풀 경로+sha1)
     st.session_state.setdefault("pdf_name", "")
     st.session_state.setdefault("chunks", {})
     st.session_state.setdefault("summary", "")
@@ -68,8 +84,8 @@ def _init_session_defaults():
 
 def _pdf_id() -> Optional[str]:
     """업로드 PDF를 해시로 식별"""
-    data = st.session_state.get("pdf_bytes")
-    return hashlib.sha1(data).hexdigest()[:12] if data else None
+    doc = st.session_state.get("pdf_doc")
+    return doc.doc_id if doc else None
 
 
 def _threads() -> List[Dict[str, Any]]:
@@ -94,7 +110,7 @@ def _ensure_thread():
     tid = f"{pid}-{int(time.time())}"
     _threads().append(
         {"tid": tid, "pdf_id": pid, "pdf_name": name, "ts": dt.datetime.now().strftime("%Y-%m-%d %H:%M"),
-         "messages": [], "pdf_bytes": st.session_state.get("pdf_bytes"), "chunks": {}, "summary": ""}
+         "messages": [], "pdf_doc": st.session_state.get("pdf_doc"), "chunks": {}, "summary": ""}
     )
     st.session_state["_current_tid"] = tid
 
@@ -115,7 +131,7 @@ def render_sidebar():
         label = f"📄 {t['pdf_name']} · {t['ts']} · 질문 {len(t['messages'])}개"
         if st.sidebar.button(label, key=f"hist-{t['tid']}", use_container_width=True):
             st.session_state.update(
-                {"_current_tid": t["tid"], "pdf_name": t["pdf_name"], "pdf_bytes": t.get("pdf_bytes"),
+                {"_current_tid": t["tid"], "pdf_name": t["pdf_name"], "pdf_doc": t.get("pdf_doc"),
                  "chunks": t.get("chunks", {}), "summary": t.get("summary", ""), "route": "analysis"}
             ); st.rerun()
 
@@ -138,13 +154,15 @@ def landing_page():
     if st.button("🔍 분석 시작", use_container_width=True):
         if not upl:
             st.warning("먼저 PDF를 업로드해주세요."); st.stop()
-        pdf_bytes, pdf_name = upl.read(), upl.name
-        pdf_id = hashlib.sha1(pdf_bytes).hexdigest()[:12]
+        # 업로드 → 디스크 스풀(해시는 쓰면서 계산). 세션/스레드엔 핸들만 보관
+        pdf_name = upl.name
+        doc = spool_upload(upl, name=pdf_name)
+        pdf_id = doc.doc_id
         tid = f"{pdf_id}-{int(time.time())}"
         _threads().append({"tid": tid, "pdf_id": pdf_id, "pdf_name": pdf_name,
                            "ts": dt.datetime.now().strftime("%Y-%m-%d %H:%M"),
-                           "messages": [], "pdf_bytes": pdf_bytes, "chunks": {}, "summary": ""})
-        st.session_state.update({"_current_tid": tid, "pdf_bytes": pdf_bytes, "pdf_name": pdf_name, "route": "loading"})
+                           "messages": [], "pdf_doc": doc, "chunks": {}, "summary": ""})
+        st.session_state.update({"_current_tid": tid, "pdf_doc": doc, "pdf_name": pdf_name, "route": "loading"})
         st.rerun()
 
 
@@ -190,23 +208,77 @@ def loading_page():
 
     st.markdown("<div style='height:25px'></div>", unsafe_allow_html=True)  # 🔧 스피너/제목과 로딩바 사이 간격 확보
     bar = st.progress(0.0, text="PDF 처리 시작")
-    pdf_bytes = st.session_state.get("pdf_bytes")
-    if not pdf_bytes:
+    pdf_doc = st.session_state.get("pdf_doc")
+    if not pdf_doc:
         st.warning("업로드된 PDF가 없습니다."); return
 
-    # 실제 추출/요약
-    chunks = build_chunks(pdf_bytes)
-    def _cb(msg, ratio): bar.progress(ratio, text=msg)
-    summary = summarize_from_chunks(chunks, max_pages=20, progress_cb=_cb)
+    # 같은 보고서 재업로드 → 디스크 캐시에서 바로 로드(추출/요약 생략)
+    doc_hash = pdf_doc.sha1
+    cache = get_chunk_cache()
+    hit = cache.get(doc_hash) or {}
+    chunks, summary = _cacheable(hit.get("chunks")), hit.get("summary") or ""
+
+    # 대형 문서: 전역 패스(텍스트·라벨 위치)만 하고 표/그림은 필요할 때 페이지 단위 추출
+    lazy = not chunks and page_count(pdf_doc) >= LAZY_MIN_PAGES
+    if lazy:
+        bar.progress(0.0, text="페이지 색인 중…")
+        chunks = LazyDocument(pdf_doc, page_cache=cache)
+
+    th = _current_thread()
+    st.session_state["summary_live"] = not summary
+
+    # 실제 추출: 백그라운드 ExtractJob → 앞쪽 FIRST_PAGES쪽(또는 전체)이 쌓이면 바로 분석 화면.
+    # 나머지 추출·요약 시작·본문 색인은 작업 스레드의 on_done에서
+    if not chunks:
+        toc = read_toc(pdf_doc) if TOC_FIRST else None
+        if toc:
+            n_tt, n_tf = len(toc["toc"]["tables"]), len(toc["toc"]["figures"])
+            bar.progress(0.0, text=f"목차 인식: 표 {n_tt} · 그림 {n_tf}")
+
+        def _on_done(result: Dict[str, Any], th=th):
+            if th is not None: th["chunks"] = result
+            if not summary: _start_summary(th, result, doc_hash, cache)
+            get_page_index(doc_hash, result.get("texts", []) or [], cache)
+
+        job = ExtractJob(pdf_doc, page_cache=cache, toc=toc, on_done=_on_done).start()
+        first = min(FIRST_PAGES, page_count(pdf_doc))
+        while not job.store.wait(min_pages=first, timeout=0.2):
+            phase, k, total = job.progress()  # 단계별(1차 추출 / 목차 보정 재스캔) 진행
+            msg = "목차 밖 표·그림 다시 찾는 중…" if phase == "rescan" else "페이지 추출 중…"
+            bar.progress(min(1.0, k / max(1, total)), text=f"{msg} ({k}/{total})")
+        chunks = job.result if job.done and job.result is not None else job.store
+        if th and not job.done: th["extract_job"] = job
+    else:
+        if not summary: _start_summary(th, chunks, doc_hash, cache, lazy=lazy)
+        # 본문 검색 역색인은 적재 시 1회(디스크 캐시에 있으면 로드만)
+        get_page_index(doc_hash, chunks.get("texts", []) or [], cache)
 
     # 세션 저장
     st.session_state["chunks"], st.session_state["summary"] = chunks, summary
-    th = _current_thread()
     if th: th.update({"chunks": chunks, "summary": summary})
 
     st.session_state["route"] = "analysis"; st.rerun()
 
 
+# 실행마다 다시 계산하는 키(개정판 재사용 리포트·단계별 시간) — 캐시에 넣으면 재업로드 때 지난 실행 값이 보임
+_RUN_KEYS = ("reuse", "stats")
+
+def _cacheable(chunks: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    return {k: v for k, v in chunks.items() if k not in _RUN_KEYS} if chunks else chunks
+
+
+def _start_summary(th: Optional[Dict[str, Any]], chunks: Dict[str, Any], doc_hash: str, cache: Any,
+                   lazy: bool = False) -> None:
+    """요약은 백그라운드 작업 → 분석 화면에서 페이지 요약부터 점진 표시(대화는 바로 가능)"""
+    def _on_final(text: str):
+        # LLM 오류 문구는 캐시하지 않음(다음 업로드 때 요약 재시도)
+        # LazyDocument는 요약만 저장(페이지 결과는 page_cache에 개별 저장됨)
+        cache.put(doc_hash, {} if lazy else _cacheable(chunks), "" if text.startswith("⚠️") else text)
+        if th is not None: th["summary"] = text
+    job = SummaryJob(chunks, on_final=_on_final, max_pages=20, page_cache=cache).start()
+    if th is not None: th["summary_job"] = job
+
+
 def analysis_page():
     _init_session_defaults()
 
@@ -230,22 +302,45 @@ def analysis_page():
     summary  = st.session_state.get("summary") or ""
     _ensure_thread()
 
-    n_t, n_f, n_x = len(chunks.get("tables", [])), len(chunks.get("figures", [])), len(chunks.get("texts", []))
+    # 백그라운드 추출이 끝났으면 점진 ChunkStore → 최종 dict로 교체
+    th = _current_thread() or {}
+    xjob = th.get("extract_job")
+    if xjob is not None and xjob.done:
+        th.pop("extract_job", None); xjob_error = xjob.error
+        if xjob.result is not None:
+            chunks = st.session_state["chunks"] = th["chunks"] = xjob.result
+        xjob = None
+    else:
+        xjob_error = None
+
+    toc = chunks.get("toc") or {}  # LazyDocument도 전체 추출 없이 개수 표시
+    n_t, n_f, n_x = len(toc.get("tables", [])), len(toc.get("figures", [])), len(chunks.get("texts", []))
+    n_reused = len((chunks.get("reuse") or {}).get("reused", []))
+    reuse_note = f" · 이전 판 재사용 {n_reused}/{n_x}p" if n_reused else ""
     st.markdown(
         f"<div class='hp-header'><div class='title'>📄 {pdf_name}</div>"
-        f"<div class='summary'>텍스트 {n_x} · 표 {n_t} · 그림 {n_f}</div></div>",
+        f"<div class='summary'>텍스트 {n_x} · 표 {n_t} · 그림 {n_f}{reuse_note}</div></div>",
         unsafe_allow_html=True
     )
+    if xjob is not None:
+        _render_extract_progress(xjob)
+    elif xjob_error is not None:
+        st.warning(f"일부 페이지만 추출되었습니다: {xjob_error}")
 
     # ================== 탭 ==================
     tab_chat, tab_toc = st.tabs(["💬 대화", "📑 표·그림 목차"])
 
     # ----------------------- 대화 탭 -----------------------
     with tab_chat:
-        with st.expander("원문 요약", expanded=False):
-            if summary:
+        job = (_current_thread() or {}).get("summary_job")
+        with st.expander("원문 요약", expanded=bool(st.session_state.get("summary_live"))):
+            if job is not None and not summary:
+                _render_summary_progress(job)
+            elif summary:
                 summary_fmt = _format_paragraphs(summary, bullets=True)
                 st.markdown(f"<div class='hp-answer-box1'>{summary_fmt}</div>", unsafe_allow_html=True)
+            elif xjob is not None:
+                st.info("본문 추출이 끝나면 요약을 시작합니다.")
             else:
                 st.info("요약이 아직 준비되지 않았습니다.")
 
@@ -296,12 +391,38 @@ def analysis_page():
 
 
 # ============================ QA 파이프라인 ============================
+def _grid_table_md(hits: List[Dict[str, Any]]) -> Optional[str]:
+    """검색된 표 중 셀 격자가 복원되는 첫 표 → 마크다운(LLM 호출 없음)"""
+    for hit in hits:
+        df = _table_df(hit)
+        if df is not None and len(df):
+            return df_to_markdown(df)
+    return None
+
+
+def _doc_hash() -> Optional[str]:
+    """현재 문서 sha1(표 인덱스 캐시 키)"""
+    doc = st.session_state.get("pdf_doc")
+    return getattr(doc, "sha1", None)
+
+
+def _table_index(chunks: Dict[str, Any], pages: List[int]):
+    """
+    문서 표 인덱스. LazyDocument는 전 페이지 추출 없이 질문 관련 쪽(본문 검색 상위)만 추출해
+    그 쪽의 표를 색인에 보충(get_rag_index가 추출된 페이지분만 점진 색인)
+    """
+    if isinstance(chunks, LazyDocument) and not chunks.complete:
+        chunks.ensure(pages)
+    return get_rag_index(_doc_hash(), chunks)
+
+
 def _qa_pipeline(query: str, chunks: Dict[str, Any]) -> (str, list):
     """전체 원문 QA: 표 RAG + 본문 검색 결합"""
     table_parts: List[str] = []
     grounds_parts: List[tuple] = []  # (snippet, page)
 
-    rag = RAGIndex(); rag.build_from_chunks(chunks)
+    text_hits = _search_text_pages(query, chunks, k=3, per_len=1200)
+    rag = _table_index(chunks, [h["page"] for h in text_hits])
 
     # 1) 표/그림 관련 상위 (context로만 사용, 근거에는 추가하지 않음)
     table_hits = rag.search_tables(query, k=3)
@@ -313,7 +434,6 @@ def _qa_pipeline(query: str, chunks: Dict[str, Any]) -> (str, list):
         table_parts.append(f"(표/그림 p.{pno}) {title}\n{prev}\n{nb}")
 
     # 2) 본문 텍스트 검색 (근거는 여기서만 추가)
-    text_hits = _search_text_pages(query, chunks, k=3, per_len=1200)
     for h in text_hits:
         snippet_clean = _cleanup_text_for_grounds(h["snippet"])
         if snippet_clean:
@@ -327,9 +447,9 @@ def _qa_pipeline(query: str, chunks: Dict[str, Any]) -> (str, list):
 
     ans = answer_with_context(query, ctx, page_label=None)
 
-    # ✅ 사용자가 "표" 요청했을 때만 표 변환 실행
+    # ✅ 사용자가 "표" 요청했을 때만 표 변환 실행(복원된 표 격자 우선, 없을 때만 LLM 변환)
     if "표" in query:
-        table_suggestion = make_table_from_text(ctx)
+        table_suggestion = _grid_table_md(table_hits) or make_table_from_text(ctx)
         if table_suggestion:
             ans += "\n\n---\n\n📊 요청하신 내용을 표로 정리하면:\n" + table_suggestion
 
@@ -341,7 +461,8 @@ def _qa_pipeline_tables_only(query: str, chunks: Dict[str, Any]) -> (str, list):
     table_parts: List[str] = []
     grounds_parts: List[tuple] = []  # (snippet, page)
 
-    rag = RAGIndex(); rag.build_from_chunks(chunks)
+    text_hits = _search_text_pages(query, chunks, k=3, per_len=1200)
+    rag = _table_index(chunks, [h["page"] for h in text_hits])
     hits = rag.search_tables(query, k=5)
     for hit in hits:
         title = (hit.get("title") or "").strip()
@@ -351,7 +472,6 @@ def _qa_pipeline_tables_only(query: str, chunks: Dict[str, Any]) -> (str, list):
         table_parts.append(f"(표/그림 p.{pno}) {title}\n{prev}\n{nb}")
 
     # 본문 Top3 근거도 수집
-    text_hits = _search_text_pages(query, chunks, k=3, per_len=1200)
     for h in text_hits:
         snippet_clean = _cleanup_text_for_grounds(h["snippet"])
         if snippet_clean:
@@ -364,15 +484,49 @@ def _qa_pipeline_tables_only(query: str, chunks: Dict[str, Any]) -> (str, list):
 
     ans = answer_with_context(query, ctx, page_label=None)
 
-    # ✅ 사용자가 "표" 요청했을 때만 표 변환 실행
+    # ✅ 사용자가 "표" 요청했을 때만 표 변환 실행(복원된 표 격자 우선, 없을 때만 LLM 변환)
     if "표" in query:
-        table_suggestion = make_table_from_text(ctx)
+        table_suggestion = _grid_table_md(hits) or make_table_from_text(ctx)
         if table_suggestion:
             ans += "\n\n---\n\n📊 요청하신 내용을 표로 정리하면:\n" + table_suggestion
 
     return ans, grounds_parts
 
 
+# ================================ 요약 진행 ================================
+def _render_summary_progress(job: SummaryJob):
+    """요약 작업 폴링: 도착한 페이지 요약을 쪽별로 표시 → 최종 요약이 나오면 세션에 반영 후 전체 재실행"""
+    snap = job.snapshot()
+    if snap["final"] is not None:
+        th = _current_thread()
+        st.session_state["summary"] = snap["final"]
+        if th:
+            th["summary"] = snap["final"]; th.pop("summary_job", None)
+        st.rerun()
+    st.progress(snap["ratio"], text=snap["msg"])
+    if not snap["pages"]:
+        st.caption("페이지 요약을 기다리는 중…"); return
+    body = "\n\n".join(f"<b>p.{p}</b>\n{_format_paragraphs(t, bullets=True)}"
+                        for p, t in sorted(snap["pages"], key=lambda x: x[0] or 0))
+    st.markdown(f"<div class='hp-answer-box1'>{body}</div>", unsafe_allow_html=True)
+    st.caption("최종 요약이 준비되면 이 자리에 표시됩니다.")
+
+if _fragment is not None:
+    _render_summary_progress = _fragment(run_every=1.0)(_render_summary_progress)
+
+
+def _render_extract_progress(job: ExtractJob):
+    """백그라운드 추출 폴링: 진행 바만 갱신 → 끝나면 전체 재실행(최종 결과로 교체)"""
+    if job.done:
+        st.rerun()
+    phase, k, total = job.progress()
+    msg = "목차 밖 표·그림 다시 찾는 중" if phase == "rescan" else "나머지 페이지 추출 중"
+    st.progress(min(1.0, k / max(1, total)), text=f"{msg} ({k}/{total}) · 지금까지 추출된 페이지로 답합니다")
+
+if _fragment is not None:
+    _render_extract_progress = _fragment(run_every=1.0)(_render_extract_progress)
+
+
 # ================================ 대화/렌더 ================================
 def _append_dialog(which: str, user: str, answer: str, item: Optional[Dict] = None, grounds: Optional[str] = None):
     """대화/목차 탭 메시지 추가"""
@@ -465,24 +619,29 @@ def _render_toc_buttons(items: List[Dict[str, Any]], kind: str, chunks: Dict[str
             label = it.get("label")
             title = (it.get("title") or "").strip()
             text  = f"{'표' if kind=='table' else '그림'} {label}" + (f". {title}" if title else "")
+            if not it.get("detected", True):
+                text += " (본문 위치 미확인)"  # 목차에만 있는 항목 → 목차가 가리킨 쪽 본문으로 답변
 
             if st.button(text, key=f"toc-{kind}-{label}"):
                 if kind == "table":
                     t   = _find_table_full(chunks, label)
                     q   = f"<표 {label}> 설명해줘"
-                    ctx = (t or {}).get("preview_md") or ""
-                    nb  = _neighbor_text(chunks, (t or {}).get("page", 0)) if t else ""
-                    ans = answer_with_context(q, (ctx + "\n\n" + nb)[:1800], page_label=(t or {}).get("page"))
+                    df  = _table_df(t)
+                    ctx = df_to_markdown(df) if df is not None else ((t or {}).get("preview_md") or "")
+                    pg  = (t or it).get("page") or 0  # 못 찾은 항목은 목차가 가리킨 쪽 본문
+                    nb  = _neighbor_text(chunks, pg) if pg else ""
+                    ans = answer_with_context(q, (ctx + "\n\n" + nb)[:1800], page_label=pg or None)
                     _append_dialog(which="toc", user=q, answer=ans,
                                    item={"kind": "table", "obj": t}, grounds=nb)
                 else:
                     f   = _find_figure_full(chunks, label)
                     q   = f"<그림 {label}> 설명해줘"
-                    nb  = _neighbor_text(chunks, (f or {}).get("page", 0)) if f else ""
+                    pg  = (f or it).get("page") or 0
+                    nb  = _neighbor_text(chunks, pg) if pg else ""
                     img = None
                     try:
-                        if f and f.get("bbox") and st.session_state.get("pdf_bytes"):
-                            img = crop_figure_image(st.session_state["pdf_bytes"], f["page"] - 1, f["bbox"], dpi=300)
+                        if f and f.get("bbox") and st.session_state.get("pdf_doc"):
+                            img = crop_figure_image(st.session_state["pdf_doc"], f["page"] - 1, f["bbox"], dpi=300)
                     except Exception:
                         img = None
                     ans = explain_figure_image(q, img, neighbor_text=nb)
@@ -511,66 +670,49 @@ def _render_item_preview(item: Dict[str, Any]):
         title_text = ("표" if kind == "table" else "그림") + " " + str(obj.get("label"))
     st.markdown(f"<div class='hp-figtitle'>{title_text}</div>", unsafe_allow_html=True)
 
-    # 이미지 크롭
-    img = None
-    try:
-        if kind == "table" and obj.get("bbox") and st.session_state.get("pdf_bytes"):
-            img = crop_table_image(st.session_state["pdf_bytes"], obj["page"] - 1, obj["bbox"], dpi=300)
-        elif kind == "figure" and obj.get("bbox") and st.session_state.get("pdf_bytes"):
-            img = crop_figure_image(st.session_state["pdf_bytes"], obj["page"] - 1, obj["bbox"], dpi=300)
-    except Exception:
-        img = None
+    # 이미지 크롭 → 표시 폭으로 축소·인코딩된 바이트(캐시, 재실행 시 재사용)
+    # 여러 쪽에 걸친 표는 조각(segments)마다 크롭해 이어서 표시
+    segs = obj.get("segments") or [{"page": obj.get("page"), "bbox": obj.get("bbox")}]
+    imgs = []
+    for sg in segs:
+        try:
+            if kind in ("table", "figure") and sg.get("bbox") and st.session_state.get("pdf_doc"):
+                imgs.append(preview_image_bytes(st.session_state["pdf_doc"], kind, sg["page"] - 1, sg["bbox"],
+                                                width=PREVIEW_WIDTH, dpi=300))
+        except Exception:
+            pass
 
     # 이미지 표시 (최대폭 700px 래퍼 + 반응형)
-    if img is not None:
+    for img in imgs:
         st.markdown("<div style='max-width:400px /* 🔧 이미지 최대폭을 800→500으로 살짝 축소 (반응형 유지) */;margin:0 auto;'>", unsafe_allow_html=True)
         st.image(img, use_container_width=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
-
-# ============================== 검색 유틸 ==============================
-def _tok(s: str) -> List[str]:
-    """간단 토크나이저: 한글/영문 단어 + 숫자(소수/콤마/%)"""
-    return re.findall(r"[가-힣A-Za-z]+|\d+(?:[.,]\d+)?%?", (s or "").lower())
+    # 표: 복원된 셀 격자가 있으면 데이터 표도 함께(단위/주석은 캡션)
+    df = _table_df(obj) if kind == "table" else None
+    if df is not None and len(df):
+        st.dataframe(df, hide_index=True, use_container_width=True)
+        cap = " · ".join(x for x in (df.attrs.get("unit"), df.attrs.get("note")) if x)
+        if cap: st.caption(cap)
 
 
+# ============================== 검색 유틸 ==============================
 def _search_text_pages(query: str, chunks: Dict[str, Any], k: int = 3, per_len: int = 1000) -> List[Dict[str, Any]]:
-    """본문 페이지 검색: BM25 있으면 사용, 없으면 키워드 점수"""
+    """본문 페이지 검색: 문서 적재 때 만든 역색인(BM25)의 postings만으로 점수 계산"""
     pages = chunks.get("texts", []) or []
     if not pages:
         return []
 
-    docs = [p.get("text") or "" for p in pages]
-    pnos = [p.get("page") for p in pages]
-    qtok = _tok(query)
-
-    # 1) BM25
-    if BM25Okapi is not None:
-        tokenized = [_tok(d) for d in docs]
-        bm = BM25Okapi(tokenized)
-        scores = bm.get_scores(qtok)
-        order = sorted(range(len(docs)), key=lambda i: scores[i], reverse=True)[:k]
-        out = []
-        for i in order:
-            txt = docs[i].strip()
-            if not txt: continue
-            out.append({"page": pnos[i], "snippet": txt[:per_len], "score": float(scores[i])})
-        return out
-
-    # 2) 키워드 점수
-    weights = {w: 2.0 for w in qtok}
-    scored = []
-    for i, txt in enumerate(docs):
-        toks = _tok(txt)
-        if not toks: continue
-        score = sum(weights.get(t, 0.0) for t in toks)
-        scored.append((i, score))
-    scored.sort(key=lambda x: x[1], reverse=True)
+    # 추출 중(부분 결과)에는 캐시하지 않고 그때그때 빌드
+    doc_hash = None if isinstance(chunks, ChunkStore) and not chunks.done else _doc_hash()
+    idx = get_page_index(doc_hash, pages, get_chunk_cache())
+    scores = idx.get_scores(tokenize(query))
+    order = np.argsort(-scores, kind="stable")[:k]
     out = []
-    for i, sc in scored[:k]:
-        t = docs[i].strip()
-        if not t: continue
-        out.append({"page": pnos[i], "snippet": t[:per_len], "score": float(sc)})
+    for i in order:
+        txt = (pages[i].get("text") or "").strip()
+        if not txt: continue
+        out.append({"page": pages[i].get("page"), "snippet": txt[:per_len], "score": float(scores[i])})
     return out
 
 
@@ -658,6 +800,8 @@ def _select_top_grounds(text: str, max_n: int = 3) -> str:
 # ============================== 헬퍼 ==============================
 def _find_table_full(chunks: Dict[str, Any], label: str) -> Optional[Dict[str, Any]]:
     """라벨(예: 2-1)로 표 찾기"""
+    if isinstance(chunks, LazyDocument):
+        return find_table_by_label(chunks, label)  # 후보 페이지만 추출
     for t in chunks.get("tables", []):
         if str(t.get("label", "")).strip() == str(label).strip():
             return t
@@ -666,14 +810,28 @@ def _find_table_full(chunks: Dict[str, Any], label: str) -> Optional[Dict[str, A
 
 def _find_figure_full(chunks: Dict[str, Any], label: str) -> Optional[Dict[str, Any]]:
     """라벨(예: 3-2)로 그림 찾기"""
+    if isinstance(chunks, LazyDocument):
+        return find_figure_by_label(chunks, label)
     for f in chunks.get("figures", []):
         if str(f.get("label", "")).strip() == str(label).strip():
             return f
     return None
 
 
+def _table_df(t: Optional[Dict[str, Any]]) -> Optional[pd.DataFrame]:
+    """표 항목 → 셀 격자 DataFrame(추출 때는 만들지 않고 처음 쓸 때 복원, extract에서 메모)"""
+    doc = st.session_state.get("pdf_doc")
+    if not t or doc is None: return None
+    try:
+        return table_dataframe(doc, t)
+    except Exception:
+        return None
+
+
 def _neighbor_text(chunks: Dict[str, Any], page: int) -> str:
     """해당 페이지 ±1 본문 텍스트 결합"""
+    if isinstance(chunks, LazyDocument):
+        return "\n".join(chunks.page_text(p) for p in (page - 1, page, page + 1) if 1 <= p <= chunks.n_pages)[:2500]
     texts = [x for x in chunks.get("texts", []) if abs(x.get("page", 0) - page) <= 1]
     return "\n".join([(t.get("text") or "") for t in texts])[:2500]
 